@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+#  Copyright (C) 2018 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Benchmark of the glustolibs parsing helpers replaying the
+        outputs recorded with glustolibs.gluster.run_fixtures, without any
+        access to the cluster.
+
+        Every recorded command served by one of the parsing helpers is
+        replayed through that helper and timed.
+
+    Usage:
+        python replay_parsers.py /var/tmp/fixtures/TestClass.json --repeat 5
+"""
+
+import argparse
+import re
+import timeit
+
+from glustolibs.gluster.run_fixtures import (load_fixtures, start_replay,
+                                             stop_replay)
+from glustolibs.gluster.volume_ops import get_volume_info, get_volume_status
+from glustolibs.gluster.heal_ops import get_heal_info
+from glustolibs.gluster.quota_ops import get_quota_list
+from glustolibs.gluster.snap_ops import get_snap_info
+from glustolibs.gluster.rebalance_ops import get_rebalance_status
+from glustolibs.gluster.peer_ops import get_peer_status
+
+# Command recorded -> parsing helper replaying it. The groups of the
+# pattern are passed to the helper after mnode.
+PARSERS = (
+    (r'^gluster volume info (\S+) --xml$', get_volume_info),
+    (r'^gluster vol status (\S+) +--xml$', get_volume_status),
+    (r'^gluster volume heal (\S+) info --xml$', get_heal_info),
+    (r'^gluster volume quota (\S+) list +--xml$', get_quota_list),
+    (r'^gluster snapshot info --xml$', get_snap_info),
+    (r'^gluster volume rebalance (\S+) status --xml$', get_rebalance_status),
+    (r'^gluster peer status --xml$', get_peer_status),
+    )
+
+
+def get_replayable_calls(calls):
+    """Returns the list of (helper, args, output size) for the recorded
+    calls which can be replayed through one of the PARSERS.
+    """
+    replayable = []
+    seen = set()
+    for call in calls:
+        for pattern, helper in PARSERS:
+            match = re.match(pattern, call['cmd'])
+            if match is None:
+                continue
+            args = (call['host'],) + match.groups()
+            if (helper, args) not in seen:
+                seen.add((helper, args))
+                replayable.append((helper, args, len(call['out'] or '')))
+            break
+    return replayable
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark of the parsing helpers on recorded fixtures")
+    parser.add_argument('fixture_file', help="Fixture file to replay")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="Number of times each helper is run")
+    args = parser.parse_args()
+
+    replayable = get_replayable_calls(load_fixtures(args.fixture_file))
+    if not replayable:
+        print("No call of the parsing helpers found in %s"
+              % args.fixture_file)
+        return 1
+
+    if not start_replay(args.fixture_file, strict=True):
+        return 1
+    try:
+        print("%-24s %-40s %12s %12s" % ("helper", "arguments",
+                                         "output bytes", "best (sec)"))
+        for helper, helper_args, size in replayable:
+            best = min(timeit.repeat(lambda: helper(*helper_args),
+                                     repeat=args.repeat, number=1))
+            print("%-24s %-40s %12d %12.4f" % (helper.__name__,
+                                               ', '.join(helper_args),
+                                               size, best))
+    finally:
+        stop_replay()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+#  Copyright (C) 2018 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Measures the library side overhead of the volume helpers
+        on large topologies served by the gluster cli simulator
+        (glustolibs.gluster.gluster_simulator).
+
+        For each step the wall clock time, the number of remote executions
+        and the time spent in the simulated commands (latency included) are
+        printed. The difference is the time spent in glustolibs itself.
+
+    Usage:
+        python simulated_topology.py --servers 100 --bricks 4998 \\
+            --replica 3 --latency 0.01
+"""
+
+import argparse
+import time
+
+from glusto.core import Glusto as g
+from glustolibs.gluster.gluster_simulator import (SimulatedCluster,
+                                                  start_simulator,
+                                                  stop_simulator)
+from glustolibs.gluster.volume_libs import (setup_volume, expand_volume,
+                                            shrink_volume, cleanup_volume)
+from glustolibs.gluster.brick_libs import (select_bricks_to_bring_offline,
+                                           are_bricks_offline,
+                                           wait_for_bricks_to_be_online)
+from glustolibs.gluster.volume_ops import get_volume_status
+
+
+class TimedCluster(SimulatedCluster):
+    """Simulated cluster accounting the number and the duration of the
+    executed commands.
+    """
+    def __init__(self, *args, **kwargs):
+        super(TimedCluster, self).__init__(*args, **kwargs)
+        self.calls = 0
+        self.cmd_time = 0.0
+
+    def execute(self, host, cmd):
+        start = time.time()
+        try:
+            return super(TimedCluster, self).execute(host, cmd)
+        finally:
+            self.calls += 1
+            self.cmd_time += time.time() - start
+
+    def execute_parallel(self, hosts, cmd):
+        start = time.time()
+        try:
+            return super(TimedCluster, self).execute_parallel(hosts, cmd)
+        finally:
+            self.calls += len(hosts)
+            self.cmd_time += time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Library overhead of the volume helpers at scale")
+    parser.add_argument('--servers', type=int, default=100,
+                        help="Number of simulated servers")
+    parser.add_argument('--bricks', type=int, default=4998,
+                        help="Number of bricks of the volume")
+    parser.add_argument('--replica', type=int, default=3,
+                        help="Replica count of the volume")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="Latency of every simulated command (sec)")
+    args = parser.parse_args()
+
+    servers = ['server%03d' % index for index in range(args.servers)]
+    bricks_per_server = (args.bricks * 2) // args.servers + 1
+    cluster = TimedCluster(servers, bricks_per_server=bricks_per_server,
+                           latency=args.latency)
+    mnode = servers[0]
+    volname = 'scale'
+    volume_config = {
+        'name': volname, 'servers': servers,
+        'voltype': {'type': 'distributed-replicated',
+                    'dist_count': args.bricks // args.replica,
+                    'replica_count': args.replica, 'transport': 'tcp'}}
+
+    def offline_bricks():
+        bricks = select_bricks_to_bring_offline(mnode, volname)
+        for brick in bricks['volume_bricks']:
+            cluster.set_brick_online(volname, brick, online=False)
+        return are_bricks_offline(mnode, volname, bricks['volume_bricks'])
+
+    def online_bricks():
+        cluster.execute(mnode, "gluster volume start %s force" % volname)
+        return wait_for_bricks_to_be_online(mnode, volname)
+
+    steps = (
+        ('setup_volume',
+         lambda: setup_volume(mnode, cluster.servers_info, volume_config)),
+        ('get_volume_status', lambda: get_volume_status(mnode, volname)),
+        ('expand_volume',
+         lambda: expand_volume(mnode, volname, servers,
+                               cluster.servers_info)),
+        ('bricks offline', offline_bricks),
+        ('bricks online', online_bricks),
+        ('shrink_volume', lambda: shrink_volume(mnode, volname)),
+        ('cleanup_volume', lambda: cleanup_volume(mnode, volname)),
+        )
+
+    if not start_simulator(cluster):
+        return 1
+    try:
+        print("%-20s %8s %10s %10s %10s" % (
+            "step", "result", "calls", "total (s)", "library (s)"))
+        for name, step in steps:
+            cluster.calls, cluster.cmd_time = 0, 0.0
+            start = time.time()
+            ret = step()
+            elapsed = time.time() - start
+            print("%-20s %8s %10d %10.3f %10.3f" % (
+                name, bool(ret), cluster.calls, elapsed,
+                elapsed - cluster.cmd_time))
+            if not ret:
+                g.log.error("%s failed, stopping the benchmark", name)
+                return 1
+    finally:
+        stop_simulator()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
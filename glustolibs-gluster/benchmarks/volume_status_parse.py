@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+#  Copyright (C) 2017 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Benchmark of the volume status xml parsing done by
+        glustolibs.gluster.volume_ops.get_volume_status against the
+        previous implementation, on a synthetic volume status output.
+
+    Usage:
+        python volume_status_parse.py --bricks 1000 --servers 6
+"""
+
+import argparse
+import re
+import timeit
+try:
+    import xml.etree.cElementTree as etree
+except ImportError:
+    import xml.etree.ElementTree as etree
+
+from glustolibs.gluster.volume_ops import (_parse_volume_status_xml,
+                                           parse_volume_status_xml)
+
+NODE_TEMPLATE = """
+      <node>
+        <hostname>%(hostname)s</hostname>
+        <path>%(path)s</path>
+        <peerid>%(peerid)s</peerid>
+        <status>1</status>
+        <port>%(port)s</port>
+        <ports>
+          <tcp>%(port)s</tcp>
+          <rdma>N/A</rdma>
+        </ports>
+        <pid>%(pid)d</pid>
+      </node>"""
+
+STATUS_TEMPLATE = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<cliOutput>
+  <opRet>0</opRet>
+  <opErrno>0</opErrno>
+  <opErrstr/>
+  <volStatus>
+    <volumes>
+      <volume>
+        <volName>%(volname)s</volName>
+        <nodeCount>%(count)d</nodeCount>%(nodes)s
+        <tasks/>
+      </volume>
+    </volumes>
+  </volStatus>
+</cliOutput>
+"""
+
+
+def generate_volume_status_xml(volname, num_bricks, num_servers):
+    """Generates the volume status xml output of a volume having
+    'num_bricks' bricks spread across 'num_servers' servers, along with the
+    Self-heal Daemon of each of the servers.
+    """
+    servers = ['server%d.example.com' % i for i in range(num_servers)]
+    nodes = []
+    for i in range(num_bricks):
+        server = servers[i % num_servers]
+        nodes.append(NODE_TEMPLATE % {
+            'hostname': server,
+            'path': '/bricks/brick%d/%s_brick%d' % (i // num_servers,
+                                                    volname, i),
+            'peerid': 'peer-%s' % server,
+            'port': 49152 + i // num_servers,
+            'pid': 1000 + i})
+    for i, server in enumerate(servers):
+        nodes.append(NODE_TEMPLATE % {
+            'hostname': 'Self-heal Daemon',
+            'path': 'localhost' if i == 0 else server,
+            'peerid': 'peer-%s' % server,
+            'port': 'N/A',
+            'pid': 100 + i})
+    return STATUS_TEMPLATE % {'volname': volname, 'count': len(nodes),
+                              'nodes': ''.join(nodes)}
+
+
+def _legacy_parse_xml(tag_obj):
+    node_dict = {}
+    for tag in tag_obj:
+        if re.search(r'\n\s+', tag.text) is not None:
+            node_dict[tag.tag] = _legacy_parse_xml(tag)
+        else:
+            node_dict[tag.tag] = tag.text
+    return node_dict
+
+
+def legacy_parse_volume_status(out, mnode):
+    """Parsing done by get_volume_status before the single pass parser,
+    restricted to the non tiered volumes and without options.
+    """
+    root = etree.XML(out)
+    volume_list = _parse_volume_status_xml(root)
+    vol_status = {}
+    for volume in volume_list:
+        tmp_dict1 = {}
+        tmp_dict2 = {}
+        hot_bricks = []
+        cold_bricks = []
+        vol_name = [vol.text for vol in volume if vol.tag == "volName"]
+        nodes = volume.findall("node")
+        for each_node in nodes:
+            if each_node.find('path').text.startswith('/'):
+                node_name = each_node.find('hostname').text
+            elif each_node.find('path').text == 'localhost':
+                node_name = mnode
+            else:
+                node_name = each_node.find('path').text
+            node_dict = _legacy_parse_xml(each_node)
+            tmp_dict3 = {}
+            if "hostname" in node_dict.keys():
+                if node_dict['path'].startswith('/'):
+                    if node_dict['path'] in hot_bricks:
+                        node_dict["bricktype"] = 'hot'
+                    elif node_dict['path'] in cold_bricks:
+                        node_dict["bricktype"] = 'cold'
+                    else:
+                        node_dict["bricktype"] = 'None'
+                    tmp = node_dict["path"]
+                    tmp_dict3[node_dict["path"]] = node_dict
+                else:
+                    tmp_dict3[node_dict["hostname"]] = node_dict
+                    tmp = node_dict["hostname"]
+                del tmp_dict3[tmp]["path"]
+                del tmp_dict3[tmp]["hostname"]
+            if node_name in tmp_dict1.keys():
+                tmp_dict1[node_name].append(tmp_dict3)
+            else:
+                tmp_dict1[node_name] = [tmp_dict3]
+
+            tmp_dict4 = {}
+            for item in tmp_dict1[node_name]:
+                for key, val in item.items():
+                    tmp_dict4[key] = val
+            tmp_dict2[node_name] = tmp_dict4
+
+        vol_status[vol_name[0]] = tmp_dict2
+    return vol_status
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark of the volume status xml parsing")
+    parser.add_argument('--bricks', type=int, default=1000,
+                        help="Number of bricks in the volume")
+    parser.add_argument('--servers', type=int, default=6,
+                        help="Number of servers hosting the bricks")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="Number of times each parser is run")
+    args = parser.parse_args()
+
+    mnode = 'server0.example.com'
+    out = generate_volume_status_xml('testvol', args.bricks, args.servers)
+
+    vol_status, brick_index = parse_volume_status_xml(out, mnode)
+    if vol_status != legacy_parse_volume_status(out, mnode):
+        print("FAILED: parsers do not return the same volume status")
+        return 1
+    if len(brick_index) != args.bricks:
+        print("FAILED: brick index has %d entries, expected %d"
+              % (len(brick_index), args.bricks))
+        return 1
+
+    legacy = min(timeit.repeat(
+        lambda: legacy_parse_volume_status(out, mnode),
+        repeat=args.repeat, number=1))
+    current = min(timeit.repeat(
+        lambda: parse_volume_status_xml(out, mnode),
+        repeat=args.repeat, number=1))
+    print("bricks: %d servers: %d" % (args.bricks, args.servers))
+    print("legacy parser : %.4f sec" % legacy)
+    print("single pass   : %.4f sec" % current)
+    print("speed-up      : %.1fx" % (legacy / current))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
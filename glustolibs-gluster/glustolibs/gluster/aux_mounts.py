@@ -0,0 +1,184 @@
+#  Copyright (C) 2018 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Module managing a pool of auxiliary glusterfs mounts of the
+        volumes on the servers, used by the helpers reading virtual xattrs
+        (for example get_pathinfo) which need a glusterfs mount.
+
+        A mount is keyed by (mnode, volname) and reference counted. Once no
+        longer referenced it is kept for reuse and unmounted after being
+        idle for 'idle_timeout' seconds, which can be set in the glusto
+        config:
+
+            aux_mounts:
+                idle_timeout: 60
+
+        The mounts of a volume are dropped when the volume is stopped or
+        deleted, and all the mounts are dropped at class teardown.
+
+    Example:
+        with aux_mount(mnode, volname) as mount_point:
+            if mount_point is not None:
+                g.run(mnode, "getfattr -n ... %s/file1" % mount_point)
+"""
+
+import threading
+import uuid
+from contextlib import contextmanager
+from glusto.core import Glusto as g
+from glustolibs.gluster.mount_ops import mount_volume, umount_volume
+try:
+    from time import monotonic as _now
+except ImportError:
+    from time import time as _now
+
+DEFAULT_IDLE_TIMEOUT = 60
+
+# (mnode, volname) -> {'mount_point': str, 'refs': int, 'last_used': float}
+_pool = {}
+_lock = threading.RLock()
+
+
+def get_aux_mount_idle_timeout():
+    """Returns the time in seconds after which an unreferenced auxiliary
+    mount is unmounted.
+    """
+    config = g.config.get('aux_mounts') if g.config else None
+    if not isinstance(config, dict):
+        return DEFAULT_IDLE_TIMEOUT
+    return config.get('idle_timeout', DEFAULT_IDLE_TIMEOUT)
+
+
+def _unmount(key, entry):
+    """Unmounts an auxiliary mount and removes its mount point"""
+    mnode, volname = key
+    umount_volume(mnode, entry['mount_point'])
+    g.run(mnode, "rm -rf " + entry['mount_point'])
+    g.log.debug("Released auxiliary mount %s of volume %s on %s",
+                entry['mount_point'], volname, mnode)
+
+
+def _evict_idle_mounts():
+    """Unmounts the unreferenced mounts idle for longer than the idle
+    timeout.
+    """
+    deadline = _now() - get_aux_mount_idle_timeout()
+    with _lock:
+        for key, entry in list(_pool.items()):
+            if entry['refs'] == 0 and entry['last_used'] <= deadline:
+                del _pool[key]
+                _unmount(key, entry)
+
+
+def acquire_aux_mount(mnode, volname):
+    """Gets a glusterfs mount of the volume on mnode, mounting it if there
+    is none in the pool. The mount has to be released with
+    release_aux_mount.
+
+    Args:
+        mnode (str): Node on which the volume has to be mounted.
+        volname (str): volume name
+
+    Returns:
+        NoneType: None if the volume could not be mounted.
+        str: mount point of the volume on mnode.
+    """
+    _evict_idle_mounts()
+    key = (mnode, volname)
+    with _lock:
+        entry = _pool.get(key)
+        if entry is None:
+            mount_point = "/tmp/aux_mount_%s_%s" % (volname,
+                                                    uuid.uuid4().hex[:8])
+            ret, _, _ = mount_volume(volname, mtype='glusterfs',
+                                     mpoint=mount_point,
+                                     mserver=mnode,
+                                     mclient=mnode)
+            if ret != 0:
+                g.log.error("Failed to do gluster mount on volume %s on "
+                            "server %s" % (volname, mnode))
+                return None
+            entry = _pool[key] = {'mount_point': mount_point, 'refs': 0,
+                                  'last_used': _now()}
+        entry['refs'] += 1
+        return entry['mount_point']
+
+
+def release_aux_mount(mnode, volname, discard=False):
+    """Releases a mount acquired with acquire_aux_mount.
+
+    Args:
+        mnode (str): Node on which the volume is mounted.
+        volname (str): volume name
+
+    Kwargs:
+        discard (bool): True to unmount it as soon as it is no longer
+            referenced, for example when it turned out to be stale.
+            Defaults to False.
+    """
+    key = (mnode, volname)
+    with _lock:
+        entry = _pool.get(key)
+        if entry is None:
+            return
+        entry['refs'] = max(entry['refs'] - 1, 0)
+        entry['last_used'] = _now()
+        if discard and entry['refs'] == 0:
+            del _pool[key]
+            _unmount(key, entry)
+    _evict_idle_mounts()
+
+
+@contextmanager
+def aux_mount(mnode, volname):
+    """Context manager acquiring and releasing an auxiliary mount.
+
+    Args:
+        mnode (str): Node on which the volume has to be mounted.
+        volname (str): volume name
+
+    Yields:
+        str|NoneType: mount point of the volume, None if the volume could
+            not be mounted.
+    """
+    mount_point = acquire_aux_mount(mnode, volname)
+    try:
+        yield mount_point
+    finally:
+        if mount_point is not None:
+            release_aux_mount(mnode, volname)
+
+
+def cleanup_aux_mounts(mnode=None, volname=None):
+    """Unmounts the auxiliary mounts, referenced or not.
+
+    Kwargs:
+        mnode (str): Unmount only the mounts on this node. Defaults to all
+            the nodes.
+        volname (str): Unmount only the mounts of this volume. Defaults to
+            all the volumes.
+    """
+    with _lock:
+        for key, entry in list(_pool.items()):
+            if mnode not in (None, key[0]) or volname not in (None, key[1]):
+                continue
+            if entry['refs']:
+                g.log.warning("Unmounting auxiliary mount %s of volume %s "
+                              "on %s still in use", entry['mount_point'],
+                              key[1], key[0])
+            del _pool[key]
+            _unmount(key, entry)
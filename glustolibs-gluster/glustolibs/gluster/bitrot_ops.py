@@ -20,10 +20,13 @@
 """
 
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import invalidates_cache
 from glustolibs.gluster.volume_ops import get_volume_options, get_volume_status
-from glustolibs.gluster.lib_utils import (get_pathinfo,
-                                          calculate_checksum,
-                                          get_extended_attributes_info)
+from glustolibs.gluster.lib_utils import (get_pathinfo_of_files,
+                                          get_extended_attributes_info,
+                                          parse_getfattr_output,
+                                          shell_quote)
+from collections import OrderedDict
 import time
 import re
 
@@ -32,6 +35,7 @@ import re
 SCRUBBER_TIMEOUT = 100
 
 
+@invalidates_cache
 def enable_bitrot(mnode, volname):
     """Enables bitrot for given volume
 
@@ -58,6 +62,7 @@ def enable_bitrot(mnode, volname):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def disable_bitrot(mnode, volname):
     """Disables bitrot for given volume
 
@@ -132,28 +137,87 @@ def is_file_signed(mnode, filename, volname, expected_file_version=None):
         is_file_signed("abc.com", 'file1', "testvol",
                        expected_file_version='2')
     """
+    return are_files_signed(mnode, [filename], volname,
+                            expected_file_version)[filename]
 
-    # Getting file path in the rhs node
-    file_location = get_pathinfo(mnode, filename, volname)
-    if file_location is None:
-        g.log.error("Failed to get backend file path in is_file_signed()")
-        return False
 
-    path_info = file_location[0].split(':')
+def are_files_signed(mnode, filenames, volname, expected_file_version=None):
+    """Verifies if the given files are signed.
+
+    The backend locations of all the files are fetched through a single
+    mount of the volume. Then the checksums and the signatures of the files
+    of each server are read by a single command, the servers being
+    processed in parallel.
 
-    expected_file_signature = (calculate_checksum(path_info[0],
-                                                  [path_info[1]])
-                               [path_info[1]])
+    Args:
+        mnode (str): Node on which cmd has to be executed.
+        filenames (list): relative paths of the files to be verified
+        volname (str): volume name
+
+    Kwargs:
+        expected_file_version (str): file version to check with getfattr
+            output. See is_file_signed. Defaults to None.
 
-    attr_info = get_extended_attributes_info(path_info[0],
-                                             [path_info[1]])
-    if attr_info is None:
-        g.log.error("Failed to get attribute info in is_file_signed()")
+    Returns:
+        OrderedDict: key - filename
+            value - True if the file is signed, False otherwise
+
+    Example:
+        are_files_signed("abc.com", ['file1', 'dir1/file2'], "testvol",
+                         expected_file_version='2')
+    """
+    verdicts = OrderedDict((filename, False) for filename in filenames)
+
+    # Getting file paths in the rhs nodes
+    file_locations = get_pathinfo_of_files(mnode, filenames, volname)
+    if file_locations is None:
+        g.log.error("Failed to get backend file paths in are_files_signed()")
+        return verdicts
+
+    host_files = OrderedDict()
+    for filename, locations in file_locations.items():
+        if not locations:
+            g.log.error("Failed to get backend file path of %s in "
+                        "are_files_signed()" % filename)
+            continue
+        host, path = locations[0].split(':', 1)
+        host_files.setdefault(host, OrderedDict())[path] = filename
+
+    procs = []
+    for host, paths in host_files.items():
+        quoted_paths = ' '.join(shell_quote(path) for path in paths)
+        cmd = ("sha256sum %s; echo '# checksums end'; getfattr -e hex -n "
+               "trusted.bit-rot.signature %s" % (quoted_paths, quoted_paths))
+        procs.append((host, paths, g.run_async(host, cmd,
+                                               log_level='DEBUG')))
+
+    for host, paths, proc in procs:
+        _, out, _ = proc.async_communicate()
+        checksum_out, _, attr_out = out.partition('# checksums end\n')
+        checksums = {}
+        for line in checksum_out.split('\n'):
+            match = re.search(r'^(\S+)\s+\*?(.+)$', line.strip())
+            if match is not None:
+                checksums[match.group(2)] = match.group(1)
+        attr_info = parse_getfattr_output(attr_out)
+        for path, filename in paths.items():
+            verdicts[filename] = _verify_file_signature(
+                filename, checksums.get(path),
+                attr_info.get(path, {}).get('trusted.bit-rot.signature'),
+                expected_file_version)
+    return verdicts
+
+
+def _verify_file_signature(filename, expected_file_signature, file_signature,
+                           expected_file_version=None):
+    """Verifies the trusted.bit-rot.signature of the file against its
+    checksum and file version.
+    """
+    if expected_file_signature is None:
+        g.log.error("Failed to get the checksum of the file %s" % filename)
         return False
 
-    if 'trusted.bit-rot.signature' in attr_info[path_info[1]]:
-        file_signature = attr_info[path_info[1]]['trusted.bit-rot.signature']
-    else:
+    if file_signature is None:
         g.log.error("trusted.bit-rot.signature attribute not present "
                     " for file %s" % filename)
         return False
@@ -218,6 +282,7 @@ def is_file_bad(mnode, filename):
     return ret
 
 
+@invalidates_cache
 def bring_down_bitd(mnode):
     """Brings down bitd process
     Args:
@@ -241,6 +306,7 @@ def bring_down_bitd(mnode):
         return True
 
 
+@invalidates_cache
 def bring_down_scrub_process(mnode):
     """Brings down scrub process
     Args:
@@ -265,6 +331,7 @@ def bring_down_scrub_process(mnode):
         return True
 
 
+@invalidates_cache
 def set_scrub_throttle(mnode, volname, throttle_type='lazy'):
     """Sets scrub throttle
 
@@ -296,6 +363,7 @@ def set_scrub_throttle(mnode, volname, throttle_type='lazy'):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def set_scrub_frequency(mnode, volname, frequency_type='biweekly'):
     """Sets scrub frequency
 
@@ -327,6 +395,7 @@ def set_scrub_frequency(mnode, volname, frequency_type='biweekly'):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def pause_scrub(mnode, volname):
     """Pauses scrub
 
@@ -353,6 +422,7 @@ def pause_scrub(mnode, volname):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def resume_scrub(mnode, volname):
     """Resumes scrub
 
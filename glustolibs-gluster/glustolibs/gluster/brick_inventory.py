@@ -0,0 +1,267 @@
+#  Copyright (C) 2018 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Module keeping the inventory of the brick mounts of the
+        servers and of the ones used by the volumes, and allocating the
+        bricks of new volumes from it.
+
+        The brick mounts of the servers are gathered once, from all the
+        servers in parallel, and the mounts used by the volumes are read
+        once from 'gluster volume info'. The inventory is then updated
+        incrementally by volume_create, volume_delete, add_brick,
+        remove_brick, replace_brick, tier_attach and tier_detach. The
+        inventory is dropped by GlusterBaseClass.setUpClass, so that each
+        test class starts from a fresh scan, and tests changing the bricks
+        by other means can call invalidate_brick_inventory.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from glusto.core import Glusto as g
+
+# server -> {'brick_root': brick_root, 'mounts': sorted list of the brick
+# mounts, 'used': set of the mounts used by volumes or None if unknown}
+_inventory = {}
+_lock = threading.RLock()
+
+
+def _get_brick_mount(brick):
+    """Returns (server, mount) of a brick 'server:<mount>/<brick dir>'"""
+    server, brick_path = brick.split(":", 1)
+    return server, brick_path.rstrip('/').rsplit('/', 1)[0]
+
+
+def invalidate_brick_inventory(servers=None):
+    """Drops the inventory of the servers, gathered again when needed.
+
+    Kwargs:
+        servers (str|list): Server|List of servers. Defaults to all the
+            servers.
+    """
+    if isinstance(servers, str):
+        servers = [servers]
+    with _lock:
+        if servers is None:
+            _inventory.clear()
+        else:
+            for server in servers:
+                _inventory.pop(server, None)
+
+
+def get_brick_mounts(servers, servers_info):
+    """Gets the brick mounts of the servers, i.e the mounts under the
+    brick_root of each server. The servers missing from the inventory are
+    scanned in parallel.
+
+    Args:
+        servers (str|list): A server|List of servers.
+        servers_info (dict): dict of server info of each servers.
+
+    Returns:
+        OrderedDict: key - server
+              value - sorted list of brick mounts
+            Servers whose mounts could not be read are not part of it.
+    """
+    if isinstance(servers, str):
+        servers = [servers]
+
+    with _lock:
+        # Group the servers to scan by brick_root, one run_parallel each
+        to_scan = OrderedDict()
+        for server in servers:
+            brick_root = servers_info[server]["brick_root"]
+            entry = _inventory.get(server)
+            if entry is None or entry['brick_root'] != brick_root:
+                to_scan.setdefault(brick_root, []).append(server)
+
+        for brick_root, scan_servers in to_scan.items():
+            results = g.run_parallel(scan_servers,
+                                     "cat /proc/mounts | grep %s"
+                                     " | awk '{ print $2}'" % brick_root)
+            for server in scan_servers:
+                ret, out, _ = results.get(server, (1, '', ''))
+                if ret != 0:
+                    g.log.error("bricks not available on %s" % server)
+                    continue
+                _inventory[server] = {
+                    'brick_root': brick_root,
+                    'mounts': sorted(out.strip().split("\n")),
+                    'used': None}
+
+        return OrderedDict((server, list(_inventory[server]['mounts']))
+                           for server in servers if server in _inventory)
+
+
+def _load_used_brick_mounts(mnode, servers):
+    """Reads the brick mounts used by the volumes for the servers of the
+    inventory whose used mounts are unknown.
+    """
+    servers = [server for server in servers if server in _inventory and
+               _inventory[server]['used'] is None]
+    if not servers:
+        return
+
+    # Filtered here rather than with egrep, so that a failing gluster cli
+    # is not mistaken for a cluster without volumes
+    ret, out, err = g.run(mnode, "gluster volume info", log_level='DEBUG')
+    if ret != 0:
+        # Left unknown, read again on the next call
+        g.log.error("Unable to get the bricks used by the volumes from "
+                    "%s: %s", mnode, err or out)
+        return
+    for server in servers:
+        _inventory[server]['used'] = set()
+    for line in out.split('\n'):
+        if not re.match(r"^Brick[0-9]+:", line) or 'ss_brick' in line:
+            continue
+        brick = line.split(':', 1)[1].strip().split(' ')[0]
+        if ':' not in brick:
+            continue
+        server, mount = _get_brick_mount(brick)
+        if server in servers:
+            _inventory[server]['used'].add(mount)
+
+
+def get_unused_brick_mounts(mnode, servers, servers_info):
+    """Gets the brick mounts of the servers which are not used by any
+    volume.
+
+    Args:
+        mnode (str): The node on which gluster volume info command has
+            to be executed when the used mounts are not known yet.
+        servers (str|list): A server|List of servers.
+        servers_info (dict): dict of server info of each servers.
+
+    Returns:
+        OrderedDict: key - server
+              value - sorted list of unused brick mounts
+    """
+    if isinstance(servers, str):
+        servers = [servers]
+    with _lock:
+        brick_mounts = get_brick_mounts(servers, servers_info)
+        _load_used_brick_mounts(mnode, list(brick_mounts))
+        return OrderedDict(
+            (server, [mount for mount in mounts
+                      if mount not in (_inventory[server]['used'] or ())])
+            for server, mounts in brick_mounts.items())
+
+
+def _update_used_mounts(bricks_list, used):
+    if isinstance(bricks_list, str):
+        bricks_list = [bricks_list]
+    with _lock:
+        for brick in bricks_list:
+            server, mount = _get_brick_mount(brick)
+            entry = _inventory.get(server)
+            if entry is None or entry['used'] is None:
+                continue
+            if used:
+                entry['used'].add(mount)
+            else:
+                entry['used'].discard(mount)
+
+
+def mark_bricks_used(bricks_list):
+    """Records the bricks as used by a volume in the inventory.
+
+    Args:
+        bricks_list (str|list): Brick|List of bricks 'server:/path'.
+    """
+    _update_used_mounts(bricks_list, True)
+
+
+def mark_bricks_unused(bricks_list):
+    """Records the bricks as no longer used by any volume in the inventory.
+
+    Args:
+        bricks_list (str|list): Brick|List of bricks 'server:/path'.
+    """
+    _update_used_mounts(bricks_list, False)
+
+
+def allocate_bricks(unused_mounts, number_of_bricks, subvol_size=1,
+                    excluded_servers=None):
+    """Allocates brick mounts so that the bricks of each subvol (replica or
+    disperse set) are on distinct servers.
+
+    The bricks are allocated subvol by subvol. For each subvol the servers
+    with the most unused mounts are picked, ties being broken in round
+    robin order of the servers, hence a balanced inventory is allocated
+    round robin. When there are not enough servers with unused mounts for
+    a subvol, a server is used more than once for it.
+
+    When bricks are added to existing subvols (for example to increase the
+    replica count) the servers already hosting bricks of each subvol are
+    given in excluded_servers, so that the new bricks are placed on other
+    servers whenever possible.
+
+    Args:
+        unused_mounts (OrderedDict): server -> list of unused mounts, as
+            returned by get_unused_brick_mounts. The allocated mounts are
+            removed from it.
+        number_of_bricks (int): number of bricks to allocate.
+
+    Kwargs:
+        subvol_size (int): number of consecutive bricks which must be on
+            distinct servers.
+        excluded_servers (list): list of the servers to avoid for the
+            bricks of each subvol, in subvol order. Subvols past the end of
+            the list have no servers to avoid.
+
+    Returns:
+        list: list of (server, mount) tuples.
+        NoneType: None if there are not enough unused mounts.
+    """
+    servers = list(unused_mounts)
+    if sum(len(mounts) for mounts in unused_mounts.values()) < (
+            number_of_bricks):
+        return None
+
+    subvol_size = max(1, int(subvol_size or 1))
+    excluded_servers = excluded_servers or []
+    allocated = []
+    next_index = 0
+    while len(allocated) < number_of_bricks:
+        count = min(subvol_size, number_of_bricks - len(allocated))
+        subvol_num = len(allocated) // subvol_size
+        excluded = set()
+        if subvol_num < len(excluded_servers):
+            excluded = set(excluded_servers[subvol_num])
+        subvol_servers = []
+        while len(subvol_servers) < count:
+            candidates = [index for index, server in enumerate(servers)
+                          if unused_mounts[server] and
+                          index not in subvol_servers and
+                          server not in excluded]
+            if not candidates:
+                # Not enough servers left, reuse the ones of the subvol or
+                # the excluded ones
+                candidates = [index for index, server in enumerate(servers)
+                              if unused_mounts[server]]
+                g.log.warning("Not enough servers with unused bricks to "
+                              "place the %d bricks of a subvol on distinct "
+                              "servers", count)
+            index = min(candidates, key=lambda index: (
+                -len(unused_mounts[servers[index]]),
+                (index - next_index) % len(servers)))
+            subvol_servers.append(index)
+            allocated.append((servers[index],
+                              unused_mounts[servers[index]].pop(0)))
+            next_index = (index + 1) % len(servers)
+    return allocated
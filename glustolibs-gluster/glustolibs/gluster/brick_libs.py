@@ -18,12 +18,15 @@
 
 import random
 from math import ceil
-import time
+from collections import OrderedDict
 from glusto.core import Glusto as g
-from glustolibs.gluster.volume_ops import (get_volume_info, get_volume_status)
+from glustolibs.gluster.cli_cache import invalidates_cache
+from glustolibs.gluster.volume_ops import (get_volume_info, get_volume_status,
+                                           get_brick_status_index)
 from glustolibs.gluster.volume_libs import (get_subvols, is_tiered_volume,
                                             get_client_quorum_info,
                                             get_volume_type_info)
+from glustolibs.gluster.waiter import wait_for
 
 
 def get_all_bricks(mnode, volname):
@@ -159,6 +162,74 @@ def get_cold_tier_bricks(mnode, volname):
         return None
 
 
+def _get_brick_pid_file_token(brick):
+    """Returns the part of the brick pid file name identifying the brick
+    process in 'ps -ef' output, i.e '<node><brick-path-dashed>.pid'.
+    """
+    brick_node, brick_path = brick.split(":")
+    return "%s%s.pid" % (brick_node, brick_path.replace("/", "-"))
+
+
+@invalidates_cache
+def kill_bricks(bricks_list):
+    """Kills the brick processes of the bricks in bricks_list.
+
+    The bricks are grouped per node and a single kill script is run on all
+    the nodes at once through g.run_parallel, so that all the bricks go
+    down nearly simultaneously with one round-trip per node.
+
+    Args:
+        bricks_list (list): List of bricks to kill.
+
+    Returns:
+        OrderedDict: brick -> True if the brick process was killed,
+            False otherwise.
+
+    Example:
+        kill_bricks(['server1:/bricks/brick0/testvol_brick0',
+                     'server2:/bricks/brick0/testvol_brick1'])
+        >>>OrderedDict([('server1:/bricks/brick0/testvol_brick0', True),
+        ('server2:/bricks/brick0/testvol_brick1', True)])
+    """
+    if isinstance(bricks_list, str):
+        bricks_list = [bricks_list]
+
+    brick_results = OrderedDict((brick, False) for brick in bricks_list)
+    node_bricks = OrderedDict()
+    for brick in bricks_list:
+        node_bricks.setdefault(brick.split(":")[0], []).append(brick)
+    if not node_bricks:
+        return brick_results
+
+    # The pid file name of a brick contains the node name, hence each node
+    # only finds and kills its own bricks. One line '<pidfile> <rc>' is
+    # printed for every brick process found on the node.
+    kill_cmd = ("procs=`ps -ef | grep -ve 'grep'`; "
+                "for pidfile in %s; do "
+                "pid=`echo \"$procs\" | grep -e \"$pidfile\" | "
+                "awk '{print $2}'`; "
+                "if [ -n \"$pid\" ]; then "
+                "kill -15 $pid || kill -9 $pid; echo \"$pidfile $?\"; fi; "
+                "done" % ' '.join("'%s'" % _get_brick_pid_file_token(brick)
+                                  for brick in bricks_list))
+    results = g.run_parallel(list(node_bricks), kill_cmd)
+
+    for brick_node, bricks in node_bricks.items():
+        ret, out, err = results.get(brick_node, (1, '', ''))
+        killed = set()
+        for line in (out or '').splitlines():
+            words = line.split()
+            if len(words) == 2 and words[1] == '0':
+                killed.add(words[0])
+        for brick in bricks:
+            brick_results[brick] = _get_brick_pid_file_token(brick) in killed
+            if not brick_results[brick]:
+                g.log.error("Unable to kill the brick %s: %s", brick,
+                            (err or '').strip())
+    return brick_results
+
+
+@invalidates_cache
 def bring_bricks_offline(volname, bricks_list,
                          bring_bricks_offline_methods=None):
     """Bring the bricks specified in the bricks_list offline.
@@ -172,7 +243,9 @@ def bring_bricks_offline(volname, bricks_list,
             will be brought offline. The method to bring a brick offline is
             randomly selected from the bring_bricks_offline_methods list.
             By default all bricks will be brought offline with
-            'service_kill' method.
+            'service_kill' method. The bricks brought offline with
+            'service_kill' are killed at once with kill_bricks, which
+            provides the status of each brick.
 
     Returns:
         bool : True on successfully bringing all bricks offline.
@@ -186,29 +259,21 @@ def bring_bricks_offline(volname, bricks_list,
     if isinstance(bricks_list, str):
         bricks_list = [bricks_list]
 
-    _rc = True
-    failed_to_bring_offline_list = []
+    bricks_to_kill = []
     for brick in bricks_list:
         bring_brick_offline_method = (random.choice
                                       (bring_bricks_offline_methods))
         if bring_brick_offline_method == 'service_kill':
-            brick_node, brick_path = brick.split(":")
-            brick_path = brick_path.replace("/", "-")
-            kill_cmd = ("pid=`ps -ef | grep -ve 'grep' | "
-                        "grep -e '%s%s.pid' | awk '{print $2}'` && "
-                        "kill -15 $pid || kill -9 $pid" %
-                        (brick_node, brick_path))
-            ret, _, _ = g.run(brick_node, kill_cmd)
-            if ret != 0:
-                g.log.error("Unable to kill the brick %s", brick)
-                failed_to_bring_offline_list.append(brick)
-                _rc = False
+            bricks_to_kill.append(brick)
         else:
             g.log.error("Invalid method '%s' to bring brick offline",
                         bring_brick_offline_method)
             return False
 
-    if not _rc:
+    brick_results = kill_bricks(bricks_to_kill)
+    failed_to_bring_offline_list = [brick for brick, killed in
+                                    brick_results.items() if not killed]
+    if failed_to_bring_offline_list:
         g.log.error("Unable to bring some of the bricks %s offline",
                     failed_to_bring_offline_list)
         return False
@@ -217,8 +282,9 @@ def bring_bricks_offline(volname, bricks_list,
     return True
 
 
+@invalidates_cache
 def bring_bricks_online(mnode, volname, bricks_list,
-                        bring_bricks_online_methods=None):
+                        bring_bricks_online_methods=None, timeout=300):
     """Bring the bricks specified in the bricks_list online.
 
     Args:
@@ -234,7 +300,11 @@ def bring_bricks_online(mnode, volname, bricks_list,
             ['glusterd_restart', 'volume_start_force'] methods.
             If 'volume_start_force' command is randomly selected then all the
             bricks would be started with the command execution. Hence we break
-            from bringing bricks online individually
+            from bringing bricks online individually.
+            glusterd is restarted at most once per node, on all the nodes
+            in parallel.
+        timeout (int): timeout value in seconds to wait for the bricks to be
+            online once brought online.
 
     Returns:
         bool : True on successfully bringing all bricks online.
@@ -246,45 +316,72 @@ def bring_bricks_online(mnode, volname, bricks_list,
     elif isinstance(bring_bricks_online_methods, str):
         bring_bricks_online_methods = [bring_bricks_online_methods]
 
+    if isinstance(bricks_list, str):
+        bricks_list = [bricks_list]
+
     g.log.info("Bringing bricks '%s' online with '%s'",
                bricks_list, bring_bricks_online_methods)
 
     _rc = True
-    failed_to_bring_online_list = []
+    nodes_to_restart = OrderedDict()
+    volume_start_force = False
     for brick in bricks_list:
         bring_brick_online_method = random.choice(bring_bricks_online_methods)
         if bring_brick_online_method == 'glusterd_restart':
-            bring_brick_online_command = "service glusterd restart"
             brick_node, _ = brick.split(":")
-            ret, _, _ = g.run(brick_node, bring_brick_online_command)
+            nodes_to_restart.setdefault(brick_node, []).append(brick)
+        elif bring_brick_online_method == 'volume_start_force':
+            volume_start_force = True
+            break
+        else:
+            g.log.error("Invalid method '%s' to bring brick online",
+                        bring_brick_online_method)
+            return False
+
+    if nodes_to_restart:
+        results = g.run_parallel(list(nodes_to_restart),
+                                 "service glusterd restart")
+        for brick_node, bricks in nodes_to_restart.items():
+            ret, _, _ = results.get(brick_node, (1, '', ''))
             if ret != 0:
                 g.log.error("Unable to restart glusterd on node %s",
                             brick_node)
                 _rc = False
-                failed_to_bring_online_list.append(brick)
             else:
                 g.log.info("Successfully restarted glusterd on node %s to "
-                           "bring back brick %s online", brick_node, brick)
-        elif bring_brick_online_method == 'volume_start_force':
-            bring_brick_online_command = ("gluster volume start %s force" %
-                                          volname)
-            ret, _, _ = g.run(mnode, bring_brick_online_command)
-            if ret != 0:
-                g.log.error("Unable to start the volume %s with force option",
-                            volname)
-                _rc = False
-            else:
-                g.log.info("Successfully restarted volume %s to bring all "
-                           "the bricks '%s' online", volname, bricks_list)
-                break
+                           "bring back bricks %s online", brick_node, bricks)
+
+    if volume_start_force:
+        ret, _, _ = g.run(mnode, "gluster volume start %s force" % volname)
+        if ret != 0:
+            g.log.error("Unable to start the volume %s with force option",
+                        volname)
+            _rc = False
         else:
-            g.log.error("Invalid method '%s' to bring brick online",
-                        bring_brick_online_method)
-            return False
+            g.log.info("Successfully restarted volume %s to bring all "
+                       "the bricks '%s' online", volname, bricks_list)
 
-    g.log.info("Waiting for 30 seconds for all the bricks to be online")
-    time.sleep(30)
-    return _rc
+    if not _rc:
+        return False
+
+    def _get_offline_bricks(brick_index):
+        if brick_index is None:
+            return bricks_list
+        return [brick for brick in bricks_list
+                if brick_index.get(tuple(brick.split(":")),
+                                   {}).get('status') != '1']
+
+    g.log.info("Waiting for the bricks %s to be online", bricks_list)
+    ret, brick_index = wait_for(
+        lambda: get_brick_status_index(mnode, volname),
+        condition=lambda brick_index: not _get_offline_bricks(brick_index),
+        timeout=timeout)
+    if not ret:
+        g.log.error("Bricks %s of the volume %s are not online even after "
+                    "%d seconds", _get_offline_bricks(brick_index), volname,
+                    timeout)
+        return False
+    return True
 
 
 def are_bricks_offline(mnode, volname, bricks_list):
@@ -832,21 +929,11 @@ def wait_for_bricks_to_be_online(mnode, volname, timeout=300):
     if not all_bricks:
         return False
 
-    counter = 0
-    flag = 0
-    while counter < timeout:
-        status = are_bricks_online(mnode, volname, all_bricks)
-
-        if status:
-            flag = 1
-            break
-        if not status:
-            time.sleep(10)
-            counter = counter + 10
-
-    if not flag:
+    ret, _ = wait_for(lambda: are_bricks_online(mnode, volname, all_bricks),
+                      timeout=timeout)
+    if not ret:
         g.log.error("All Bricks of the volume '%s' are not online "
-                    "even after %d minutes", (volname, timeout/60.0))
+                    "even after %d minutes", volname, timeout/60.0)
         return False
     else:
         g.log.info("All Bricks of the volume '%s' are online ", volname)
@@ -17,8 +17,12 @@
 """ Description: Module for gluster brick operations """
 
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import invalidates_cache
+from glustolibs.gluster.brick_inventory import (mark_bricks_used,
+                                                mark_bricks_unused)
 
 
+@invalidates_cache
 def add_brick(mnode, volname, bricks_list, force=False, **kwargs):
     """Add Bricks specified in the bricks_list to the volume.
 
@@ -71,9 +75,13 @@ def add_brick(mnode, volname, bricks_list, force=False, **kwargs):
     cmd = ("gluster volume add-brick %s %s %s %s %s" %
            (volname, replica, arbiter, ' '.join(bricks_list), force_value))
 
-    return g.run(mnode, cmd)
+    ret, out, err = g.run(mnode, cmd)
+    if ret == 0:
+        mark_bricks_used(bricks_list)
+    return ret, out, err
 
 
+@invalidates_cache
 def remove_brick(mnode, volname, bricks_list, option, xml=False, **kwargs):
     """Remove bricks specified in the bricks_list from the volume.
 
@@ -100,7 +108,8 @@ def remove_brick(mnode, volname, bricks_list, option, xml=False, **kwargs):
             The third element 'err' is of type 'str' and is the stderr value
             of the command execution.
     """
-    if option == "commit" or option == "force":
+    removes_bricks = option in ("commit", "force")
+    if removes_bricks:
         option = option + " --mode=script"
 
     replica_count = None
@@ -122,9 +131,13 @@ def remove_brick(mnode, volname, bricks_list, option, xml=False, **kwargs):
     cmd = ("gluster volume remove-brick %s %s %s %s %s" %
            (volname, replica, ' '.join(bricks_list), option, xml_str))
 
-    return g.run(mnode, cmd, log_level=log_level)
+    ret, out, err = g.run(mnode, cmd, log_level=log_level)
+    if ret == 0 and removes_bricks:
+        mark_bricks_unused(bricks_list)
+    return ret, out, err
 
 
+@invalidates_cache
 def replace_brick(mnode, volname, src_brick, dst_brick):
     """Replace src brick with dst brick from the volume.
 
@@ -147,4 +160,8 @@ def replace_brick(mnode, volname, src_brick, dst_brick):
     """
     cmd = ("gluster volume replace-brick %s %s %s commit force" %
            (volname, src_brick, dst_brick))
-    return g.run(mnode, cmd)
+    ret, out, err = g.run(mnode, cmd)
+    if ret == 0:
+        mark_bricks_unused(src_brick)
+        mark_bricks_used(dst_brick)
+    return ret, out, err
@@ -0,0 +1,154 @@
+#  Copyright (C) 2018 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Module providing an opt-in, per mnode, read-through cache
+        for the read-only gluster cli queries (volume info, volume status,
+        volume get, peer status, pool list).
+
+        The cache is disabled by default. It can be enabled either from the
+        glusto config:
+
+            cli_cache:
+                enabled: True
+                ttl: 5
+
+        or from the tests with enable_cli_cache(). Every gluster operation
+        modifying the cluster state decorated with invalidates_cache drops
+        all the cached entries. Tests changing the cluster state by other
+        means (for example killing processes) can call invalidate_cli_cache.
+"""
+
+import copy
+import inspect
+import threading
+from functools import wraps
+from glusto.core import Glusto as g
+try:
+    from time import monotonic as _now
+except ImportError:
+    from time import time as _now
+
+DEFAULT_TTL = 5
+
+_settings = {'enabled': None, 'ttl': None}
+_cache = {}
+_lock = threading.Lock()
+
+
+def enable_cli_cache(ttl=None):
+    """Enables the cli cache, overriding the glusto config.
+
+    Kwargs:
+        ttl (float): Seconds for which a cached output is valid. Defaults to
+            the ttl from the glusto config or DEFAULT_TTL.
+    """
+    _settings['enabled'] = True
+    _settings['ttl'] = ttl
+
+
+def disable_cli_cache():
+    """Disables the cli cache, overriding the glusto config, and drops all
+    the cached entries.
+    """
+    _settings['enabled'] = False
+    invalidate_cli_cache()
+
+
+def _get_cache_config():
+    """Returns the 'cli_cache' section of the glusto config"""
+    cache_config = g.config.get('cli_cache') if g.config else None
+    return cache_config if isinstance(cache_config, dict) else {}
+
+
+def is_cli_cache_enabled():
+    """Returns True if the cli cache is enabled"""
+    if _settings['enabled'] is not None:
+        return _settings['enabled']
+    return bool(_get_cache_config().get('enabled', False))
+
+
+def get_cli_cache_ttl():
+    """Returns the ttl in seconds of the cached entries"""
+    if _settings['ttl'] is not None:
+        return _settings['ttl']
+    return _get_cache_config().get('ttl', DEFAULT_TTL)
+
+
+def invalidate_cli_cache(mnode=None):
+    """Drops the cached entries.
+
+    Kwargs:
+        mnode (str): Drop only the entries cached for this node. Defaults
+            to all the nodes, as the glusterd state is shared by the pool.
+    """
+    with _lock:
+        if mnode is None:
+            _cache.clear()
+        else:
+            _cache.pop(mnode, None)
+
+
+def cached_query(func):
+    """Decorator caching the output of a read-only query per mnode.
+
+    The decorated function must take mnode as first argument. The output is
+    cached only when it is not None, and a copy is returned to the callers
+    so that they can modify it freely. The arguments are bound to the
+    parameters of the function, so that positional and keyword arguments
+    and defaults map to the same entry.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not is_cli_cache_enabled():
+            return func(*args, **kwargs)
+
+        try:
+            call_args = inspect.getcallargs(func, *args, **kwargs)
+        except TypeError:
+            # Let the function report the wrong arguments
+            return func(*args, **kwargs)
+        mnode = call_args.pop('mnode', None)
+        key = (func.__name__, tuple(sorted(call_args.items())))
+
+        with _lock:
+            entry = _cache.get(mnode, {}).get(key)
+        if entry is not None and entry[0] > _now():
+            g.log.debug("Using cached output of %s on %s"
+                        % (func.__name__, mnode))
+            return copy.deepcopy(entry[1])
+
+        ret = func(*args, **kwargs)
+        if ret is not None:
+            with _lock:
+                _cache.setdefault(mnode, {})[key] = (
+                    _now() + get_cli_cache_ttl(), copy.deepcopy(ret))
+        return ret
+    return wrapper
+
+
+def invalidates_cache(func):
+    """Decorator for the operations modifying the cluster state. Drops all
+    the cached entries once the operation returns, whatever its outcome.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if _cache:
+                invalidate_cli_cache()
+    return wrapper
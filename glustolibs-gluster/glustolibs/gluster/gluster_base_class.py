@@ -27,7 +27,9 @@ import datetime
 import socket
 from glusto.core import Glusto as g
 from glustolibs.gluster.exceptions import ConfigError
-from glustolibs.gluster.peer_ops import is_peer_connected, peer_status
+from glustolibs.gluster.peer_ops import (get_peer_matrix,
+                                         is_peer_matrix_connected,
+                                         format_peer_matrix, peer_status)
 from glustolibs.gluster.volume_ops import set_volume_options
 from glustolibs.gluster.volume_libs import (setup_volume,
                                             cleanup_volume,
@@ -37,8 +39,15 @@ from glustolibs.gluster.volume_libs import (
 from glustolibs.gluster.samba_libs import share_volume_over_smb
 from glustolibs.gluster.nfs_libs import export_volume_through_nfs
 from glustolibs.gluster.mount_ops import create_mount_objs
+from glustolibs.gluster.aux_mounts import cleanup_aux_mounts
+from glustolibs.gluster.brick_inventory import invalidate_brick_inventory
 from glustolibs.io.utils import log_mounts_info
 from glustolibs.gluster.lib_utils import inject_msg_in_logs
+from glustolibs.gluster.run_stats import (is_run_stats_enabled,
+                                          install_run_instrumentation,
+                                          emit_run_stats_report)
+from glustolibs.gluster.run_fixtures import (start_fixtures_from_config,
+                                             stop_fixtures)
 
 
 class runs_on(g.CarteTestClass):
@@ -141,23 +150,29 @@ class GlusterBaseClass(unittest.TestCase):
         """Validate whether each server in the cluster is connected to
         all other servers in cluster.
 
+        The peer status of all the servers is read in parallel and the
+        resulting peer matrix is logged and saved as cls.peer_matrix (see
+        glustolibs.gluster.peer_ops.get_peer_matrix).
+
         Returns (bool): True if all peers are in connected with other peers.
             False otherwise.
         """
         # Validate if peer is connected from all the servers
         g.log.info("Validating if servers %s are connected from other servers "
                    "in the cluster", cls.servers)
-        for server in cls.servers:
-            g.log.info("Validate servers %s are in connected from  node %s",
-                       cls.servers, server)
-            ret = is_peer_connected(server, cls.servers)
-            if not ret:
-                g.log.error("Some or all servers %s are not in connected "
-                            "state from node %s", cls.servers, server)
-                return False
-            g.log.info("Successfully validated servers %s are all in "
-                       "connected state from node %s",
-                       cls.servers, server)
+        cls.peer_matrix = get_peer_matrix(cls.servers)
+        g.log.info("Peer matrix:\n%s", format_peer_matrix(cls.peer_matrix))
+        if not is_peer_matrix_connected(cls.peer_matrix):
+            for server, row in cls.peer_matrix.items():
+                if row is None:
+                    continue
+                for peer, state in row.items():
+                    if state not in ('self', 'Connected'):
+                        g.log.error("Server %s is '%s' from node %s", peer,
+                                    state, server)
+            g.log.error("Some or all servers %s are not in connected state "
+                        "from other servers in the cluster", cls.servers)
+            return False
         g.log.info("Successfully validated all servers %s are in connected "
                    "state from other servers in the cluster", cls.servers)
 
@@ -430,6 +445,16 @@ class GlusterBaseClass(unittest.TestCase):
     def setUpClass(cls):
         """Initialize all the variables necessary for testing Gluster
         """
+        # Record the statistics of the remote executions
+        if is_run_stats_enabled():
+            install_run_instrumentation()
+
+        # Record or replay the remote executions if configured
+        start_fixtures_from_config(cls.__name__)
+
+        # Scan the brick mounts and the bricks in use afresh for each class
+        invalidate_brick_inventory()
+
         # Get all servers
         cls.all_servers = None
         if 'servers' in g.config and g.config['servers']:
@@ -753,3 +778,10 @@ class GlusterBaseClass(unittest.TestCase):
         msg = "Teardownclass: %s : %s" % (cls.__name__, cls.glustotest_run_id)
         g.log.info(msg)
         cls.inject_msg_in_gluster_logs(msg)
+
+        cleanup_aux_mounts()
+        stop_fixtures()
+
+        # Report the statistics of the remote executions of this class
+        if is_run_stats_enabled():
+            emit_run_stats_report(cls.__name__)
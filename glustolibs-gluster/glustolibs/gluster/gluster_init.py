@@ -20,8 +20,10 @@
         and other initial gluster environment setup helpers.
 """
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import invalidates_cache
 
 
+@invalidates_cache
 def start_glusterd(servers):
     """Starts glusterd on specified servers if they are not running.
 
@@ -51,6 +53,7 @@ def start_glusterd(servers):
     return True
 
 
+@invalidates_cache
 def stop_glusterd(servers):
     """Stops the glusterd on specified servers.
 
@@ -80,6 +83,7 @@ def stop_glusterd(servers):
     return True
 
 
+@invalidates_cache
 def restart_glusterd(servers):
     """Restart the glusterd on specified servers.
 
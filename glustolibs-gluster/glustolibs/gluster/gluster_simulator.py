@@ -0,0 +1,1321 @@
+#  Copyright (C) 2018 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Module providing a simulated gluster cli backend keeping
+        the cluster state in memory. It answers the gluster commands (and
+        the few shell commands) executed by glustolibs with the same xml and
+        text outputs as gluster, so that the library helpers (setup_volume,
+        expand_volume, shrink_volume, waiters, ...) can be exercised with
+        thousands of bricks without any hardware.
+
+        Supported gluster commands: volume create/start/stop/delete/info/
+        status/set/reset/get/list/add-brick/remove-brick/replace-brick/heal/
+        rebalance/quota, peer probe/detach/status, pool list and snapshot
+        create/delete/list/info/activate/deactivate.
+
+    Example:
+        cluster = SimulatedCluster(['server%d' % i for i in range(100)],
+                                   bricks_per_server=50, latency=0.05)
+        start_simulator(cluster)
+        setup_volume('server0', cluster.servers_info, volume_config)
+        stop_simulator()
+"""
+
+import re
+import shlex
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+from glusto.core import Glusto as g
+from glustolibs.gluster.run_fixtures import start_backend, stop_backend
+
+VOLUME_TYPES = {'Distribute': 0, 'Replicate': 2, 'Disperse': 4,
+                'Distributed-Replicate': 7, 'Distributed-Disperse': 9}
+
+DEFAULT_VOLUME_OPTIONS = OrderedDict([
+    ('cluster.quorum-type', 'none'),
+    ('cluster.quorum-count', '(null)'),
+    ('cluster.server-quorum-type', 'off'),
+    ('features.quota', 'off'),
+    ('features.inode-quota', 'off'),
+    ('features.uss', 'off'),
+    ('nfs.disable', 'on'),
+    ('performance.readdir-ahead', 'on'),
+    ('transport.address-family', 'inet'),
+    ])
+
+GLUSTERD_DOWN_ERR = ("Connection failed. Please check if gluster daemon is "
+                     "operational.")
+
+SIZE_UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3,
+              'TB': 1024 ** 4, 'PB': 1024 ** 5}
+
+
+def _xml(tag, text=None):
+    """Returns '<tag>text</tag>', '<tag/>' if text is None"""
+    if text is None:
+        return "<%s/>" % tag
+    return "<%s>%s</%s>" % (tag, escape(str(text)), tag)
+
+
+def _cli_output(body, op_ret=0, op_errno=0, op_errstr=None):
+    """Wraps body in the cliOutput document"""
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<cliOutput>%s%s%s%s</cliOutput>\n'
+            % (_xml('opRet', op_ret), _xml('opErrno', op_errno),
+               _xml('opErrstr', op_errstr), body))
+
+
+def _node_uuid(host):
+    """Returns a stable uuid for a node"""
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, host))
+
+
+def _parse_size(size):
+    """Converts sizes like '10GB' to bytes. None if not a size."""
+    match = re.match(r'^(\d+)\s*([KMGTP]?B?)$', size.upper())
+    if match is None:
+        return None
+    return int(match.group(1)) * SIZE_UNITS[match.group(2)]
+
+
+class SimulatedBrick(object):
+    """Brick of a simulated volume"""
+    __slots__ = ('host', 'path', 'uuid', 'online', 'pid', 'port',
+                 'heal_entries', 'is_arbiter')
+
+    def __init__(self, name):
+        self.host, _, self.path = name.partition(':')
+        self.uuid = str(uuid.uuid5(uuid.NAMESPACE_URL, name))
+        self.online = False
+        self.pid = -1
+        self.port = 'N/A'
+        self.heal_entries = 0
+        self.is_arbiter = False
+
+    @property
+    def name(self):
+        return "%s:%s" % (self.host, self.path)
+
+    @property
+    def pid_file_token(self):
+        """Part of the brick pid file name used by the kill commands"""
+        return "%s%s.pid" % (self.host, self.path.replace('/', '-'))
+
+
+class SimulatedVolume(object):
+    """In memory state of a simulated volume"""
+    def __init__(self, name, bricks, replica=1, arbiter=0, disperse=0,
+                 redundancy=0, transport='tcp'):
+        self.name = name
+        self.id = str(uuid.uuid4())
+        self.bricks = [SimulatedBrick(brick) for brick in bricks]
+        self.replica = replica
+        self.arbiter = arbiter
+        self.disperse = disperse
+        self.redundancy = redundancy
+        self.transport = transport
+        self.status = 'Created'
+        self.options = OrderedDict([('transport.address-family', 'inet'),
+                                    ('nfs.disable', 'on')])
+        self.quota_limits = OrderedDict()
+        self.rebalance = None
+        self.remove_brick = None
+        self._mark_arbiters()
+
+    def _mark_arbiters(self):
+        for index, brick in enumerate(self.bricks):
+            brick.is_arbiter = bool(
+                self.arbiter and index % self.replica == self.replica - 1)
+
+    @property
+    def subvol_size(self):
+        if self.disperse:
+            return self.disperse
+        return self.replica
+
+    @property
+    def subvols(self):
+        size = self.subvol_size
+        return [self.bricks[i:i + size]
+                for i in range(0, len(self.bricks), size)]
+
+    @property
+    def dist_count(self):
+        return len(self.bricks) // self.subvol_size
+
+    @property
+    def type_str(self):
+        if self.disperse:
+            return ('Disperse' if self.dist_count == 1
+                    else 'Distributed-Disperse')
+        if self.replica > 1:
+            return ('Replicate' if self.dist_count == 1
+                    else 'Distributed-Replicate')
+        return 'Distribute'
+
+    @property
+    def number_of_bricks(self):
+        if self.disperse:
+            return "%d x (%d + %d) = %d" % (
+                self.dist_count, self.disperse - self.redundancy,
+                self.redundancy, len(self.bricks))
+        if self.arbiter:
+            return "%d x (%d + %d) = %d" % (
+                self.dist_count, self.replica - self.arbiter, self.arbiter,
+                len(self.bricks))
+        if self.replica > 1:
+            return "%d x %d = %d" % (self.dist_count, self.replica,
+                                     len(self.bricks))
+        return str(len(self.bricks))
+
+    def get_option(self, key):
+        if key in self.options:
+            return self.options[key]
+        return DEFAULT_VOLUME_OPTIONS.get(key)
+
+    @property
+    def has_shd(self):
+        return self.replica > 1 or self.disperse > 0
+
+
+class SimulatedCluster(object):
+    """In memory gluster cluster answering the gluster cli commands.
+
+    Args:
+        servers (list): list of the server hostnames.
+
+    Kwargs:
+        bricks_per_server (int): number of brick mounts on each server.
+        brick_root (str): mount point prefix of the bricks. The bricks of
+            each server are mounted on <brick_root>/brick<N>.
+        latency (float|callable): seconds spent by every command, or a
+            callable taking (host, cmd) and returning the seconds.
+        task_duration (float): seconds after which the rebalance and
+            remove-brick tasks are reported as completed.
+        heal_rate (int): number of entries the self-heal daemon heals on
+            a brick before each query of its pending heal entries, once all
+            the bricks of the subvol are online. None heals all of them.
+        peers (list): servers which are part of the pool. Defaults to all
+            the servers.
+    """
+    def __init__(self, servers, bricks_per_server=4, brick_root='/bricks',
+                 latency=0, task_duration=0, heal_rate=None, peers=None):
+        self.servers = list(servers)
+        self.brick_root = brick_root.rstrip('/')
+        self.brick_mounts = OrderedDict(
+            (server, ["%s/brick%d" % (self.brick_root, i)
+                      for i in range(bricks_per_server)])
+            for server in self.servers)
+        self.latency = latency
+        self.task_duration = task_duration
+        self.heal_rate = heal_rate
+        self.pool = list(self.servers if peers is None else peers)
+        self.glusterd_running = dict((server, True)
+                                     for server in self.servers)
+        self.volumes = OrderedDict()
+        self.snapshots = OrderedDict()
+        self.cluster_options = {}
+        self._pid = 1000
+        self._ports = {}
+        self._lock = threading.RLock()
+
+    @property
+    def servers_info(self):
+        """dict: servers_info as expected by setup_volume and
+        form_bricks_list.
+        """
+        return dict((server, {'host': server,
+                              'brick_root': self.brick_root})
+                    for server in self.servers)
+
+    # Helpers for the tests
+
+    def set_heal_entries(self, volname, brick, count):
+        """Sets the number of entries pending heal on a brick"""
+        with self._lock:
+            self._get_brick(volname, brick).heal_entries = count
+
+    def set_brick_online(self, volname, brick, online=True):
+        """Brings a brick online or offline without any command"""
+        with self._lock:
+            brick_obj = self._get_brick(volname, brick)
+            if online:
+                self._start_brick(brick_obj)
+            else:
+                self._kill_brick(brick_obj)
+
+    def _get_brick(self, volname, brick):
+        for brick_obj in self.volumes[volname].bricks:
+            if brick_obj.name == brick:
+                return brick_obj
+        raise KeyError(brick)
+
+    # Command execution
+
+    def _get_latency(self, host, cmd):
+        if callable(self.latency):
+            return self.latency(host, cmd)
+        return self.latency
+
+    def execute(self, host, cmd):
+        """Executes the command on the simulated host.
+
+        Returns:
+            tuple: (rc, out, err) of the command.
+        """
+        latency = self._get_latency(host, cmd)
+        if latency:
+            time.sleep(latency)
+        with self._lock:
+            return self._dispatch(host, cmd)
+
+    def execute_parallel(self, hosts, cmd):
+        """Executes the command on all the hosts. The latency of the call is
+        the highest latency of the hosts, as for g.run_parallel.
+
+        Returns:
+            dict: {host: (rc, out, err)}
+        """
+        latency = max([self._get_latency(host, cmd) for host in hosts] or
+                      [0])
+        if latency:
+            time.sleep(latency)
+        with self._lock:
+            return dict((host, self._dispatch(host, cmd)) for host in hosts)
+
+    def _dispatch(self, host, cmd):
+        cmd = cmd.strip()
+        if not cmd.startswith('gluster ') and re.search(r'\bkill\b', cmd):
+            return self._kill_command(host, cmd)
+        if '; ' in cmd and not cmd.startswith('for '):
+            return self._sequence(host, cmd)
+        stages = [stage.strip() for stage in cmd.split(' | ')]
+        if len(stages) > 1 and all(
+                re.match(r'^(e?grep|awk) ', stage) for stage in stages[1:]):
+            ret, out, err = self._dispatch(host, stages[0])
+            for stage in stages[1:]:
+                if ret != 0:
+                    break
+                ret, out = self._filter(stage, out)
+            return ret, out, err
+
+        if cmd.startswith('gluster '):
+            if not self.glusterd_running.get(host, False):
+                return 1, '', GLUSTERD_DOWN_ERR
+            try:
+                args = shlex.split(cmd)[1:]
+            except ValueError as err:
+                return 1, '', str(err)
+            xml = '--xml' in args
+            args = [arg for arg in args
+                    if arg not in ('--xml', '--mode=script')]
+            return self._gluster(host, args, xml)
+        return self._shell(host, cmd)
+
+    def _sequence(self, host, cmd):
+        """Runs the commands of a 'cmd1 2>&1; echo "... $?"; cmd2 ...'
+        script, the status of the script being the one of its last command.
+        """
+        ret, outs, errs = 0, [], []
+        for part in cmd.split('; '):
+            part = part.strip()
+            if part.startswith('echo '):
+                text = shlex.split(part.replace('$?', str(ret)))[1:]
+                outs.append("%s\n" % ' '.join(text))
+                ret = 0
+                continue
+            merge = part.endswith(' 2>&1')
+            if merge:
+                part = part[:-len(' 2>&1')]
+            ret, out, err = self._dispatch(host, part)
+            outs.append(out)
+            (outs if merge else errs).append(err)
+        return ret, ''.join(outs), ''.join(errs)
+
+    @staticmethod
+    def _filter(stage, out):
+        """Applies the grep/egrep/awk '{print $N}' stage of a pipeline"""
+        words = shlex.split(stage)
+        lines = out.splitlines()
+        if words[0] == 'awk':
+            match = re.search(r'\$(\d+)', words[-1])
+            column = int(match.group(1)) - 1 if match else 0
+            lines = [line.split()[column] for line in lines
+                     if len(line.split()) > column]
+            return 0, ''.join("%s\n" % line for line in lines)
+        invert = '-v' in words
+        patterns = [word for word in words[1:] if not word.startswith('-')]
+        pattern = patterns[-1] if patterns else ''
+        if words[0] == 'grep' and '-e' not in words:
+            pattern = re.escape(pattern).replace(r'\^', '^')
+        lines = [line for line in lines
+                 if bool(re.search(pattern, line)) != invert]
+        return (0 if lines else 1), ''.join("%s\n" % line for line in lines)
+
+    # Shell commands
+
+    def _shell(self, host, cmd):
+        if 'glusterd' in cmd:
+            return self._glusterd_command(host, cmd)
+        match = re.match(r'^ls -1 (\S+?)/?\.glusterfs/indices/xattrop/?', cmd)
+        if match:
+            return self._xattrop_command(host, match.group(1), cmd)
+        if cmd.startswith('cat /proc/mounts'):
+            return 0, ''.join(
+                "/dev/mapper/vg_bricks-%s %s xfs rw,noatime 0 0\n"
+                % (mount.rsplit('/', 1)[-1], mount)
+                for mount in self.brick_mounts.get(host, [])), ''
+        g.log.debug("Simulator: '%s' on %s treated as a no-op", cmd, host)
+        return 0, '', ''
+
+    def _glusterd_command(self, host, cmd):
+        running = self.glusterd_running.get(host, False)
+        if re.search(r'\b(restart)\b', cmd) or (
+                re.search(r'\bstart\b', cmd) and not running):
+            self.glusterd_running[host] = True
+            for volume in self.volumes.values():
+                if volume.status == 'Started':
+                    for brick in volume.bricks:
+                        if brick.host == host:
+                            self._start_brick(brick)
+            return 0, '', ''
+        if re.search(r'\bstop\b', cmd):
+            self.glusterd_running[host] = False
+            return 0, '', ''
+        if re.search(r'\bstart\b', cmd):
+            return 0, '', ''
+        if 'pidof' in cmd or 'pgrep' in cmd or 'status' in cmd:
+            if running:
+                return 0, "%d\n" % (100 + self.servers.index(host)
+                                    if host in self.servers else 100), ''
+            return (3 if 'status' in cmd else 1), '', ''
+        return 0, '', ''
+
+    def _xattrop_command(self, host, brick_path, cmd):
+        """Lists or counts the entries pending heal in the xattrop index of
+        a brick.
+        """
+        for volume in self.volumes.values():
+            for brick in volume.bricks:
+                if brick.host == host and brick.path == brick_path.rstrip('/'):
+                    if volume.has_shd:
+                        self._self_heal(volume, [brick])
+                    entries = ["xattrop-%s" % brick.uuid] + [
+                        str(uuid.uuid5(uuid.NAMESPACE_URL,
+                                       "%s/%d" % (brick.name, index)))
+                        for index in range(brick.heal_entries)]
+                    if 'wc -l' in cmd:
+                        return 0, "%d\n" % (len(entries) - 1), ''
+                    return 0, ''.join("%s\n" % entry for entry in entries), ''
+        return 2, '', ("ls: cannot access %s/.glusterfs/indices/xattrop/: No "
+                       "such file or directory" % brick_path)
+
+    def _kill_command(self, host, cmd):
+        """Kills the bricks of the host whose pid file is part of the
+        command. Like the kill script of brick_libs.kill_bricks, one line
+        '<pidfile> 0' is printed per brick killed.
+        """
+        killed = []
+        for volume in self.volumes.values():
+            for brick in volume.bricks:
+                if (brick.host == host and brick.online and
+                        brick.pid_file_token in cmd):
+                    self._kill_brick(brick)
+                    killed.append(brick.pid_file_token)
+        if killed:
+            return 0, ''.join("%s 0\n" % token for token in killed), ''
+        return 1, '', 'kill: usage: kill [-s sigspec | -n signum] pid'
+
+    def _start_brick(self, brick):
+        if brick.online:
+            return
+        self._pid += 1
+        brick.pid = self._pid
+        ports = self._ports.setdefault(brick.host, [49151])
+        ports[0] += 1
+        brick.port = ports[0]
+        brick.online = True
+
+    @staticmethod
+    def _kill_brick(brick):
+        brick.online = False
+        brick.pid = -1
+        brick.port = 'N/A'
+
+    # Gluster commands
+
+    def _gluster(self, host, args, xml):
+        if not args:
+            return 1, '', 'unrecognized command'
+        section = 'volume' if args[0] == 'vol' else args[0]
+        handler = {'volume': self._volume, 'peer': self._peer,
+                   'pool': self._pool, 'snapshot': self._snapshot}.get(
+                       section)
+        if handler is None or len(args) < 2:
+            return 1, '', "unrecognized word: %s" % ' '.join(args)
+        return handler(host, args[1], args[2:], xml)
+
+    def _volume(self, host, subcmd, args, xml):
+        handler = getattr(self, '_volume_%s' % subcmd.replace('-', '_'),
+                          None)
+        if handler is None:
+            return 1, '', "unrecognized word: %s" % subcmd
+        return handler(host, args, xml)
+
+    def _get_volume(self, volname, op):
+        volume = self.volumes.get(volname)
+        if volume is None:
+            return None, (1, '', "volume %s: failed: Volume %s does not "
+                          "exist" % (op, volname))
+        return volume, None
+
+    def _used_bricks(self):
+        return set(brick.name for volume in self.volumes.values()
+                   for brick in volume.bricks)
+
+    def _validate_new_bricks(self, op, volname, bricks):
+        used = self._used_bricks()
+        for brick in bricks:
+            brick_host = brick.split(':', 1)[0]
+            if brick_host not in self.pool:
+                return (1, '', "volume %s: %s: failed: Host %s is not in "
+                        "'Peer in Cluster' state" % (op, volname, brick_host))
+            if brick in used:
+                return (1, '', "volume %s: %s: failed: %s is already part "
+                        "of a volume" % (op, volname, brick))
+        return None
+
+    def _volume_create(self, host, args, xml):
+        if not args:
+            return 1, '', 'Usage: volume create <NEW-VOLNAME> ...'
+        volname, args = args[0], args[1:]
+        if volname in self.volumes:
+            return 1, '', ("volume create: %s: failed: Volume %s already "
+                           "exists" % (volname, volname))
+        counts = {'replica': 1, 'arbiter': 0, 'stripe': 1, 'disperse': 0,
+                  'disperse-data': 0, 'redundancy': 0}
+        transport = 'tcp'
+        bricks = []
+        i = 0
+        while i < len(args):
+            if args[i] in counts and i + 1 < len(args):
+                counts[args[i]] = int(args[i + 1])
+                i += 2
+            elif args[i] == 'transport' and i + 1 < len(args):
+                transport = args[i + 1]
+                i += 2
+            elif ':' in args[i]:
+                bricks.append(args[i])
+                i += 1
+            else:
+                i += 1
+        if not bricks:
+            return 1, '', 'volume create: %s: failed: no bricks' % volname
+
+        disperse = counts['disperse']
+        redundancy = counts['redundancy']
+        if counts['disperse-data']:
+            redundancy = redundancy or 1
+            disperse = counts['disperse-data'] + redundancy
+        if disperse and not redundancy:
+            redundancy = max(1, disperse // 3)
+        replica = counts['replica']
+        size = disperse or replica
+        if len(bricks) % size:
+            return 1, '', ("volume create: %s: failed: Incorrect number of "
+                           "bricks supplied %d with count %d"
+                           % (volname, len(bricks), size))
+        ret = self._validate_new_bricks('create', volname, bricks)
+        if ret is not None:
+            return ret
+
+        volume = SimulatedVolume(volname, bricks, replica=replica,
+                                 arbiter=counts['arbiter'],
+                                 disperse=disperse, redundancy=redundancy,
+                                 transport=transport)
+        if replica > 2:
+            volume.options['cluster.quorum-type'] = 'auto'
+        self.volumes[volname] = volume
+        return 0, ("volume create: %s: success: please start the volume to "
+                   "access data\n" % volname), ''
+
+    def _volume_start(self, host, args, xml):
+        volume, err = self._get_volume(args[0] if args else '', 'start')
+        if err:
+            return err
+        force = 'force' in args[1:]
+        if volume.status == 'Started' and not force:
+            return 1, '', ("volume start: %s: failed: Volume %s already "
+                           "started" % (volume.name, volume.name))
+        volume.status = 'Started'
+        for brick in volume.bricks:
+            if self.glusterd_running.get(brick.host, False):
+                self._start_brick(brick)
+        return 0, "volume start: %s: success\n" % volume.name, ''
+
+    def _volume_stop(self, host, args, xml):
+        volume, err = self._get_volume(args[0] if args else '', 'stop')
+        if err:
+            return err
+        if volume.status != 'Started':
+            return 1, '', ("volume stop: %s: failed: Volume %s is not in "
+                           "the started state" % (volume.name, volume.name))
+        volume.status = 'Stopped'
+        for brick in volume.bricks:
+            self._kill_brick(brick)
+        return 0, "volume stop: %s: success\n" % volume.name, ''
+
+    def _volume_delete(self, host, args, xml):
+        volume, err = self._get_volume(args[0] if args else '', 'delete')
+        if err:
+            return err
+        if volume.status == 'Started':
+            return 1, '', ("volume delete: %s: failed: Volume %s has been "
+                           "started.Volume needs to be stopped before "
+                           "deletion." % (volume.name, volume.name))
+        del self.volumes[volume.name]
+        return 0, "volume delete: %s: success\n" % volume.name, ''
+
+    def _volume_list(self, host, args, xml):
+        if xml:
+            return 0, _cli_output(
+                "<volList>%s%s</volList>" % (
+                    _xml('count', len(self.volumes)),
+                    ''.join(_xml('volume', name) for name in self.volumes))
+                ), ''
+        if not self.volumes:
+            return 0, "No volumes present in cluster\n", ''
+        return 0, ''.join("%s\n" % name for name in self.volumes), ''
+
+    def _select_volumes(self, volname, op):
+        if volname in ('', 'all'):
+            return list(self.volumes.values()), None
+        volume, err = self._get_volume(volname, op)
+        if err:
+            return None, err
+        return [volume], None
+
+    def _volume_info(self, host, args, xml):
+        volumes, err = self._select_volumes(args[0] if args else 'all',
+                                            'info')
+        if err:
+            return err
+        if xml:
+            return 0, _cli_output(
+                "<volInfo><volumes>%s%s</volumes></volInfo>" % (
+                    ''.join(self._volume_info_xml(volume)
+                            for volume in volumes),
+                    _xml('count', len(volumes)))), ''
+        if not volumes:
+            return 0, "No volumes present\n", ''
+        return 0, ''.join(self._volume_info_text(volume)
+                          for volume in volumes), ''
+
+    def _volume_info_xml(self, volume):
+        parts = [_xml('name', volume.name), _xml('id', volume.id),
+                 _xml('status', {'Created': 0, 'Started': 1,
+                                 'Stopped': 2}[volume.status]),
+                 _xml('statusStr', volume.status),
+                 _xml('snapshotCount', len(
+                     [snap for snap in self.snapshots.values()
+                      if snap['volume'] == volume.name])),
+                 _xml('brickCount', len(volume.bricks)),
+                 _xml('distCount', volume.subvol_size),
+                 _xml('stripeCount', 1),
+                 _xml('replicaCount', volume.replica),
+                 _xml('arbiterCount', volume.arbiter),
+                 _xml('disperseCount', volume.disperse),
+                 _xml('redundancyCount', volume.redundancy),
+                 _xml('type', VOLUME_TYPES[volume.type_str]),
+                 _xml('typeStr', volume.type_str),
+                 _xml('transport', 0 if volume.transport == 'tcp' else 1),
+                 _xml('xlators')]
+        parts.append("<bricks>%s</bricks>" % ''.join(
+            '<brick uuid="%s">%s%s%s%s</brick>' % (
+                brick.uuid, escape(brick.name), _xml('name', brick.name),
+                _xml('hostUuid', _node_uuid(brick.host)),
+                _xml('isArbiter', int(brick.is_arbiter)))
+            for brick in volume.bricks))
+        parts.append(_xml('optCount', len(volume.options)))
+        parts.append("<options>%s</options>" % ''.join(
+            "<option>%s%s</option>" % (_xml('name', key), _xml('value', val))
+            for key, val in volume.options.items()))
+        return "<volume>%s</volume>" % ''.join(parts)
+
+    def _volume_info_text(self, volume):
+        lines = ['', "Volume Name: %s" % volume.name,
+                 "Type: %s" % volume.type_str,
+                 "Volume ID: %s" % volume.id,
+                 "Status: %s" % volume.status,
+                 "Snapshot Count: %d" % len(
+                     [snap for snap in self.snapshots.values()
+                      if snap['volume'] == volume.name]),
+                 "Number of Bricks: %s" % volume.number_of_bricks,
+                 "Transport-type: %s" % volume.transport, "Bricks:"]
+        lines.extend("Brick%d: %s%s" % (
+            index + 1, brick.name, ' (arbiter)' if brick.is_arbiter else '')
+                     for index, brick in enumerate(volume.bricks))
+        lines.append("Options Reconfigured:")
+        lines.extend("%s: %s" % item for item in volume.options.items())
+        return '\n'.join(lines) + '\n'
+
+    def _daemons(self, volume):
+        daemons = []
+        if volume.has_shd:
+            daemons.append(('shd', 'Self-heal Daemon'))
+        if volume.get_option('nfs.disable') == 'off':
+            daemons.append(('nfs', 'NFS Server'))
+        if volume.get_option('features.quota') == 'on':
+            daemons.append(('quotad', 'Quota Daemon'))
+        return daemons
+
+    def _volume_status(self, host, args, xml):
+        volname = args[0] if args else 'all'
+        volumes, err = self._select_volumes(volname, 'status')
+        if err:
+            return err
+        volumes = [volume for volume in volumes
+                   if volume.status == 'Started']
+        if not volumes:
+            if volname in ('', 'all'):
+                return 1, '', "No volumes present"
+            return 1, '', "Volume %s is not started" % volname
+        service = args[1] if len(args) > 1 else ''
+        options = args[2] if len(args) > 2 else ''
+        if service in ('detail', 'clients', 'mem', 'inode', 'fd',
+                       'callpool', 'tasks'):
+            service, options = '', service
+
+        if not xml:
+            return 0, ''.join(self._volume_status_text(volume)
+                              for volume in volumes), ''
+        return 0, _cli_output(
+            "<volStatus><volumes>%s</volumes></volStatus>" % ''.join(
+                self._volume_status_xml(host, volume, service, options)
+                for volume in volumes)), ''
+
+    def _status_node(self, hostname, path, peer, online, port, pid):
+        return ("<node>%s%s%s%s%s<ports>%s%s</ports>%s</node>" % (
+            _xml('hostname', hostname), _xml('path', path),
+            _xml('peerid', _node_uuid(peer)), _xml('status', int(online)),
+            _xml('port', port if online else 'N/A'),
+            _xml('tcp', port if online else 'N/A'), _xml('rdma', 'N/A'),
+            _xml('pid', pid if online else -1)))
+
+    def _volume_status_xml(self, host, volume, service, options):
+        nodes = []
+        if options != 'tasks':
+            for brick in volume.bricks:
+                if service and service != brick.name:
+                    continue
+                nodes.append(self._status_node(
+                    brick.host, brick.path, brick.host, brick.online,
+                    brick.port, brick.pid))
+            for key, name in self._daemons(volume):
+                if service and service != key:
+                    continue
+                for peer in self.pool:
+                    online = self.glusterd_running.get(peer, False)
+                    port = 2049 if key == 'nfs' else 'N/A'
+                    nodes.append(self._status_node(
+                        name, 'localhost' if peer == host else peer, peer,
+                        online, port, 200 + self.pool.index(peer)))
+        tasks = []
+        for task_type, task in (('Rebalance', volume.rebalance),
+                                ('Remove brick', volume.remove_brick)):
+            if task is not None:
+                status, status_str = self._task_status(task)
+                tasks.append("<task>%s%s%s%s</task>" % (
+                    _xml('type', task_type), _xml('id', task['id']),
+                    _xml('status', status), _xml('statusStr', status_str)))
+        return "<volume>%s%s%s<tasks>%s</tasks></volume>" % (
+            _xml('volName', volume.name), _xml('nodeCount', len(nodes)),
+            ''.join(nodes), ''.join(tasks))
+
+    def _volume_status_text(self, volume):
+        lines = ["Status of volume: %s" % volume.name,
+                 "Gluster process                             TCP Port  "
+                 "RDMA Port  Online  Pid"]
+        for brick in volume.bricks:
+            lines.append("Brick %-38s %-9s %-10s %-7s %s" % (
+                brick.name, brick.port, 'N/A', 'Y' if brick.online else 'N',
+                brick.pid if brick.online else 'N/A'))
+        return '\n'.join(lines) + '\n\n'
+
+    def _volume_set(self, host, args, xml):
+        if len(args) < 3:
+            return 1, '', 'Usage: volume set <VOLNAME> <KEY> <VALUE>'
+        volname, key, value = args[0], args[1], ' '.join(args[2:])
+        if volname == 'all':
+            self.cluster_options[key] = value
+            return 0, "volume set: success\n", ''
+        volume, err = self._get_volume(volname, 'set')
+        if err:
+            return err
+        if key != 'group':
+            if key in ('uss', 'quorum-type', 'quorum-count'):
+                key = [option for option in DEFAULT_VOLUME_OPTIONS
+                       if option.endswith('.' + key)][0]
+            volume.options[key] = value
+        return 0, "volume set: success\n", ''
+
+    def _volume_reset(self, host, args, xml):
+        volume, err = self._get_volume(args[0] if args else '', 'reset')
+        if err:
+            return err
+        keys = [arg for arg in args[1:] if arg != 'force']
+        for key in (keys or list(volume.options)):
+            if key not in ('transport.address-family', 'nfs.disable'):
+                volume.options.pop(key, None)
+        return 0, "volume reset: success: reset volume successful\n", ''
+
+    def _volume_get(self, host, args, xml):
+        volume, err = self._get_volume(args[0] if args else '', 'get')
+        if err:
+            return err
+        option = args[1] if len(args) > 1 else 'all'
+        keys = list(DEFAULT_VOLUME_OPTIONS) + [
+            key for key in volume.options if key not in
+            DEFAULT_VOLUME_OPTIONS]
+        if option != 'all':
+            keys = [key for key in keys
+                    if key == option or key.endswith('.' + option)]
+            if not keys:
+                return 1, '', ("volume get option: failed: Did you mean "
+                               "%s?" % option)
+        lines = ["Option                                  Value",
+                 "------                                  -----"]
+        lines.extend("%-40s%s" % (key, volume.get_option(key))
+                     for key in keys)
+        return 0, '\n'.join(lines) + '\n', ''
+
+    def _volume_add_brick(self, host, args, xml):
+        volume, err = self._get_volume(args[0] if args else '', 'add-brick')
+        if err:
+            return err
+        replica = None
+        bricks = []
+        i = 1
+        while i < len(args):
+            if args[i] in ('replica', 'arbiter') and i + 1 < len(args):
+                if args[i] == 'replica':
+                    replica = int(args[i + 1])
+                i += 2
+            elif ':' in args[i]:
+                bricks.append(args[i])
+                i += 1
+            else:
+                i += 1
+        ret = self._validate_new_bricks('add-brick', volume.name, bricks)
+        if ret is not None:
+            return ret
+
+        new_bricks = [SimulatedBrick(brick) for brick in bricks]
+        if replica is not None and replica != volume.replica:
+            # Increase the replica count, one new brick per subvol
+            if len(new_bricks) != volume.dist_count * (replica -
+                                                       volume.replica):
+                return 1, '', ("volume add-brick: failed: Incorrect number "
+                               "of bricks supplied %d with count %d"
+                               % (len(new_bricks), replica))
+            added = iter(new_bricks)
+            bricks_list = []
+            for subvol in volume.subvols:
+                bricks_list.extend(subvol)
+                bricks_list.extend(next(added) for _ in
+                                   range(replica - volume.replica))
+            volume.bricks = bricks_list
+            volume.replica = replica
+        else:
+            if len(new_bricks) % volume.subvol_size:
+                return 1, '', ("volume add-brick: failed: Incorrect number "
+                               "of bricks supplied %d with count %d"
+                               % (len(new_bricks), volume.subvol_size))
+            volume.bricks.extend(new_bricks)
+        volume._mark_arbiters()
+        if volume.status == 'Started':
+            for brick in new_bricks:
+                self._start_brick(brick)
+        return 0, "volume add-brick: success\n", ''
+
+    def _task_status(self, task):
+        """Returns (status, statusStr) of a rebalance/remove-brick task"""
+        if task.get('stopped'):
+            return 2, 'stopped'
+        if time.time() - task['start'] >= self.task_duration:
+            return 3, ('fix-layout completed' if task.get('fix_layout')
+                       else 'completed')
+        return 1, ('fix-layout in progress' if task.get('fix_layout')
+                   else 'in progress')
+
+    def _task_xml(self, host, volume, task, tag, op):
+        status, status_str = self._task_status(task)
+        hosts = []
+        for brick in volume.bricks:
+            if brick.host not in hosts:
+                hosts.append(brick.host)
+        node_elems = []
+        for node in hosts:
+            files = 0 if status != 3 else len(volume.bricks)
+            node_elems.append("<node>%s%s%s%s%s%s%s%s%s%s</node>" % (
+                _xml('nodeName', 'localhost' if node == host else node),
+                _xml('id', _node_uuid(node)), _xml('files', files),
+                _xml('size', 0), _xml('lookups', files),
+                _xml('failures', 0), _xml('skipped', 0),
+                _xml('status', status), _xml('statusStr', status_str),
+                _xml('runtime', "%.2f" % (time.time() - task['start']))))
+        aggregate = "<aggregate>%s%s%s%s%s%s%s%s</aggregate>" % (
+            _xml('files', 0), _xml('size', 0), _xml('lookups', 0),
+            _xml('failures', 0), _xml('skipped', 0), _xml('status', status),
+            _xml('statusStr', status_str),
+            _xml('runtime', "%.2f" % (time.time() - task['start'])))
+        return _cli_output("<%s>%s%s%s%s%s</%s>" % (
+            tag, _xml('volname', volume.name), _xml('task-id', task['id']),
+            _xml('op', op), _xml('nodeCount', len(hosts)),
+            ''.join(node_elems) + aggregate, tag))
+
+    def _volume_remove_brick(self, host, args, xml):
+        volume, err = self._get_volume(args[0] if args else '',
+                                       'remove-brick')
+        if err:
+            return err
+        replica = None
+        bricks = []
+        action = None
+        i = 1
+        while i < len(args):
+            if args[i] == 'replica' and i + 1 < len(args):
+                replica = int(args[i + 1])
+                i += 2
+            elif ':' in args[i]:
+                bricks.append(args[i])
+                i += 1
+            else:
+                action = args[i]
+                i += 1
+        names = set(brick.name for brick in volume.bricks)
+        missing = [brick for brick in bricks if brick not in names]
+        if missing:
+            return 1, '', ("volume remove-brick %s: failed: Incorrect brick "
+                           "%s for volume %s" % (action, missing[0],
+                                                 volume.name))
+
+        if action == 'start':
+            volume.remove_brick = {'id': str(uuid.uuid4()),
+                                   'start': time.time(),
+                                   'bricks': bricks}
+            return 0, ("volume remove-brick start: success\nID: %s\n"
+                       % volume.remove_brick['id']), ''
+        if action in ('status', 'stop'):
+            if volume.remove_brick is None:
+                return 1, '', ("volume remove-brick %s: failed: remove-brick"
+                               " not started." % action)
+            if action == 'stop':
+                volume.remove_brick['stopped'] = True
+                return 0, "volume remove-brick stop: success\n", ''
+            if xml:
+                return 0, self._task_xml(host, volume, volume.remove_brick,
+                                         'volRemoveBrick', 2), ''
+            return 0, "remove-brick status: %s\n" % self._task_status(
+                volume.remove_brick)[1], ''
+        if action == 'commit':
+            if (volume.remove_brick is None or
+                    self._task_status(volume.remove_brick)[0] != 3):
+                return 1, '', ("volume remove-brick commit: failed: "
+                               "Remove-brick is not completed")
+        elif action != 'force':
+            return 1, '', "Usage: volume remove-brick ..."
+
+        remove = set(bricks)
+        if replica is not None and replica < volume.replica:
+            volume.replica = replica
+        volume.bricks = [brick for brick in volume.bricks
+                         if brick.name not in remove]
+        volume._mark_arbiters()
+        volume.remove_brick = None
+        return 0, "volume remove-brick %s: success\n" % action, ''
+
+    def _volume_replace_brick(self, host, args, xml):
+        volume, err = self._get_volume(args[0] if args else '',
+                                       'replace-brick')
+        if err:
+            return err
+        if len(args) < 3:
+            return 1, '', "Usage: volume replace-brick ..."
+        src, dst = args[1], args[2]
+        ret = self._validate_new_bricks('replace-brick', volume.name, [dst])
+        if ret is not None:
+            return ret
+        for index, brick in enumerate(volume.bricks):
+            if brick.name == src:
+                new_brick = SimulatedBrick(dst)
+                new_brick.is_arbiter = brick.is_arbiter
+                volume.bricks[index] = new_brick
+                if volume.status == 'Started':
+                    self._start_brick(new_brick)
+                return 0, ("volume replace-brick: success: replace-brick "
+                           "commit force operation successful\n"), ''
+        return 1, '', ("volume replace-brick: failed: brick: %s does not "
+                       "exist in volume: %s" % (src, volume.name))
+
+    def _volume_heal(self, host, args, xml):
+        volume, err = self._get_volume(args[0] if args else '', 'heal')
+        if err:
+            return err
+        action = args[1] if len(args) > 1 else ''
+        if action == 'info':
+            split_brain = 'split-brain' in args[2:]
+            if volume.has_shd:
+                self._self_heal(volume)
+            return 0, self._heal_info_xml(volume, split_brain), ''
+        if action in ('', 'full'):
+            if volume.status != 'Started':
+                return 1, '', ("Launching heal operation to perform index "
+                               "self heal on volume %s has been "
+                               "unsuccessful" % volume.name)
+            self._self_heal(volume)
+        return 0, ("Launching heal operation to perform index self heal on "
+                   "volume %s has been successful\n" % volume.name), ''
+
+    def _self_heal(self, volume, bricks=None):
+        """Heals the entries of the bricks (all the bricks of the volume by
+        default) whose subvol bricks are all online.
+        """
+        for subvol in volume.subvols:
+            if not all(brick.online for brick in subvol):
+                continue
+            for brick in subvol:
+                if bricks is not None and brick not in bricks:
+                    continue
+                if self.heal_rate is None:
+                    brick.heal_entries = 0
+                else:
+                    brick.heal_entries = max(
+                        0, brick.heal_entries - self.heal_rate)
+
+    def _heal_info_xml(self, volume, split_brain):
+        bricks = []
+        for brick in volume.bricks:
+            if brick.online:
+                count = 0 if split_brain else brick.heal_entries
+                files = ''.join(
+                    '<file gfid="%s">/sim_file_%d</file>' % (
+                        uuid.uuid5(uuid.NAMESPACE_URL,
+                                   "%s/%d" % (brick.name, index)), index)
+                    for index in range(count))
+                status, entries = 'Connected', count
+            else:
+                files = ''
+                status, entries = 'Transport endpoint is not connected', '-'
+            bricks.append('<brick hostUuid="%s">%s%s%s%s</brick>' % (
+                _node_uuid(brick.host), _xml('name', brick.name), files,
+                _xml('status', status), _xml('numberOfEntries', entries)))
+        return _cli_output("<healInfo><bricks>%s</bricks></healInfo>"
+                           % ''.join(bricks))
+
+    def _volume_rebalance(self, host, args, xml):
+        volume, err = self._get_volume(args[0] if args else '', 'rebalance')
+        if err:
+            return err
+        words = args[1:]
+        if 'start' in words:
+            if volume.status != 'Started':
+                return 1, '', ("volume rebalance: %s: failed: Volume %s "
+                               "needs to be started to perform rebalance"
+                               % (volume.name, volume.name))
+            volume.rebalance = {'id': str(uuid.uuid4()),
+                                'start': time.time(),
+                                'fix_layout': 'fix-layout' in words}
+            return 0, ("volume rebalance: %s: success: Rebalance on %s has "
+                       "been started successfully.\nID: %s\n"
+                       % (volume.name, volume.name,
+                          volume.rebalance['id'])), ''
+        if volume.rebalance is None:
+            return 1, '', ("volume rebalance: %s: failed: Rebalance not "
+                           "started for volume %s." % (volume.name,
+                                                       volume.name))
+        if 'stop' in words:
+            volume.rebalance['stopped'] = True
+            return 0, "volume rebalance: %s: success\n" % volume.name, ''
+        if xml:
+            return 0, self._task_xml(host, volume, volume.rebalance,
+                                     'volRebalance', 3), ''
+        return 0, "rebalance status: %s\n" % self._task_status(
+            volume.rebalance)[1], ''
+
+    def _volume_quota(self, host, args, xml):
+        volume, err = self._get_volume(args[0] if args else '', 'quota')
+        if err:
+            return err
+        action = args[1] if len(args) > 1 else ''
+        if action == 'enable':
+            if volume.get_option('features.quota') == 'on':
+                return 1, '', ("quota command failed : Quota is already "
+                               "enabled")
+            volume.options['features.quota'] = 'on'
+            volume.options['features.inode-quota'] = 'on'
+            return 0, "volume quota : success\n", ''
+        if action == 'disable':
+            volume.options['features.quota'] = 'off'
+            volume.options['features.inode-quota'] = 'off'
+            volume.quota_limits.clear()
+            return 0, "volume quota : success\n", ''
+        if volume.get_option('features.quota') != 'on':
+            return 1, '', ("quota command failed : Quota is disabled, please "
+                           "enable quota")
+        if action == 'limit-usage' and len(args) > 3:
+            hard_limit = _parse_size(args[3])
+            if hard_limit is None:
+                return 1, '', "Please enter a correct value"
+            soft_limit = args[4] if len(args) > 4 else '80%'
+            volume.quota_limits[args[2]] = (hard_limit, soft_limit)
+            return 0, "volume quota : success\n", ''
+        if action == 'remove' and len(args) > 2:
+            volume.quota_limits.pop(args[2], None)
+            return 0, "volume quota : success\n", ''
+        if action == 'list':
+            paths = args[2:] or list(volume.quota_limits)
+            limits = []
+            for path in paths:
+                if path not in volume.quota_limits:
+                    continue
+                hard_limit, soft_limit = volume.quota_limits[path]
+                soft_percent = int(soft_limit.rstrip('%'))
+                limits.append("<limit>%s%s%s%s%s%s%s%s</limit>" % (
+                    _xml('path', path), _xml('hard_limit', hard_limit),
+                    _xml('soft_limit_percent', "%d%%" % soft_percent),
+                    _xml('soft_limit_value',
+                         hard_limit * soft_percent // 100),
+                    _xml('used_space', 0), _xml('avail_space', hard_limit),
+                    _xml('sl_exceeded', 'No'), _xml('hl_exceeded', 'No')))
+            if xml:
+                return 0, _cli_output("<volQuota>%s</volQuota>"
+                                      % ''.join(limits)), ''
+            return 0, ''.join("%s %s\n" % (path, limit[0]) for path, limit
+                              in volume.quota_limits.items()), ''
+        return 0, "volume quota : success\n", ''
+
+    def _volume_sync(self, host, args, xml):
+        return 0, "volume sync: success\n", ''
+
+    # Peer commands
+
+    def _peer(self, host, subcmd, args, xml):
+        if subcmd == 'probe' and args:
+            server = args[0]
+            if server not in self.glusterd_running:
+                return 1, '', ("peer probe: failed: Probe returned with "
+                               "Transport endpoint is not connected")
+            if server == host:
+                return 0, ("peer probe: success. Probe on localhost not "
+                           "needed\n"), ''
+            if server in self.pool:
+                return 0, ("peer probe: success. Host %s port 24007 "
+                           "already in peer list\n" % server), ''
+            self.pool.append(server)
+            return 0, "peer probe: success.\n", ''
+        if subcmd == 'detach' and args:
+            server = args[0]
+            if server not in self.pool:
+                return 1, '', ("peer detach: failed: %s is not part of "
+                               "cluster" % server)
+            for volume in self.volumes.values():
+                if any(brick.host == server for brick in volume.bricks):
+                    return 1, '', ("peer detach: failed: Brick(s) with the "
+                                   "peer %s exist in cluster" % server)
+            self.pool.remove(server)
+            return 0, "peer detach: success\n", ''
+        if subcmd == 'status':
+            peers = [peer for peer in self.pool if peer != host]
+            return 0, self._peers_output(host, peers, xml, pool=False), ''
+        return 1, '', "unrecognized word: peer %s" % subcmd
+
+    def _pool(self, host, subcmd, args, xml):
+        if subcmd != 'list':
+            return 1, '', "unrecognized word: pool %s" % subcmd
+        peers = [host] + [peer for peer in self.pool if peer != host]
+        return 0, self._peers_output(host, peers, xml, pool=True), ''
+
+    def _peers_output(self, host, peers, xml, pool):
+        if xml:
+            elems = []
+            for peer in peers:
+                connected = int(self.glusterd_running.get(peer, False))
+                hostname = 'localhost' if (pool and peer == host) else peer
+                elems.append("<peer>%s%s<hostnames>%s</hostnames>%s%s%s"
+                             "</peer>" % (
+                                 _xml('uuid', _node_uuid(peer)),
+                                 _xml('hostname', hostname),
+                                 _xml('hostname', peer),
+                                 _xml('connected', connected),
+                                 _xml('state', 3),
+                                 _xml('stateStr', 'Peer in Cluster')))
+            return _cli_output("<peerStatus>%s</peerStatus>"
+                               % ''.join(elems))
+        if pool:
+            return "UUID\t\t\t\t\tHostname\tState\n" + ''.join(
+                "%s\t%s\t%s\n" % (
+                    _node_uuid(peer),
+                    'localhost' if peer == host else peer,
+                    'Connected' if self.glusterd_running.get(peer, False)
+                    else 'Disconnected')
+                for peer in peers)
+        return "Number of Peers: %d\n" % len(peers) + ''.join(
+            "\nHostname: %s\nUuid: %s\nState: Peer in Cluster (%s)\n" % (
+                peer, _node_uuid(peer),
+                'Connected' if self.glusterd_running.get(peer, False)
+                else 'Disconnected')
+            for peer in peers)
+
+    # Snapshot commands
+
+    def _snapshot(self, host, subcmd, args, xml):
+        if subcmd == 'create' and len(args) > 1:
+            snapname, volname = args[0], args[1]
+            volume, err = self._get_volume(volname, 'snapshot create')
+            if err:
+                return err
+            if volume.status != 'Started':
+                return 1, '', ("snapshot create: failed: volume %s needs to "
+                               "be started to take snapshot" % volname)
+            if 'no-timestamp' not in args:
+                snapname = "%s_GMT-%s" % (
+                    snapname, time.strftime('%Y.%m.%d-%H.%M.%S',
+                                            time.gmtime()))
+            if snapname in self.snapshots:
+                return 1, '', ("snapshot create: failed: Snapshot %s "
+                               "already exists" % snapname)
+            description = None
+            if 'description' in args:
+                index = args.index('description')
+                if index + 1 < len(args):
+                    description = args[index + 1]
+            self.snapshots[snapname] = {
+                'volume': volname, 'uuid': str(uuid.uuid4()),
+                'description': description, 'status': 'Stopped',
+                'createTime': time.strftime('%Y-%m-%d %H:%M:%S',
+                                            time.gmtime())}
+            return 0, ("snapshot create: success: Snap %s created "
+                       "successfully\n" % snapname), ''
+        if subcmd == 'delete' and args:
+            if args[0] == 'all':
+                names = list(self.snapshots)
+            elif args[0] == 'volume' and len(args) > 1:
+                names = [name for name, snap in self.snapshots.items()
+                         if snap['volume'] == args[1]]
+            else:
+                if args[0] not in self.snapshots:
+                    return 1, '', ("snapshot delete: failed: Snapshot (%s) "
+                                   "does not exist" % args[0])
+                names = [args[0]]
+            for name in names:
+                del self.snapshots[name]
+            return 0, ''.join("snapshot delete: %s: snap removed "
+                              "successfully\n" % name for name in names), ''
+        if subcmd in ('activate', 'deactivate') and args:
+            if args[0] not in self.snapshots:
+                return 1, '', ("snapshot %s: failed: Snapshot (%s) does not "
+                               "exist" % (subcmd, args[0]))
+            self.snapshots[args[0]]['status'] = (
+                'Started' if subcmd == 'activate' else 'Stopped')
+            return 0, ("Snapshot %s: %s: Snap %sd successfully\n"
+                       % (subcmd, args[0], subcmd)), ''
+        if subcmd == 'list':
+            names = list(self.snapshots)
+            if args:
+                names = [name for name in names
+                         if self.snapshots[name]['volume'] == args[0]]
+            if xml:
+                return 0, _cli_output("<snapList>%s%s</snapList>" % (
+                    _xml('count', len(names)),
+                    ''.join(_xml('snapshot', name) for name in names))), ''
+            if not names:
+                return 0, "No snapshots present\n", ''
+            return 0, ''.join("%s\n" % name for name in names), ''
+        if subcmd == 'info':
+            return self._snapshot_info(args, xml)
+        return 1, '', "unrecognized word: snapshot %s" % subcmd
+
+    def _snapshot_info(self, args, xml):
+        origin = ''
+        names = list(self.snapshots)
+        if args and args[0] == 'volume' and len(args) > 1:
+            volname = args[1]
+            if volname not in self.volumes:
+                return 1, '', ("Snapshot info : failed: Volume (%s) does "
+                               "not exist" % volname)
+            names = [name for name in names
+                     if self.snapshots[name]['volume'] == volname]
+            origin = "<originVolume>%s%s%s</originVolume>" % (
+                _xml('name', volname), _xml('snapCount', len(names)),
+                _xml('snapRemaining', 256 - len(names)))
+        elif args:
+            if args[0] not in self.snapshots:
+                return 1, '', ("Snapshot info : failed: Snapshot (%s) does "
+                               "not exist" % args[0])
+            names = [args[0]]
+        if not xml:
+            return 0, ''.join(
+                "Snapshot : %s\nSnap UUID : %s\nCreated : %s\n"
+                "Snap Volumes:\n\tOrigin Volume name : %s\n\tStatus : %s\n\n"
+                % (name, self.snapshots[name]['uuid'],
+                   self.snapshots[name]['createTime'],
+                   self.snapshots[name]['volume'],
+                   self.snapshots[name]['status'])
+                for name in names), ''
+        snaps = []
+        for name in names:
+            snap = self.snapshots[name]
+            volume_snaps = len([other for other in self.snapshots.values()
+                                if other['volume'] == snap['volume']])
+            snaps.append(
+                "<snapshot>%s%s%s%s%s<snapVolume>%s%s<originVolume>%s%s%s"
+                "</originVolume></snapVolume></snapshot>" % (
+                    _xml('name', name), _xml('uuid', snap['uuid']),
+                    _xml('description', snap['description']),
+                    _xml('createTime', snap['createTime']),
+                    _xml('volCount', 1),
+                    _xml('name', snap['uuid'].replace('-', '')),
+                    _xml('status', snap['status']),
+                    _xml('name', snap['volume']),
+                    _xml('snapCount', volume_snaps),
+                    _xml('snapRemaining', 256 - volume_snaps)))
+        return 0, _cli_output("<snapInfo>%s%s<snapshots>%s</snapshots>"
+                              "</snapInfo>" % (
+                                  _xml('count', len(names)), origin,
+                                  ''.join(snaps))), ''
+
+
+def start_simulator(cluster):
+    """Serves all the remote executions (g.run, g.run_async and
+    g.run_parallel) from the simulated cluster.
+
+    Args:
+        cluster (SimulatedCluster): simulated cluster.
+
+    Returns:
+        bool: True on success, False otherwise.
+    """
+    return start_backend(cluster, mode='simulator')
+
+
+def stop_simulator():
+    """Stops serving the remote executions from the simulated cluster"""
+    return stop_backend()
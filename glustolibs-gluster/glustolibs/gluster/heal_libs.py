@@ -21,8 +21,12 @@
 """
 
 import time
+from collections import OrderedDict
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import invalidates_cache
 from glustolibs.gluster.volume_ops import get_volume_status
+from glustolibs.gluster.exceptions import ExecutionError, ExecutionParseError
+from glustolibs.gluster.waiter import wait_for
 try:
     import xml.etree.cElementTree as etree
 except ImportError:
@@ -135,26 +139,127 @@ def are_all_self_heal_daemons_are_online(mnode, volname):
         return False
 
 
-def monitor_heal_completion(mnode, volname, timeout_period=1200):
+def get_heal_pending_counts(mnode, volname, bricks_list=None):
+    """Counts the entries in the .glusterfs/indices/xattrop directory of the
+    bricks, i.e the entries pending heal. The bricks of each node are all
+    counted by a single command, the nodes being processed in parallel.
+
+    Args:
+        mnode : Node on which commands are executed
+        volname : Name of the volume
+
+    Kwargs:
+        bricks_list (list): List of bricks to count. Defaults to all the
+            bricks of the volume.
+
+    Returns:
+        NoneType: None if the bricks list could not be fetched.
+        OrderedDict: key - brick
+            value - number of entries pending heal, None if it could not
+            be counted.
+
+    Example:
+        get_heal_pending_counts(mnode, volname)
+    """
+    if bricks_list is None:
+        from glustolibs.gluster.brick_libs import get_all_bricks
+        bricks_list = get_all_bricks(mnode, volname)
+        if bricks_list is None:
+            g.log.error("Unable to get the bricks list of the volume %s",
+                        volname)
+            return None
+
+    node_bricks = OrderedDict()
+    for brick in bricks_list:
+        brick_node, brick_path = brick.split(":")
+        node_bricks.setdefault(brick_node, []).append(brick_path)
+
+    # The count of a brick is only printed if its directory could be listed
+    procs = []
+    for brick_node, brick_paths in node_bricks.items():
+        cmd = "; ".join("entries=$(ls -1 %s/.glusterfs/indices/xattrop/) && "
+                        "echo \"heal-pending %s $(printf '%%s' \"$entries\" "
+                        "| grep -cve \"xattrop-\")\""
+                        % (brick_path, brick_path)
+                        for brick_path in brick_paths)
+        procs.append((brick_node, g.run_async(brick_node, cmd,
+                                              log_level='DEBUG')))
+
+    counts = OrderedDict((brick, None) for brick in bricks_list)
+    for brick_node, proc in procs:
+        ret, out, err = proc.async_communicate()
+        for line in (out or '').splitlines():
+            fields = line.strip().split(" ")
+            if (len(fields) == 3 and fields[0] == "heal-pending" and
+                    fields[2].isdigit()):
+                counts["%s:%s" % (brick_node, fields[1])] = int(fields[2])
+        uncounted = [brick_path for brick_path in node_bricks[brick_node]
+                     if counts["%s:%s" % (brick_node, brick_path)] is None]
+        if uncounted:
+            g.log.error("Unable to count the entries pending heal of the "
+                        "bricks %s on %s (ret %s): %s", uncounted,
+                        brick_node, ret, (err or '').strip())
+    return counts
+
+
+def _log_heal_progress(volname, heal_progress):
+    """Logs the entries pending heal of the last sample of heal_progress
+    along with the heal rate and the projected completion. The bricks which
+    could not be counted are left out of the rate and reported apart.
+    """
+    first_time, first_counts = heal_progress[0]
+    last_time, last_counts = heal_progress[-1]
+    counted = [brick for brick, count in last_counts.items()
+               if count is not None]
+    uncounted = len(last_counts) - len(counted)
+    pending = sum(last_counts[brick] for brick in counted)
+
+    # The rate is computed on the bricks counted in both samples
+    rate = 0.0
+    both_counted = [brick for brick in counted
+                    if first_counts.get(brick) is not None]
+    if last_time > first_time and both_counted:
+        healed = sum(first_counts[brick] - last_counts[brick]
+                     for brick in both_counted)
+        rate = healed / float(last_time - first_time)
+    if pending and rate > 0:
+        eta = "%ds" % (pending / rate)
+    else:
+        eta = "unknown" if pending or uncounted else "0s"
+    g.log.info("Heal on volume %s: %d entries pending on %d bricks, %d "
+               "bricks not counted, rate %.1f entries/s, projected "
+               "completion in %s", volname, pending,
+               len([brick for brick in counted if last_counts[brick]]),
+               uncounted, rate, eta)
+
+
+def monitor_heal_completion(mnode, volname, timeout_period=1200,
+                            heal_progress=None):
     """Monitors heal completion by looking into .glusterfs/indices/xattrop
         directory of every brick for certain time. When there are no entries
         in all the brick directories then heal is successful. Otherwise heal is
         pending on the volume.
 
+    The bricks are counted node by node in parallel and the monitoring
+    stops as soon as no entry is pending. Each sample is logged with the
+    heal rate and the projected completion.
+
     Args:
         mnode : Node on which commands are executed
         volname : Name of the volume
         heal_monitor_timeout : time until which the heal monitoring to be done.
                                Default: 1200 i.e 20 minutes.
 
+    Kwargs:
+        heal_progress (list): If given, the samples are appended to it as
+            (time, OrderedDict of brick -> entries pending heal) tuples,
+            time being in seconds since the epoch.
+
     Return:
         bool: True if heal is complete within timeout_period. False otherwise
     """
-    if timeout_period != 0:
-        heal_monitor_timeout = timeout_period
-    time_counter = heal_monitor_timeout
     g.log.info("The heal monitoring timeout is : %d minutes" %
-               (heal_monitor_timeout / 60))
+               (timeout_period / 60))
 
     # Get all bricks
     from glustolibs.gluster.brick_libs import get_all_bricks
@@ -165,20 +270,20 @@ def monitor_heal_completion(mnode, volname, timeout_period=1200):
                     "on the volume %s" % volname)
         return False
 
-    while time_counter > 0:
-        heal_complete = True
-        for brick in bricks_list:
-            brick_node, brick_path = brick.split(":")
-            cmd = ("ls -1 %s/.glusterfs/indices/xattrop/ | "
-                   "grep -ve \"xattrop-\" | wc -l" % brick_path)
-            ret, out, err = g.run(brick_node, cmd)
-            if out.strip('\n') != "0":
-                heal_complete = False
-        if heal_complete:
-            break
-        else:
-            time.sleep(120)
-            time_counter = time_counter - 120
+    if heal_progress is None:
+        heal_progress = []
+    samples_start = len(heal_progress)
+
+    def sample():
+        counts = get_heal_pending_counts(mnode, volname, bricks_list)
+        heal_progress.append((time.time(), counts))
+        _log_heal_progress(volname, heal_progress[samples_start:])
+        return counts
+
+    heal_complete, counts = wait_for(
+        sample, condition=lambda counts: all(
+            count == 0 for count in counts.values()),
+        timeout=timeout_period)
 
     if heal_complete:
         heal_completion_status = is_heal_complete(mnode, volname)
@@ -188,10 +293,11 @@ def monitor_heal_completion(mnode, volname, timeout_period=1200):
             return True
 
     g.log.info("Heal has not yet completed on volume %s" % volname)
-    for brick in bricks_list:
-        brick_node, brick_path = brick.split(":")
-        cmd = ("ls -1 %s/.glusterfs/indices/xattrop/ " % brick_path)
-        g.run(brick_node, cmd)
+    for brick, count in counts.items():
+        if count != 0:
+            brick_node, brick_path = brick.split(":")
+            cmd = ("ls -1 %s/.glusterfs/indices/xattrop/ " % brick_path)
+            g.run(brick_node, cmd)
     return False
 
 
@@ -207,17 +313,17 @@ def is_heal_complete(mnode, volname):
     Return:
         bool: True if heal is complete. False otherwise
     """
-    from glustolibs.gluster.heal_ops import get_heal_info
-    heal_info_data = get_heal_info(mnode, volname)
-    if heal_info_data is None:
-        g.log.error("Unable to verify whether heal is successful or not on "
-                    "volume %s" % volname)
-        return False
-
+    from glustolibs.gluster.heal_ops import iter_heal_info
     heal_complete = True
-    for brick_heal_info_data in heal_info_data:
-        if brick_heal_info_data['numberOfEntries'] != '0':
-            heal_complete = False
+    try:
+        for brick_heal_info_data in iter_heal_info(mnode, volname,
+                                                   counts_only=True):
+            if brick_heal_info_data['numberOfEntries'] != '0':
+                heal_complete = False
+    except (ExecutionError, ExecutionParseError) as e:
+        g.log.error("%s. Unable to verify whether heal is successful or not "
+                    "on volume %s", e, volname)
+        return False
 
     if not heal_complete:
         g.log.error("Heal is not complete on some of the bricks for the "
@@ -300,20 +406,12 @@ def wait_for_self_heal_daemons_to_be_online(mnode, volname, timeout=300):
                    "to be online", volname)
         return True
 
-    counter = 0
-    flag = 0
-    while counter < timeout:
-        status = are_all_self_heal_daemons_are_online(mnode, volname)
-        if status:
-            flag = 1
-            break
-        if not status:
-            time.sleep(10)
-            counter = counter + 10
-
-    if not flag:
+    ret, _ = wait_for(
+        lambda: are_all_self_heal_daemons_are_online(mnode, volname),
+        timeout=timeout)
+    if not ret:
         g.log.error("All self-heal-daemons of the volume '%s' are not online "
-                    "even after %d minutes", (volname, timeout/60.0))
+                    "even after %d minutes", volname, timeout/60.0)
         return False
     else:
         g.log.info("All self-heal-daemons of the volume '%s' are online ",
@@ -471,6 +569,7 @@ def is_shd_daemonized(nodes, timeout=120):
     return True
 
 
+@invalidates_cache
 def bring_self_heal_daemon_process_offline(nodes):
     """
     Bring the self-heal daemon process offline for the nodes
@@ -19,13 +19,21 @@
     Description: Module for gluster heal operations.
 """
 
+import threading
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import invalidates_cache
+from glustolibs.gluster.exceptions import ExecutionError, ExecutionParseError
 try:
     import xml.etree.cElementTree as etree
 except ImportError:
     import xml.etree.ElementTree as etree
+try:
+    from cStringIO import StringIO
+except ImportError:
+    from io import BytesIO as StringIO
 
 
+@invalidates_cache
 def trigger_heal(mnode, volname):
     """Triggers heal on the volume.
 
@@ -44,6 +52,7 @@ def trigger_heal(mnode, volname):
     return True
 
 
+@invalidates_cache
 def trigger_heal_full(mnode, volname):
     """Triggers heal 'full' on the volume.
 
@@ -62,6 +71,7 @@ def trigger_heal_full(mnode, volname):
     return True
 
 
+@invalidates_cache
 def enable_heal(mnode, volname):
     """Enable heal by executing 'gluster volume heal enable'
         for the specified volume.
@@ -82,6 +92,7 @@ def enable_heal(mnode, volname):
     return True
 
 
+@invalidates_cache
 def disable_heal(mnode, volname):
     """Disable heal by executing 'gluster volume heal disable'
         for the specified volume.
@@ -102,6 +113,7 @@ def disable_heal(mnode, volname):
     return True
 
 
+@invalidates_cache
 def enable_self_heal_daemon(mnode, volname):
     """Enables self-heal-daemon on a volume by setting volume option
         'self-heal-daemon' to value 'on'
@@ -122,6 +134,7 @@ def enable_self_heal_daemon(mnode, volname):
     return True
 
 
+@invalidates_cache
 def disable_self_heal_daemon(mnode, volname):
     """Disables self-heal-daemon on a volume by setting volume option
         'self-heal-daemon' to value 'off'
@@ -258,6 +271,128 @@ def heal_info_split_brain(mnode, volname):
     return g.run(mnode, cmd)
 
 
+def _iterparse_heal_info(stream, counts_only=False):
+    """Helper for iter_heal_info. Incrementally parses the heal info xml
+    read from the file object 'stream' and yields the heal info data per
+    brick. Elements are removed from the tree as soon as they are consumed,
+    so the memory used does not depend on the number of entries.
+    """
+    bricks_elem = brick_elem = brick_info = brick_files = None
+    for event, element in etree.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            if element.tag == 'bricks':
+                bricks_elem = element
+            elif element.tag == 'brick' and bricks_elem is not None:
+                brick_elem = element
+                brick_info = {}
+                brick_files = []
+            continue
+
+        if brick_elem is None:
+            continue
+
+        if element is brick_elem:
+            if brick_files:
+                brick_info['file'] = brick_files
+            yield brick_info
+            bricks_elem.remove(brick_elem)
+            brick_elem = brick_info = brick_files = None
+        elif element.tag == 'file':
+            if not counts_only:
+                brick_files.append({element.attrib['gfid']: element.text})
+            brick_elem.remove(element)
+        else:
+            brick_info[element.tag] = element.text
+            brick_elem.remove(element)
+
+
+def iter_heal_info(mnode, volname, counts_only=False, split_brain=False):
+    """Streams the xml output of heal info command and yields the heal info
+        data per brick as it is parsed.
+
+    Args:
+        mnode : Node on which commands are executed
+        volname : Name of the volume
+
+    Kwargs:
+        counts_only (bool): If True, the list of files to be healed is not
+            collected. Only 'name', 'status' and 'numberOfEntries' of the
+            bricks are returned. Defaults to False.
+        split_brain (bool): If True, 'heal info split-brain' is parsed
+            instead of 'heal info'. Defaults to False.
+
+    Returns:
+        generator: yields dict of heal_info data per brick. Same format as
+            the elements of the list returned by get_heal_info. The heal
+            info command is killed if the generator is closed before the
+            end of its output.
+
+    Raises:
+        ExecutionError: If the heal info command fails.
+        ExecutionParseError: If the heal info xml output cannot be parsed.
+    """
+    if split_brain:
+        cmd = "gluster volume heal %s info split-brain --xml" % volname
+    else:
+        cmd = "gluster volume heal %s info --xml" % volname
+    proc = g.run_async(mnode, cmd)
+
+    # Parse the output while it is being read, unless the process does not
+    # expose its stdout. Its stderr is then drained by a thread, so that the
+    # command cannot block on a full stderr pipe.
+    result = None
+    stream = getattr(proc, 'stdout', None)
+    drainer = None
+    err_chunks = []
+    if stream is None:
+        result = proc.async_communicate()
+        stream = StringIO(result[1])
+    elif getattr(proc, 'stderr', None) is not None:
+        drainer = threading.Thread(
+            target=lambda: err_chunks.append(proc.stderr.read()))
+        drainer.daemon = True
+        drainer.start()
+
+    parse_error = None
+    try:
+        try:
+            for brick_info in _iterparse_heal_info(stream, counts_only):
+                yield brick_info
+        except etree.ParseError as e:
+            parse_error = e
+
+        if result is None:
+            if drainer is not None:
+                drainer.join()
+            result = proc.async_communicate()
+    finally:
+        if result is None:
+            # The caller stopped iterating, do not leave the command behind
+            _kill_and_reap(proc)
+    ret, _, err = result
+    err = err or ''.join(err_chunks)
+    if ret != 0:
+        raise ExecutionError("Failed to get the heal info xml output for the "
+                             "volume %s: %s" % (volname, err))
+    if parse_error is not None:
+        raise ExecutionParseError("Failed to parse the gluster heal info xml "
+                                  "output for the volume %s: %s" %
+                                  (volname, parse_error))
+
+
+def _kill_and_reap(proc):
+    """Kills an async command and waits for it, ignoring any error"""
+    try:
+        proc.kill()
+    except (AttributeError, OSError):
+        pass
+    try:
+        proc.async_communicate()
+    except Exception:
+        g.log.debug("Failed to reap the killed heal info command",
+                    exc_info=True)
+
+
 def get_heal_info(mnode, volname):
     """From the xml output of heal info command get the heal info data.
 
@@ -270,38 +405,12 @@ def get_heal_info(mnode, volname):
         list: list of dictionaries. Each element in the list is the
             heal_info data per brick.
     """
-    cmd = "gluster volume heal %s info --xml" % volname
-    ret, out, _ = g.run(mnode, cmd, log_level='DEBUG')
-    if ret != 0:
-        g.log.error("Failed to get the heal info xml output for the volume %s."
-                    "Hence failed to get the heal info summary." % volname)
-        return None
-
     try:
-        root = etree.XML(out)
-    except etree.ParseError:
-        g.log.error("Failed to parse the gluster heal info xml output.")
+        return list(iter_heal_info(mnode, volname))
+    except (ExecutionError, ExecutionParseError) as e:
+        g.log.error("%s. Hence failed to get the heal info.", e)
         return None
 
-    heal_info_data = []
-    for brick in root.findall("healInfo/bricks/brick"):
-        brick_heal_info = {}
-        brick_files_to_heal = []
-        file_to_heal_exist = False
-        for element in brick.getchildren():
-            if element.tag == "file":
-                file_to_heal_exist = True
-                file_info = {}
-                file_info[element.attrib['gfid']] = element.text
-                brick_files_to_heal.append(file_info)
-
-            else:
-                brick_heal_info[element.tag] = element.text
-        if file_to_heal_exist:
-            brick_heal_info['file'] = brick_files_to_heal
-        heal_info_data.append(brick_heal_info)
-    return heal_info_data
-
 
 def get_heal_info_summary(mnode, volname):
     """From the xml output of heal info command  get heal info summary
@@ -328,18 +437,17 @@ def get_heal_info_summary(mnode, volname):
                     }
 
     """
-    heal_info_data = get_heal_info(mnode, volname)
-    if heal_info_data is None:
-        g.log.error("Unable to get heal info summary for the volume %s" %
-                    volname)
-        return None
-
     heal_info_summary_data = {}
-    for info_data in heal_info_data:
-        heal_info_summary_data[info_data['name']] = {
-            'status': info_data['status'],
-            'numberOfEntries': info_data['numberOfEntries']
-        }
+    try:
+        for info_data in iter_heal_info(mnode, volname, counts_only=True):
+            heal_info_summary_data[info_data['name']] = {
+                'status': info_data['status'],
+                'numberOfEntries': info_data['numberOfEntries']
+            }
+    except (ExecutionError, ExecutionParseError) as e:
+        g.log.error("%s. Unable to get heal info summary for the volume %s",
+                    e, volname)
+        return None
     return heal_info_summary_data
 
 
@@ -356,38 +464,12 @@ def get_heal_info_split_brain(mnode, volname):
         list: list of dictionaries. Each element in the list is the
             heal_info_split_brain data per brick.
     """
-    cmd = "gluster volume heal %s info split-brain --xml" % volname
-    ret, out, _ = g.run(mnode, cmd, log_level='DEBUG')
-    if ret != 0:
-        g.log.error("Failed to get the heal info xml output for the volume %s."
-                    "Hence failed to get the heal info summary." % volname)
-        return None
-
     try:
-        root = etree.XML(out)
-    except etree.ParseError:
-        g.log.error("Failed to parse the gluster heal info xml output.")
+        return list(iter_heal_info(mnode, volname, split_brain=True))
+    except (ExecutionError, ExecutionParseError) as e:
+        g.log.error("%s. Hence failed to get the heal info split-brain.", e)
         return None
 
-    heal_info_split_brain_data = []
-    for brick in root.findall("healInfo/bricks/brick"):
-        brick_heal_info_split_brain = {}
-        brick_files_in_split_brain = []
-        is_file_in_split_brain = False
-        for element in brick.getchildren():
-            if element.tag == "file":
-                is_file_in_split_brain = True
-                file_info = {}
-                file_info[element.attrib['gfid']] = element.text
-                brick_files_in_split_brain.append(file_info)
-
-            else:
-                brick_heal_info_split_brain[element.tag] = element.text
-        if is_file_in_split_brain:
-            brick_heal_info_split_brain['file'] = brick_files_in_split_brain
-        heal_info_split_brain_data.append(brick_heal_info_split_brain)
-    return heal_info_split_brain_data
-
 
 def get_heal_info_split_brain_summary(mnode, volname):
     """Get heal info split_brain summary i.e Bricks and it's
@@ -21,17 +21,38 @@
 
 from glusto.core import Glusto as g
 from glustolibs.gluster.volume_ops import get_volume_info
-from glustolibs.gluster.mount_ops import mount_volume, umount_volume
+from glustolibs.gluster.aux_mounts import acquire_aux_mount, release_aux_mount
+from glustolibs.gluster.brick_inventory import (get_brick_mounts,
+                                                get_unused_brick_mounts,
+                                                allocate_bricks)
 import re
 import time
+import base64
+import zlib
 from collections import OrderedDict
-import tempfile
 import subprocess
 import random
 
 ONE_GB_BYTES = 1073741824.0
 
 
+def shell_quote(string):
+    """Quotes a string (for example a file name) to be used as a single
+    argument of a shell command, whatever characters it contains.
+
+    Args:
+        string (str): string to quote.
+
+    Returns:
+        str: the string in single quotes, its single quotes escaped.
+
+    Example:
+        shell_quote("it's")
+        >>>'it'\\''s'
+    """
+    return "'%s'" % string.replace("'", "'\\''")
+
+
 def append_string_to_file(mnode, filename, str_to_add_in_file,
                           user="root"):
     """Appends the given string in the file.
@@ -116,9 +137,66 @@ def search_pattern_in_file(mnode, search_pattern, filename, start_str_to_parse,
     return True
 
 
-def calculate_checksum(mnode, file_list, chksum_type='sha256sum'):
+# Size of the file names of a chunk of calculate_checksum or
+# get_extended_attributes_info, far below the 128KB limit of a single
+# argument (the command run by the remote shell).
+FILE_LIST_CHUNK_BYTES = 65536
+
+
+def _run_on_file_chunks(mnode, cmd_format, file_list, parse_output,
+                        workers=4):
+    """Runs the command on the files of file_list, split into chunks whose
+    command line is small enough for any shell. Up to 'workers' chunks are
+    processed in parallel and their outputs are parsed as they complete.
+
+    Args:
+        mnode (str): Node on which cmd has to be executed.
+        cmd_format (str): command with '%s' for the quoted file names.
+        file_list (list): file names.
+        parse_output (callable): parses the output of a chunk into a dict,
+            returns None on parse errors.
+
+    Kwargs:
+        workers (int): number of chunks processed in parallel.
+
+    Returns:
+        NoneType: None if the command of any chunk fails or parse errors.
+        dict: union of the dicts parsed from the chunks.
+    """
+    chunks, chunk, chunk_size = [], [], 0
+    for filename in file_list:
+        quoted = shell_quote(filename)
+        if chunk and chunk_size + len(quoted) > FILE_LIST_CHUNK_BYTES:
+            chunks.append(chunk)
+            chunk, chunk_size = [], 0
+        chunk.append(quoted)
+        chunk_size += len(quoted) + 1
+    if chunk:
+        chunks.append(chunk)
+
+    result = {}
+    procs = []
+    while chunks or procs:
+        while chunks and len(procs) < max(workers, 1):
+            procs.append(g.run_async(mnode, cmd_format % ' '.join(
+                chunks.pop(0)), log_level='DEBUG'))
+        ret, out, _ = procs.pop(0).async_communicate()
+        parsed = parse_output(out) if ret == 0 else None
+        if parsed is None:
+            # Let the running chunks complete before bailing out
+            for proc in procs:
+                proc.async_communicate()
+            return None
+        result.update(parsed)
+    return result
+
+
+def calculate_checksum(mnode, file_list, chksum_type='sha256sum', workers=4):
     """This module calculates given checksum for the given file list
 
+    Any number of files can be given, they are processed by chunks, up to
+    'workers' chunks in parallel.
+
     Example:
         calculate_checksum("abc.com", [file1, file2])
 
@@ -130,35 +208,39 @@ def calculate_checksum(mnode, file_list, chksum_type='sha256sum'):
     Kwargs:
         chksum_type (str): type of the checksum algorithm.
             Defaults to sha256sum
+        workers (int): number of checksum commands run in parallel.
+            Defaults to 4.
 
     Returns:
         NoneType: None if command execution fails, parse errors.
         dict: checksum value for each file in the given file list
     """
-
-    cmd = chksum_type + " %s" % ' '.join(file_list)
-    ret = g.run(mnode, cmd)
-    if ret[0] != 0:
+    def parse_output(out):
+        checksum_dict = {}
+        for line in out.split('\n')[:-1]:
+            match = re.search(r'^(\S+)\s+\*?(.+)$', line.strip())
+            if match is None:
+                g.log.error("checksum output is not in expected format")
+                return None
+
+            checksum_dict[match.group(2)] = match.group(1)
+        return checksum_dict
+
+    ret = _run_on_file_chunks(mnode, chksum_type + " %s", file_list,
+                              parse_output, workers)
+    if ret is None:
         g.log.error("Failed to execute checksum command in server %s"
                     % mnode)
-        return None
-
-    checksum_dict = {}
-    for line in ret[1].split('\n')[:-1]:
-        match = re.search(r'^(\S+)\s+(\S+)', line.strip())
-        if match is None:
-            g.log.error("checksum output is not in expected format")
-            return None
-
-        checksum_dict[match.group(2)] = match.group(1)
-
-    return checksum_dict
+    return ret
 
 
 def get_extended_attributes_info(mnode, file_list, encoding='hex',
-                                 attr_name=''):
+                                 attr_name='', workers=4):
     """This module gets extended attribute info for the given file list
 
+    Any number of files can be given, they are processed by chunks, up to
+    'workers' chunks in parallel.
+
     Example:
         get_extended_attributes_info("abc.com", [file1, file2])
 
@@ -170,38 +252,26 @@ def get_extended_attributes_info(mnode, file_list, encoding='hex',
     Kwargs:
         encoding (str): encoding format
         attr_name (str): extended attribute name
+        workers (int): number of getfattr commands run in parallel.
+            Defaults to 4.
 
     Returns:
         NoneType: None if command execution fails, parse errors.
-        dict: extended attribute for each file in the given file list
+        dict: extended attribute for each file in the given file list, as
+            parsed by parse_getfattr_output
     """
 
     if attr_name == '':
-        cmd = "getfattr -d -m . -e %s %s" % (encoding, ' '.join(file_list))
+        cmd = "getfattr -d -m . -e %s %%s" % encoding
     else:
-        cmd = ("getfattr -d -m . -e %s -n %s %s"
-               % (encoding, attr_name, ' '.join(file_list)))
+        cmd = "getfattr -d -m . -e %s -n %s %%s" % (encoding, attr_name)
 
-    ret = g.run(mnode, cmd)
-    if ret[0] != 0:
+    ret = _run_on_file_chunks(mnode, cmd, file_list, parse_getfattr_output,
+                              workers)
+    if ret is None:
         g.log.error("Failed to execute getfattr command in server %s"
                     % mnode)
-        return None
-
-    attr_dict = {}
-    for each_attr in ret[1].split('\n\n')[:-1]:
-        for line in each_attr.split('\n'):
-            if line.startswith('#'):
-                match = re.search(r'.*file:\s(\S+).*', line)
-                if match is None:
-                    g.log.error("getfattr output is not in expected format")
-                    return None
-                key = "/" + match.group(1)
-                attr_dict[key] = {}
-            else:
-                output = line.split('=')
-                attr_dict[key][output[0]] = output[1]
-    return attr_dict
+    return ret
 
 
 def get_pathinfo(mnode, filename, volname):
@@ -219,40 +289,111 @@ def get_pathinfo(mnode, filename, volname):
         NoneType: None if command execution fails, parse errors.
         list: file path for the given file in gluster server
     """
+    pathinfo = get_pathinfo_of_files(mnode, [filename], volname)
+    if pathinfo is None:
+        return None
+    return pathinfo[filename]
 
-    mount_point = tempfile.mkdtemp()
 
-    # Performing glusterfs mount because only with glusterfs mount
-    # the file location in gluster server can be identified
-    ret, _, _ = mount_volume(volname, mtype='glusterfs',
-                             mpoint=mount_point,
-                             mserver=mnode,
-                             mclient=mnode)
-    if ret != 0:
-        g.log.error("Failed to do gluster mount on volume %s to fetch"
-                    "pathinfo from server %s"
-                    % (volname, mnode))
-        return None
+def _is_stale_mount_error(err):
+    """Returns True if the stderr of a command run on a mount reports that
+    the mount is disconnected or stale, as opposed to missing files.
+    """
+    return any(msg in err for msg in ('Transport endpoint is not connected',
+                                      'ENOTCONN', 'Stale file handle',
+                                      'ESTALE'))
 
-    filename = mount_point + '/' + filename
+
+def get_pathinfo_of_files(mnode, filenames, volname):
+    """Gets the filepaths of the given files in the gluster servers with a
+    single getfattr on an auxiliary glusterfs mount of the volume (see
+    glustolibs.gluster.aux_mounts).
+
+    Example:
+        get_pathinfo_of_files(mnode, ["file1", "dir1/file2"], "testvol")
+
+    Args:
+        mnode (str): Node on which cmd has to be executed.
+        filenames (list): relative paths of the files
+        volname (str): volume name
+
+    Returns:
+        NoneType: None if the volume could not be mounted.
+        OrderedDict: key - filename
+            value - list of file paths 'server:/brick/path' of the file in
+            the gluster servers, None if it could not be read (for
+            example if the file does not exist).
+    """
     attr_name = 'trusted.glusterfs.pathinfo'
-    output = get_extended_attributes_info(mnode, [filename],
-                                          attr_name=attr_name)
-    if output is None:
-        g.log.error("Failed to get path info for %s" % filename)
-        return None
+    pathinfo_dict = OrderedDict((filename, None) for filename in filenames)
 
-    pathinfo = output[filename][attr_name]
+    # Performing glusterfs mount because only with glusterfs mount
+    # the file location in gluster server can be identified. The mount is
+    # taken from the auxiliary mounts pool, and a mount on which getfattr
+    # reports a disconnected or stale mount is replaced once.
+    for attempt in range(2):
+        mount_point = acquire_aux_mount(mnode, volname)
+        if mount_point is None:
+            g.log.error("Failed to do gluster mount on volume %s to fetch"
+                        "pathinfo from server %s"
+                        % (volname, mnode))
+            return None
+
+        paths = OrderedDict((mount_point + '/' + filename.lstrip('/'),
+                             filename) for filename in filenames)
+        # getfattr fails when any of the files is missing, the pathinfo of
+        # the other files is still printed
+        _, out, err = g.run(mnode, "getfattr -n %s -e text %s" % (
+            attr_name, ' '.join(shell_quote(path) for path in paths)))
+        attr_dict = parse_getfattr_output(out)
+        stale = _is_stale_mount_error(err)
+        release_aux_mount(mnode, volname, discard=stale)
+        if not stale:
+            break
+
+    for path, attrs in attr_dict.items():
+        if path in paths and attr_name in attrs:
+            pathinfo_dict[paths[path]] = re.findall(
+                r".*?POSIX.*?:(\S+)\>", attrs[attr_name])
 
-    umount_volume(mnode, mount_point)
-    g.run(mnode, "rm -rf " + mount_point)
+    for filename, pathinfo in pathinfo_dict.items():
+        if pathinfo is None:
+            g.log.error("Failed to get path info for %s" % filename)
+    return pathinfo_dict
 
-    return re.findall(".*?POSIX.*?:(\S+)\>", pathinfo)
 
+def parse_getfattr_output(out):
+    """Parses the output of the getfattr command.
 
-def list_files(mnode, dir_path, parse_str="", user="root"):
+    Args:
+        out (str): output of getfattr -d|-n ... of one or more files.
+
+    Returns:
+        OrderedDict: key - absolute file path
+            value - dict of attribute name -> value. The quotes of the text
+            encoded values are removed.
+    """
+    attr_dict = OrderedDict()
+    key = None
+    for line in out.split('\n'):
+        if line.startswith('# file: '):
+            key = "/" + line[len('# file: '):].strip().lstrip('/')
+            attr_dict[key] = {}
+        elif key is not None and '=' in line:
+            name, value = line.split('=', 1)
+            if len(value) > 1 and value[0] == value[-1] == '"':
+                value = value[1:-1]
+            attr_dict[key][name] = value
+    return attr_dict
+
+
+def list_files(mnode, dir_path, parse_str="", user="root",
+               prune_glusterfs=False, count_only=False, as_generator=False):
     """This module list files from the given file path
 
+    The directory tree is walked on mnode by find and the list of files is
+    sent back compressed.
+
     Example:
         list_files("/root/dir1/")
 
@@ -263,40 +404,95 @@ def list_files(mnode, dir_path, parse_str="", user="root"):
     Kwargs:
         parse_str (str): sub string of the filename to be fetched
         user (str): username. Defaults to 'root' user.
+        prune_glusterfs (bool): True to skip the .glusterfs directories
+            (for example when listing bricks). Defaults to False.
+        count_only (bool): True to return only the number of files.
+            Defaults to False.
+        as_generator (bool): True to return a generator of the files,
+            decompressed as they are consumed. Defaults to False.
 
     Returns:
         NoneType: None if command execution fails, parse errors.
         list: files with absolute name
+        generator: files with absolute name if as_generator is True. It
+            stops, logging an error, if the listing turns out to be corrupt.
+        int: number of files if count_only is True
     """
+    cmd = "find %s" % shell_quote(dir_path)
+    if prune_glusterfs:
+        cmd += " -name .glusterfs -prune -o"
+    cmd += " ! -type d"
+    if parse_str != "":
+        cmd += " -name %s" % shell_quote(
+            "*%s*" % re.sub(r'([\[\]*?\\])', r'\\\1', parse_str))
+    # Files vanishing during the walk are not errors, as with os.walk
+    if count_only:
+        cmd += " -printf x 2>/dev/null | wc -c"
+    else:
+        cmd += " -print0 2>/dev/null | gzip -c | base64"
 
-    try:
-        conn = g.rpyc_get_connection(mnode, user=user)
-        if conn is None:
-            g.log.error("Unable to get connection to 'root' of node %s"
-                        % mnode)
-            return None
+    ret, out, err = g.run(mnode, cmd, user=user, log_level='DEBUG')
+    if ret != 0:
+        g.log.error("Failed to list the files of %s on %s: %s"
+                    % (dir_path, mnode, err))
+        return None
+    if count_only:
+        return int(out.strip() or 0)
 
-        filepaths = []
-        for root, directories, files in conn.modules.os.walk(dir_path):
-            for filename in files:
-                if parse_str != "":
-                    if parse_str in filename:
-                        filepath = conn.modules.os.path.join(root, filename)
-                        filepaths.append(filepath)
-                else:
-                    filepath = conn.modules.os.path.join(root, filename)
-                    filepaths.append(filepath)
-        return filepaths
-    except StopIteration:
+    try:
+        data = base64.b64decode(out)
+    except (TypeError, ValueError):
+        g.log.error("Exception occured in list_files()")
+        return None
+    filepaths = _iter_compressed_paths(data)
+    if as_generator:
+        return _iter_until_zlib_error(filepaths, mnode, dir_path)
+    try:
+        return list(filepaths)
+    except zlib.error:
         g.log.error("Exception occured in list_files()")
         return None
 
-    finally:
-        g.rpyc_close_connection(host=mnode, user=user)
+
+def _iter_until_zlib_error(filepaths, mnode, dir_path):
+    """Yields the paths of filepaths, stopping at a decompression error"""
+    try:
+        for path in filepaths:
+            yield path
+    except zlib.error as e:
+        g.log.error("Corrupt list of the files of %s from %s: %s"
+                    % (dir_path, mnode, e))
+
+
+def _iter_compressed_paths(data, chunk_size=65536):
+    """Yields the paths of a gzip compressed, NUL separated, list of paths
+    decompressing it chunk by chunk.
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    pending = b''
+    for offset in range(0, len(data), chunk_size):
+        pending += decompressor.decompress(data[offset:offset + chunk_size])
+        paths = pending.split(b'\0')
+        pending = paths.pop()
+        for path in paths:
+            yield _to_str(path)
+    pending += decompressor.flush()
+    for path in pending.split(b'\0'):
+        if path:
+            yield _to_str(path)
+
+
+def _to_str(data):
+    """Returns the native str of the bytes read from a remote command"""
+    if isinstance(data, str):
+        return data
+    return data.decode('utf-8', 'replace')
 
 
 def get_servers_bricks_dict(servers, servers_info):
     """This module returns servers_bricks dictionary.
+    The bricks are read from the brick inventory, the servers missing from
+    it being scanned in parallel.
     Args:
         servers (str|list): A server|List of servers for which we
             need the list of bricks available on it.
@@ -307,23 +503,7 @@ def get_servers_bricks_dict(servers, servers_info):
     Example:
         get_servers_bricks_dict(g.config['servers'], g.config['servers_info'])
     """
-    servers_bricks_dict = OrderedDict()
-    if isinstance(servers, str):
-        servers = [servers]
-    for server in servers:
-        server_info = servers_info[server]
-        brick_root = server_info["brick_root"]
-        ret, out, err = g.run(server, "cat /proc/mounts | grep %s"
-                              " | awk '{ print $2}'" % brick_root)
-        if ret != 0:
-            g.log.error("bricks not available on %s" % server)
-        else:
-            servers_bricks_dict[server] = out.strip().split("\n")
-
-    for key, value in servers_bricks_dict.items():
-        value.sort()
-
-    return servers_bricks_dict
+    return get_brick_mounts(servers, servers_info)
 
 
 def get_servers_used_bricks_dict(mnode, servers):
@@ -373,8 +553,9 @@ def get_servers_used_bricks_dict(mnode, servers):
 
 def get_servers_unused_bricks_dict(mnode, servers, servers_info):
     """This module returns servers_unused_bricks dictionary.
-    Gets a list of unused bricks for each server by using functions,
-    get_servers_bricks_dict() and get_servers_used_bricks_dict()
+    Gets a list of unused bricks for each server from the brick inventory,
+    which is gathered once and then kept up to date by the volume and
+    brick operations.
     Args:
         mnode (str): The node on which gluster volume info command has
             to be executed.
@@ -389,28 +570,18 @@ def get_servers_unused_bricks_dict(mnode, servers, servers_info):
                                        g.config['servers'],
                                        g.config['servers_info'])
     """
-    if isinstance(servers, str):
-        servers = [servers]
-    dict1 = get_servers_bricks_dict(servers, servers_info)
-    dict2 = get_servers_used_bricks_dict(mnode, servers)
-    servers_unused_bricks_dict = OrderedDict()
-    for key, value in dict1.items():
-        if key in dict2:
-            unused_bricks = list(set(value) - set(dict2[key]))
-            servers_unused_bricks_dict[key] = unused_bricks
-        else:
-            servers_unused_bricks_dict[key] = value
-
-    for key, value in servers_unused_bricks_dict.items():
-        value.sort()
-
-    return servers_unused_bricks_dict
+    return get_unused_brick_mounts(mnode, servers, servers_info)
 
 
-def form_bricks_list(mnode, volname, number_of_bricks, servers, servers_info):
+def form_bricks_list(mnode, volname, number_of_bricks, servers, servers_info,
+                     subvol_size=1, excluded_servers=None):
     """Forms bricks list for create-volume/add-brick given the num_of_bricks
         servers and servers_info.
 
+    The bricks of each subvol (i.e each group of subvol_size consecutive
+    bricks) are placed on distinct servers whenever enough servers have
+    unused bricks.
+
     Args:
         mnode (str): The node on which the command has to be run.
         volname (str): Volume name for which we require brick-list.
@@ -420,27 +591,31 @@ def form_bricks_list(mnode, volname, number_of_bricks, servers, servers_info):
             needs to be selected for creating the brick list.
         servers_info (dict): dict of server info of each servers.
 
+    Kwargs:
+        subvol_size (int): Number of bricks per subvol, i.e replica or
+            disperse count. Defaults to 1.
+        excluded_servers (list): List of the servers already hosting
+            bricks of each subvol the new bricks are added to, in subvol
+            order. The bricks of a subvol are placed on other servers
+            whenever possible. Defaults to None.
+
     Returns:
         list - List of bricks to use with volume-create/add-brick
         None - if number_of_bricks is greater than unused bricks.
 
     Example:
         form_bricks_path(g.config['servers'](0), "testvol", 6,
-                         g.config['servers'], g.config['servers_info'])
+                         g.config['servers'], g.config['servers_info'],
+                         subvol_size=3)
     """
     if isinstance(servers, str):
         servers = [servers]
-    dict_index = 0
-    bricks_list = []
 
-    servers_unused_bricks_dict = get_servers_unused_bricks_dict(mnode, servers,
-                                                                servers_info)
-    num_of_unused_bricks = 0
-    for each_server_unused_bricks_list in servers_unused_bricks_dict.values():
-        num_of_unused_bricks = (num_of_unused_bricks +
-                                len(each_server_unused_bricks_list))
-
-    if num_of_unused_bricks < number_of_bricks:
+    servers_unused_bricks_dict = get_unused_brick_mounts(mnode, servers,
+                                                         servers_info)
+    allocated = allocate_bricks(servers_unused_bricks_dict, number_of_bricks,
+                                subvol_size, excluded_servers)
+    if allocated is None:
         g.log.error("Not enough bricks available for creating the bricks")
         return None
 
@@ -449,27 +624,8 @@ def form_bricks_list(mnode, volname, number_of_bricks, servers, servers_info):
     if vol_info_dict:
         brick_index = int(vol_info_dict[volname]['brickCount'])
 
-    for num in range(brick_index, brick_index + number_of_bricks):
-        # current_server is the server from which brick path will be created
-        current_server = servers_unused_bricks_dict.keys()[dict_index]
-        current_server_unused_bricks_list = (
-            servers_unused_bricks_dict.values()[dict_index])
-        brick_path = ''
-        if current_server_unused_bricks_list:
-            brick_path = ("%s:%s/%s_brick%s" %
-                          (current_server,
-                           current_server_unused_bricks_list[0], volname, num))
-            bricks_list.append(brick_path)
-
-            # Remove the added brick from the current_server_unused_bricks_list
-            servers_unused_bricks_dict.values()[dict_index].pop(0)
-
-        if dict_index < len(servers_unused_bricks_dict) - 1:
-            dict_index = dict_index + 1
-        else:
-            dict_index = 0
-
-    return bricks_list
+    return ["%s:%s/%s_brick%s" % (server, mount, volname, brick_index + num)
+            for num, (server, mount) in enumerate(allocated)]
 
 
 def is_rhel6(servers):
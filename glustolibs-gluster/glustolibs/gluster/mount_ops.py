@@ -21,6 +21,7 @@
 
 from glusto.core import Glusto as g
 from glustolibs.gluster.windows_libs import powershell
+from collections import OrderedDict
 import copy
 
 
@@ -227,6 +228,37 @@ class GlusterMount():
         return rc
 
 
+def _get_is_mounted_cmd(volname, mpoint, mserver):
+    """Returns the command succeeding if the volume is mounted on mpoint"""
+    return "mount | grep %s | grep %s | grep \"%s\"" % (volname, mpoint,
+                                                        mserver)
+
+
+def _get_mount_cmd(volname, mtype, mpoint, mserver, options=''):
+    """Returns the command mounting the volume with glusterfs or nfs"""
+    if options != '':
+        options = "-o %s" % options
+
+    if mtype == 'nfs':
+        if not options:
+            options = "-o vers=3"
+
+        elif options and 'vers' not in options:
+            options = options + ",vers=3"
+
+    if mserver:
+        return ("mount -t %s %s %s:/%s %s" %
+                (mtype, options, mserver, volname, mpoint))
+    return ("mount -t %s %s %s %s" %
+            (mtype, options, volname, mpoint))
+
+
+def _get_umount_cmd(mpoint):
+    """Returns the command unmounting mpoint on linux clients"""
+    return ("umount %s || umount -f %s || umount -l %s" %
+            (mpoint, mpoint, mpoint))
+
+
 def is_mounted(volname, mpoint, mserver, mclient, mtype, user='root'):
     """Check if mount exist.
 
@@ -264,8 +296,8 @@ def is_mounted(volname, mpoint, mserver, mclient, mtype, user='root'):
                 else:
                     return False
     else:
-        ret, _, _ = g.run(mclient, "mount | grep %s | grep %s | grep \"%s\""
-                          % (volname, mpoint, mserver), user)
+        ret, _, _ = g.run(mclient, _get_is_mounted_cmd(volname, mpoint,
+                                                       mserver), user)
         if ret == 0:
             g.log.debug("Volume %s is mounted at %s:%s" % (volname, mclient,
                                                            mpoint))
@@ -306,9 +338,6 @@ def mount_volume(volname, mtype, mpoint, mserver, mclient, options='',
                     (volname, mpoint))
         return (0, '', '')
 
-    if options != '':
-        options = "-o %s" % options
-
     if mtype == 'smb':
         if smbuser is None or smbpasswd is None:
             g.log.error("smbuser and smbpasswd to be passed as parameters "
@@ -337,19 +366,7 @@ def mount_volume(volname, mtype, mpoint, mserver, mclient, options='',
                     (mclient, err))
         return (1, out, err)
 
-    if mtype == 'nfs':
-        if not options:
-            options = "-o vers=3"
-
-        elif options and 'vers' not in options:
-            options = options + ",vers=3"
-
-    if mserver:
-        mcmd = ("mount -t %s %s %s:/%s %s" %
-                (mtype, options, mserver, volname, mpoint))
-    else:
-        mcmd = ("mount -t %s %s %s %s" %
-                (mtype, options, volname, mpoint))
+    mcmd = _get_mount_cmd(volname, mtype, mpoint, mserver, options)
 
     if mtype == 'cifs':
         if smbuser is None or smbpasswd is None:
@@ -408,8 +425,7 @@ def umount_volume(mclient, mpoint, mtype='', user='root'):
         cmd = "net use %s /d /Y" % mpoint
         cmd = powershell(cmd)
     else:
-        cmd = ("umount %s || umount -f %s || umount -l %s" %
-               (mpoint, mpoint, mpoint))
+        cmd = _get_umount_cmd(mpoint)
     return g.run(mclient, cmd, user=user)
 
 
@@ -491,8 +507,147 @@ def create_mount_objs(mounts):
     return mount_obj_list
 
 
+def _is_batchable(mount_obj):
+    """Returns True if the mount can be done by the per client batch
+    script, i.e glusterfs or nfs mounts on linux clients. smb and cifs
+    mounts are done individually by GlusterMount.mount/unmount.
+    """
+    return (mount_obj.platform != 'windows' and
+            mount_obj.mounttype in ('glusterfs', 'nfs'))
+
+
+def _run_batch_scripts(mount_objs, get_mount_script, action):
+    """Runs one script per client, for all the clients concurrently, made
+    of the per mount scripts returned by get_mount_script(index, mount_obj)
+    which must print '<action>-status <index> <rc>'. Mounts with the same
+    client and mountpoint are handled once.
+
+    Returns:
+        OrderedDict: mount_obj -> True if the script succeeded for the
+            mount, False otherwise.
+    """
+    results = OrderedDict()
+    client_mounts = OrderedDict()
+    for mount_obj in mount_objs:
+        key = (mount_obj.client_system, mount_obj.user)
+        mounts = client_mounts.setdefault(key, OrderedDict())
+        mounts.setdefault(mount_obj.mountpoint, []).append(mount_obj)
+        results[mount_obj] = False
+
+    all_clients_procs = []
+    for (client, user), mounts in client_mounts.items():
+        cmd = "; ".join(get_mount_script(index, objs[0])
+                        for index, objs in enumerate(mounts.values()))
+        proc = g.run_async(client, cmd, user=user)
+        all_clients_procs.append((client, list(mounts.values()), proc))
+
+    for client, mounts, proc in all_clients_procs:
+        ret, out, err = proc.async_communicate()
+        statuses = {}
+        for line in (out or '').splitlines():
+            words = line.split()
+            if len(words) == 3 and words[0] == "%s-status" % action:
+                statuses[words[1]] = words[2]
+        for index, objs in enumerate(mounts):
+            status = statuses.get(str(index)) == '0'
+            if not status:
+                g.log.error("Failed to %s %s on %s: %s", action,
+                            objs[0].mountpoint, client, (err or '').strip())
+            for mount_obj in objs:
+                results[mount_obj] = status
+    return results
+
+
+def batch_mount(mount_objs):
+    """Mounts all the mount objs with one script per client, the clients
+    being processed concurrently. The script checks whether each volume is
+    already mounted, creates the mountpoint and mounts the volume.
+    Duplicate mounts (same client and mountpoint) are mounted once.
+
+    Args:
+        mount_objs (list): list of mounts objects with each element being
+            the GlusterMount class object
+
+    Returns:
+        OrderedDict: GlusterMount object -> True if the volume is mounted,
+            False otherwise.
+
+    Example:
+        results = batch_mount(create_mount_objs(mounts))
+    """
+    if isinstance(mount_objs, GlusterMount):
+        mount_objs = [mount_objs]
+
+    def get_mount_script(index, mount_obj):
+        mount_cmd = ("test -d %s || mkdir -p %s; %s; "
+                     "echo \"mount-status %d $?\"" % (
+                         mount_obj.mountpoint, mount_obj.mountpoint,
+                         _get_mount_cmd(mount_obj.volname,
+                                        mount_obj.mounttype,
+                                        mount_obj.mountpoint,
+                                        mount_obj.server_system,
+                                        mount_obj.options), index))
+        if not mount_obj.server_system:
+            return mount_cmd
+        return ("if %s > /dev/null 2>&1; then echo \"mount-status %d 0\"; "
+                "else %s; fi" % (_get_is_mounted_cmd(
+                    mount_obj.volname, mount_obj.mountpoint,
+                    mount_obj.server_system), index, mount_cmd))
+
+    batchable = [mount_obj for mount_obj in mount_objs
+                 if _is_batchable(mount_obj)]
+    batch_results = _run_batch_scripts(batchable, get_mount_script, 'mount')
+
+    results = OrderedDict()
+    for mount_obj in mount_objs:
+        if mount_obj in batch_results:
+            results[mount_obj] = batch_results[mount_obj]
+        else:
+            results[mount_obj] = mount_obj.mount()
+    return results
+
+
+def batch_unmount(mount_objs):
+    """Unmounts all the mount objs with one script per client, the clients
+    being processed concurrently. Duplicate mounts (same client and
+    mountpoint) are unmounted once.
+
+    Args:
+        mount_objs (list): list of mounts objects with each element being
+            the GlusterMount class object
+
+    Returns:
+        OrderedDict: GlusterMount object -> True if the volume is
+            unmounted, False otherwise.
+
+    Example:
+        results = batch_unmount(create_mount_objs(mounts))
+    """
+    if isinstance(mount_objs, GlusterMount):
+        mount_objs = [mount_objs]
+
+    def get_unmount_script(index, mount_obj):
+        return "%s; echo \"umount-status %d $?\"" % (
+            _get_umount_cmd(mount_obj.mountpoint), index)
+
+    batchable = [mount_obj for mount_obj in mount_objs
+                 if _is_batchable(mount_obj)]
+    batch_results = _run_batch_scripts(batchable, get_unmount_script,
+                                       'umount')
+
+    results = OrderedDict()
+    for mount_obj in mount_objs:
+        if mount_obj in batch_results:
+            results[mount_obj] = batch_results[mount_obj]
+        else:
+            results[mount_obj] = mount_obj.unmount()
+    return results
+
+
 def create_mounts(mount_objs):
-    """Creates Mounts using the details as specified in the each mount obj
+    """Creates Mounts using the details as specified in the each mount obj.
+    The glusterfs and nfs mounts are created concurrently on all the
+    clients with batch_mount.
 
     Args:
         mount_objs (list): list of mounts objects with each element being
@@ -505,16 +660,13 @@ def create_mounts(mount_objs):
     Example:
         ret = create_mounts(create_mount_objs(mounts))
     """
-    rc = True
-    for mount_obj in mount_objs:
-        ret = mount_obj.mount()
-        if not ret:
-            rc = False
-    return rc
+    return all(batch_mount(mount_objs).values())
 
 
 def unmount_mounts(mount_objs):
-    """Creates Mounts using the details as specified in the each mount obj
+    """Unmounts the mounts specified in the each mount obj. The glusterfs
+    and nfs mounts are unmounted concurrently on all the clients with
+    batch_unmount.
 
     Args:
         mount_objs (list): list of mounts objects with each element being
@@ -527,9 +679,4 @@ def unmount_mounts(mount_objs):
     Example:
         ret = unmount_mounts(create_mount_objs(mounts))
     """
-    rc = True
-    for mount_obj in mount_objs:
-        ret = mount_obj.unmount()
-        if not ret:
-            rc = False
-    return rc
+    return all(batch_unmount(mount_objs).values())
@@ -41,6 +41,7 @@ from glustolibs.gluster.volume_libs import (setup_volume, cleanup_volume,
 from glustolibs.gluster.mount_ops import create_mount_objs
 from glustolibs.io.utils import log_mounts_info, wait_for_io_to_complete
 from glustolibs.misc.misc_libs import upload_scripts
+from glustolibs.gluster.waiter import wait_for
 import time
 import socket
 import re
@@ -457,16 +458,10 @@ def wait_for_nfs_ganesha_volume_to_get_exported(mnode, volname, timeout=120):
     Examples:
         >>> wait_for_volume_to_get_exported("abc.com", "testvol")
     """
-    count = 0
-    flag = 0
-    while (count < timeout):
-        if is_volume_exported(mnode, volname, "nfs"):
-            flag = 1
-            break
-
-        time.sleep(10)
-        count = count + 10
-    if not flag:
+    ret, _ = wait_for(
+        lambda: is_volume_exported(mnode, volname, "nfs"),
+        timeout=timeout)
+    if not ret:
         g.log.error("Failed to export volume %s" % volname)
         return False
 
@@ -490,16 +485,10 @@ def wait_for_nfs_ganesha_volume_to_get_unexported(mnode, volname, timeout=120):
     Examples:
         >>> wait_for_volume_to_get_unexported("abc.com", "testvol")
     """
-    count = 0
-    flag = 0
-    while (count < timeout):
-        if not is_volume_exported(mnode, volname, "nfs"):
-            flag = 1
-            break
-
-        time.sleep(10)
-        count = count + 10
-    if not flag:
+    ret, _ = wait_for(
+        lambda: not is_volume_exported(mnode, volname, "nfs"),
+        timeout=timeout)
+    if not ret:
         g.log.error("Failed to unexport volume %s" % volname)
         return False
 
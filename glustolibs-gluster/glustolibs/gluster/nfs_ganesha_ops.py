@@ -22,11 +22,13 @@
 """
 
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import invalidates_cache
 import os
 
 GDEPLOY_CONF_DIR = "/usr/share/glustolibs/gdeploy_configs/"
 
 
+@invalidates_cache
 def create_nfs_ganesha_cluster(servers, vips):
     """Creates nfs ganesha cluster using gdeploy
 
@@ -80,6 +82,7 @@ def create_nfs_ganesha_cluster(servers, vips):
     return True
 
 
+@invalidates_cache
 def teardown_nfs_ganesha_cluster(servers, force=False):
     """Teardown nfs ganesha cluster using gdeploy
 
@@ -139,6 +142,7 @@ def teardown_nfs_ganesha_cluster(servers, force=False):
     return True
 
 
+@invalidates_cache
 def add_node_to_nfs_ganesha_cluster(servers, node_to_add, vip):
     """Adds a node to nfs ganesha cluster using gdeploy
 
@@ -197,6 +201,7 @@ def add_node_to_nfs_ganesha_cluster(servers, node_to_add, vip):
     return True
 
 
+@invalidates_cache
 def delete_node_from_nfs_ganesha_cluster(servers, node_to_delete):
     """Deletes a node from existing nfs ganesha cluster using gdeploy
 
@@ -249,6 +254,7 @@ def delete_node_from_nfs_ganesha_cluster(servers, node_to_delete):
     return True
 
 
+@invalidates_cache
 def enable_nfs_ganesha(mnode):
     """Enables nfs-ganesha cluster in the storage pool.
        All the pre-requisites to create nfs-ganesha cluster
@@ -276,6 +282,7 @@ def enable_nfs_ganesha(mnode):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def disable_nfs_ganesha(mnode):
     """Disables nfs-ganesha cluster in the storage pool.
 
@@ -301,6 +308,7 @@ def disable_nfs_ganesha(mnode):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def export_nfs_ganesha_volume(mnode, volname):
     """Exports nfs-ganesha volume.
 
@@ -327,6 +335,7 @@ def export_nfs_ganesha_volume(mnode, volname):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def unexport_nfs_ganesha_volume(mnode, volname):
     """Unexport nfs-ganesha volume.
 
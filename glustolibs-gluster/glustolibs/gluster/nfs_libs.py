@@ -19,9 +19,11 @@
 """
 import time
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import invalidates_cache
 from glustolibs.gluster.volume_libs import is_volume_exported
 
 
+@invalidates_cache
 def export_volume_through_nfs(mnode, volname, enable_ganesha=False,
                               time_delay=30):
     """Export the volume through nfs
@@ -21,15 +21,19 @@
 
 
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import (cached_query, invalidates_cache,
+                                          invalidate_cli_cache)
+from glustolibs.gluster.waiter import wait_for
 import re
-import time
 import socket
+from collections import OrderedDict
 try:
     import xml.etree.cElementTree as etree
 except ImportError:
     import xml.etree.ElementTree as etree
 
 
+@invalidates_cache
 def peer_probe(mnode, server):
     """Probe the specified server.
 
@@ -52,6 +56,7 @@ def peer_probe(mnode, server):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def peer_detach(mnode, server, force=False):
     """Detach the specified server.
 
@@ -122,7 +127,57 @@ def pool_list(mnode):
     return g.run(mnode, cmd)
 
 
-def peer_probe_servers(mnode, servers, validate=True, time_delay=10):
+def _run_peer_commands(mnode, servers, cmd_format):
+    """Runs the gluster peer command of each server one after the other in
+    a single remote script, glusterd serializing the peer operations anyway.
+
+    Args:
+        mnode (str): Node on which the commands have to be executed.
+        servers (list): List of servers.
+        cmd_format (str): Command with '%s' for the server.
+
+    Returns:
+        OrderedDict: key - server
+            value - tuple (ret, out) of the command of the server. ret is
+            -1 when the script ended before running the command.
+    """
+    script = "; ".join("%s 2>&1; echo \"peer-cmd-status %s $?\"" %
+                       (cmd_format % server, server) for server in servers)
+    _, out, _ = g.run(mnode, script)
+
+    results = OrderedDict((server, (-1, '')) for server in servers)
+    pieces = re.split(r'peer-cmd-status (\S+) (\d+)\n?', out)
+    for index in range(1, len(pieces) - 1, 3):
+        results[pieces[index]] = (int(pieces[index + 1]),
+                                  pieces[index - 1].strip())
+    return results
+
+
+def _get_pool_states(mnode, servers):
+    """Gets the state of the servers in the pool of mnode, bypassing the cli
+    cache. See get_peer_matrix for the states.
+
+    Returns:
+        NoneType: None if the pool list could not be read.
+        OrderedDict: server -> state
+    """
+    invalidate_cli_cache(mnode)
+    pool_list_data = get_pool_list(mnode)
+    if pool_list_data is None:
+        return None
+
+    ips_cache = {}
+    states = OrderedDict((server, 'Missing') for server in servers)
+    for peer_stat in pool_list_data:
+        peer = _match_peer_server(peer_stat, servers, ips_cache)
+        if peer is not None:
+            states[peer] = _get_peer_state(peer_stat)
+    return states
+
+
+@invalidates_cache
+def peer_probe_servers(mnode, servers, validate=True, time_delay=10,
+                       batch=True):
     """Probe specified servers and validate whether probed servers
     are in cluster and connected state if validate is set to True.
 
@@ -133,8 +188,12 @@ def peer_probe_servers(mnode, servers, validate=True, time_delay=10):
     Kwargs:
         validate (bool): True to validate if probed peer is in cluster and
             connected state. False otherwise. Defaults to True.
-        time_delay (int): time delay before validating peer status.
+        time_delay (int): time within which the probed peers have to be in
+            cluster and connected state. The pool list is polled until then.
             Defaults to 10 seconds.
+        batch (bool): True to run all the peer probes from a single remote
+            script, False to run one 'gluster peer probe' per server.
+            Defaults to True.
 
     Returns:
         bool: True on success and False on failure.
@@ -154,20 +213,34 @@ def peer_probe_servers(mnode, servers, validate=True, time_delay=10):
                     "Failing peer probe.")
         return False
 
-    for server in servers:
-        if server not in nodes_in_pool_list:
-            ret, out, _ = peer_probe(mnode, server)
-            if (ret != 0 or
-                    re.search(r'^peer\sprobe\:\ssuccess(.*)', out) is None):
-                g.log.error("Failed to peer probe the node '%s'.", server)
-                return False
-            else:
-                g.log.info("Successfully peer probed the node '%s'.", server)
+    servers_to_probe = [server for server in servers
+                        if server not in nodes_in_pool_list]
+    if batch and servers_to_probe:
+        results = _run_peer_commands(mnode, servers_to_probe,
+                                     "gluster peer probe %s")
+    else:
+        results = OrderedDict((server, peer_probe(mnode, server)[:2])
+                              for server in servers_to_probe)
+    for server, (ret, out) in results.items():
+        if (ret != 0 or
+                re.search(r'^peer\sprobe\:\ssuccess(.*)', out) is None):
+            g.log.error("Failed to peer probe the node '%s'.", server)
+            return False
+        else:
+            g.log.info("Successfully peer probed the node '%s'.", server)
 
     # Validating whether peer is in connected state after peer probe
     if validate:
-        time.sleep(time_delay)
-        if not is_peer_connected(mnode, servers):
+        ret, states = wait_for(
+            lambda: _get_pool_states(mnode, servers),
+            condition=lambda states: states is not None and all(
+                state == 'Connected' for state in states.values()),
+            timeout=time_delay)
+        if not ret:
+            for server, state in (states or {}).items():
+                if state != 'Connected':
+                    g.log.error("Peer '%s' is '%s' from node %s", server,
+                                state, mnode)
             g.log.error("Validation after peer probe failed.")
             return False
         else:
@@ -176,8 +249,9 @@ def peer_probe_servers(mnode, servers, validate=True, time_delay=10):
     return True
 
 
+@invalidates_cache
 def peer_detach_servers(mnode, servers, force=False, validate=True,
-                        time_delay=10):
+                        time_delay=10, batch=True):
     """Detach peers and validate status of peer if validate is set to True.
 
     Args:
@@ -189,8 +263,12 @@ def peer_detach_servers(mnode, servers, force=False, validate=True,
             Defaults to False.
         validate (bool): True if status of the peer needs to be validated,
             False otherwise. Defaults to True.
-        time_delay (int): time delay before executing validating peer.
-            status. Defaults to 10 seconds.
+        time_delay (int): time within which the detached peers have to be
+            out of the pool. The pool list is polled until then. Defaults
+            to 10 seconds.
+        batch (bool): True to run all the peer detaches from a single
+            remote script, False to run one 'gluster peer detach' per
+            server. Defaults to True.
 
     Returns:
         bool: True on success and False on failure.
@@ -203,8 +281,15 @@ def peer_detach_servers(mnode, servers, force=False, validate=True,
     if mnode in servers:
         servers.remove(mnode)
 
-    for server in servers:
-        ret, out, _ = peer_detach(mnode, server, force)
+    if batch and servers:
+        results = _run_peer_commands(
+            mnode, servers,
+            "gluster peer detach %s force" if force else
+            "gluster peer detach %s")
+    else:
+        results = OrderedDict((server, peer_detach(mnode, server, force)[:2])
+                              for server in servers)
+    for server, (ret, out) in results.items():
         if (ret != 0 or
                 re.search(r'^peer\sdetach\:\ssuccess(.*)', out) is None):
             g.log.error("Failed to peer detach the node '%s'.", server)
@@ -212,14 +297,15 @@ def peer_detach_servers(mnode, servers, force=False, validate=True,
 
     # Validating whether peer detach is successful
     if validate:
-        time.sleep(time_delay)
-        nodes_in_pool = nodes_from_pool_list(mnode)
-        rc = True
-        for server in servers:
-            if server in nodes_in_pool:
-                g.log.error("Peer '%s' still in pool" % server)
-                rc = False
-        if not rc:
+        ret, states = wait_for(
+            lambda: _get_pool_states(mnode, servers),
+            condition=lambda states: states is not None and all(
+                state == 'Missing' for state in states.values()),
+            timeout=time_delay)
+        if not ret:
+            for server, state in (states or {}).items():
+                if state != 'Missing':
+                    g.log.error("Peer '%s' still in pool" % server)
             g.log.error("Validation after peer detach failed.")
         else:
             g.log.info("Validation after peer detach is successful")
@@ -248,6 +334,7 @@ def nodes_from_pool_list(mnode):
     return nodes
 
 
+@cached_query
 def get_peer_status(mnode):
     """Parse the output of command 'gluster peer status'.
 
@@ -281,6 +368,13 @@ def get_peer_status(mnode):
                     "Hence failed to parse the peer status.", mnode)
         return None
 
+    return _parse_peer_status_xml(out)
+
+
+def _parse_peer_status_xml(out):
+    """Parses the output of 'gluster peer status --xml' as described in
+    get_peer_status.
+    """
     try:
         root = etree.XML(out)
     except etree.ParseError:
@@ -301,6 +395,7 @@ def get_peer_status(mnode):
     return peer_status_list
 
 
+@cached_query
 def get_pool_list(mnode):
     """Parse the output of 'gluster pool list' command.
 
@@ -421,3 +516,137 @@ def is_peer_connected(mnode, servers):
     g.log.info("Servers: '%s' are all 'Peer in Cluster' and 'Connected' "
                "state.", servers)
     return True
+
+
+def _get_host_ip(host, ips_cache):
+    """Resolves the host, None if it cannot be resolved"""
+    if host not in ips_cache:
+        try:
+            ips_cache[host] = socket.gethostbyname(host)
+        except socket.error:
+            ips_cache[host] = None
+    return ips_cache[host]
+
+
+def _match_peer_server(peer_stat, servers, ips_cache):
+    """Returns the server of the peer, matched by name or by address, None
+    if the peer is not one of the servers.
+    """
+    names = [peer_stat.get('hostname')]
+    names.extend(peer_stat.get('hostnames') or [])
+    names = [name for name in names if name]
+    peer = next((name for name in names if name in servers), None)
+    if peer is None:
+        peer_ips = set(_get_host_ip(name, ips_cache) for name in names)
+        peer_ips.discard(None)
+        peer = next((server for server in servers
+                     if _get_host_ip(server, ips_cache) in peer_ips), None)
+    return peer
+
+
+def _get_peer_state(peer_stat):
+    """Returns the state of the peer as described in get_peer_matrix"""
+    if (re.match(r'([0-9a-f]{8})(?:-[0-9a-f]{4}){3}-[0-9a-f]{12}',
+                 peer_stat.get('uuid') or '', re.I) is None):
+        return 'Invalid UUID'
+    if peer_stat.get('stateStr') != "Peer in Cluster":
+        return peer_stat.get('stateStr')
+    if peer_stat.get('connected') != '1':
+        return 'Disconnected'
+    return 'Connected'
+
+
+def get_peer_matrix(servers):
+    """Gets the state of each server as seen from every other server. The
+    'gluster peer status' command is run on all the servers in parallel.
+
+    Args:
+        servers (list): List of servers of the pool.
+
+    Returns:
+        OrderedDict: key - server on which peer status was run.
+            value - OrderedDict of server -> state, the state being one of:
+                'self' : the server itself.
+                'Connected' : 'Peer in Cluster' and connected.
+                'Disconnected' : 'Peer in Cluster' but not connected.
+                'Invalid UUID' : the peer has no valid uuid.
+                'Missing' : the server is not a peer of the node.
+                other : the stateStr of the peer (e.g 'Accepted peer
+                    request').
+            The value is None when the peer status of the node could not
+            be read.
+
+    Example:
+        get_peer_matrix(g.config['servers'])
+    """
+    if isinstance(servers, str):
+        servers = [servers]
+
+    results = g.run_parallel(servers, "gluster peer status --xml")
+    ips_cache = {}
+    matrix = OrderedDict()
+    for server in servers:
+        ret, out, _ = results.get(server, (1, '', ''))
+        peer_status_list = None
+        if ret == 0:
+            peer_status_list = _parse_peer_status_xml(out)
+        if peer_status_list is None:
+            g.log.error("Failed to get the peer status from node '%s'",
+                        server)
+            matrix[server] = None
+            continue
+
+        row = OrderedDict((peer, 'Missing') for peer in servers)
+        row[server] = 'self'
+        for peer_stat in peer_status_list:
+            peer = _match_peer_server(peer_stat, servers, ips_cache)
+            if peer is not None and peer != server:
+                row[peer] = _get_peer_state(peer_stat)
+        matrix[server] = row
+    return matrix
+
+
+def is_peer_matrix_connected(matrix):
+    """Checks whether every server of the peer matrix sees all the other
+    servers in 'Peer in Cluster' and connected state.
+
+    Args:
+        matrix (OrderedDict): peer matrix as returned by get_peer_matrix.
+
+    Returns:
+        bool: True if all the servers are connected to each other, False
+            otherwise.
+    """
+    return all(row is not None and
+               all(state in ('self', 'Connected') for state in row.values())
+               for row in matrix.values())
+
+
+def format_peer_matrix(matrix):
+    """Formats the peer matrix as a compact table, one row per node on which
+    peer status was run and one column per server seen from it.
+
+    Args:
+        matrix (OrderedDict): peer matrix as returned by get_peer_matrix.
+
+    Returns:
+        str: the table, followed by the legend of the states.
+    """
+    codes = {'self': '-', 'Connected': 'C', 'Disconnected': 'D',
+             'Missing': 'M', 'Invalid UUID': 'U'}
+    servers = list(matrix)
+    width = max(len(str(len(servers))), 1) + 1
+    header = "".join(str(index).rjust(width)
+                     for index in range(len(servers)))
+    lines = ["%s %s" % (" " * (width + 1), header)]
+    for index, (server, row) in enumerate(matrix.items()):
+        if row is None:
+            cells = "  peer status failed"
+        else:
+            cells = "".join(codes.get(state, '?').rjust(width)
+                            for state in row.values())
+        lines.append("[%s] %s  %s" % (str(index).rjust(width - 1), cells,
+                                      server))
+    lines.append("-: self, C: connected, D: disconnected, M: missing, "
+                 "U: invalid uuid, ?: other peer state")
+    return "\n".join(lines)
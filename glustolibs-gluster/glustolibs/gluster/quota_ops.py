@@ -20,6 +20,7 @@
 """
 
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import invalidates_cache
 from glustolibs.gluster.exceptions import ExecutionError, ExecutionParseError
 
 try:
@@ -28,6 +29,7 @@ except ImportError:
     import xml.etree.ElementTree as etree
 
 
+@invalidates_cache
 def enable_quota(mnode, volname):
     """Enables quota on given volume
 
@@ -54,6 +56,7 @@ def enable_quota(mnode, volname):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def disable_quota(mnode, volname):
     """Disables quota on given volume
 
@@ -142,6 +145,7 @@ def quota_list(mnode, volname, path=None):
     return ret
 
 
+@invalidates_cache
 def set_quota_limit_usage(mnode, volname, path='/', limit='100GB',
                           soft_limit=''):
     """Sets limit-usage on the path of the specified volume to
@@ -312,6 +316,7 @@ def is_soft_limit_exceeded(mnode, volname, path=None):
             return False
 
 
+@invalidates_cache
 def set_quota_limit_objects(mnode, volname, path='/', limit='10',
                             soft_limit=''):
     """Sets limit-objects on the path of the specified volume to
@@ -430,6 +435,7 @@ def get_quota_list_objects(mnode, volname, path=None):
     return quotalist
 
 
+@invalidates_cache
 def set_quota_alert_time(mnode, volname, time):
     """Sets quota alert time
 
@@ -459,6 +465,7 @@ def set_quota_alert_time(mnode, volname, time):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def set_quota_soft_timeout(mnode, volname, timeout):
     """Sets quota soft timeout
 
@@ -488,6 +495,7 @@ def set_quota_soft_timeout(mnode, volname, timeout):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def set_quota_hard_timeout(mnode, volname, timeout):
     """Sets quota hard timeout
 
@@ -517,6 +525,7 @@ def set_quota_hard_timeout(mnode, volname, timeout):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def set_quota_default_soft_limit(mnode, volname, timeout):
     """Sets quota default soft limit
 
@@ -547,6 +556,7 @@ def set_quota_default_soft_limit(mnode, volname, timeout):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def remove_quota(mnode, volname, path):
     """Removes quota for the given path
 
@@ -576,6 +586,7 @@ def remove_quota(mnode, volname, path):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def remove_quota_objects(mnode, volname, path):
     """Removes quota objects for the given path
 
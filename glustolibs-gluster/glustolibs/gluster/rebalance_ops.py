@@ -20,7 +20,8 @@
 """
 
 from glusto.core import Glusto as g
-import time
+from glustolibs.gluster.cli_cache import invalidates_cache
+from glustolibs.gluster.waiter import wait_for
 
 try:
     import xml.etree.cElementTree as etree
@@ -28,6 +29,7 @@ except ImportError:
     import xml.etree.ElementTree as etree
 
 
+@invalidates_cache
 def rebalance_start(mnode, volname, fix_layout=False, force=False):
     """Starts rebalance on the given volume.
 
@@ -76,6 +78,7 @@ def rebalance_start(mnode, volname, fix_layout=False, force=False):
     return ret
 
 
+@invalidates_cache
 def rebalance_stop(mnode, volname):
     """Stops rebalance on the given volume.
 
@@ -197,6 +200,7 @@ def get_rebalance_status(mnode, volname):
     return rebal_status
 
 
+@invalidates_cache
 def rebalance_stop_and_get_status(mnode, volname):
     """Parse the output of 'gluster vol rebalance stop' command
        for the given volume
@@ -263,6 +267,16 @@ def rebalance_stop_and_get_status(mnode, volname):
     return rebal_status
 
 
+def _is_rebalance_status_failed(status_info):
+    """Early exit predicate for the rebalance waiters. Returns True if the
+    status could not be fetched or the rebalance has failed or is stopped,
+    as waiting any longer would not change the result.
+    """
+    if status_info is None:
+        return True
+    return status_info['aggregate']['statusStr'] in ('failed', 'stopped')
+
+
 def wait_for_fix_layout_to_complete(mnode, volname, timeout=300):
     """Waits for the fix-layout to complete
 
@@ -281,22 +295,15 @@ def wait_for_fix_layout_to_complete(mnode, volname, timeout=300):
         >>> wait_for_fix_layout_to_complete("abc.com", "testvol")
     """
 
-    count = 0
-    flag = 0
-    while (count < timeout):
-        status_info = get_rebalance_status(mnode, volname)
-        if status_info is None:
-            return False
-
-        status = status_info['aggregate']['statusStr']
-        if status == 'fix-layout completed':
-            flag = 1
-            break
-
-        time.sleep(10)
-        count = count + 10
-    if not flag:
-        g.log.error("Fix-layout is not completed")
+    ret, status_info = wait_for(
+        lambda: get_rebalance_status(mnode, volname),
+        condition=(lambda status_info: (status_info['aggregate']['statusStr']
+                                        == 'fix-layout completed')),
+        timeout=timeout, abort=_is_rebalance_status_failed)
+    if not ret:
+        if status_info is not None:
+            g.log.error("Fix-layout is not completed. Status: %s",
+                        status_info['aggregate']['statusStr'])
         return False
     else:
         g.log.info("Fix-layout is successfully completed")
@@ -321,22 +328,15 @@ def wait_for_rebalance_to_complete(mnode, volname, timeout=300):
         >>> wait_for_rebalance_to_complete("abc.com", "testvol")
     """
 
-    count = 0
-    flag = 0
-    while (count < timeout):
-        status_info = get_rebalance_status(mnode, volname)
-        if status_info is None:
-            return False
-
-        status = status_info['aggregate']['statusStr']
-        if status == 'completed':
-            flag = 1
-            break
-
-        time.sleep(10)
-        count = count + 10
-    if not flag:
-        g.log.error("rebalance is not completed")
+    ret, status_info = wait_for(
+        lambda: get_rebalance_status(mnode, volname),
+        condition=(lambda status_info: (status_info['aggregate']['statusStr']
+                                        == 'completed')),
+        timeout=timeout, abort=_is_rebalance_status_failed)
+    if not ret:
+        if status_info is not None:
+            g.log.error("rebalance is not completed. Status: %s",
+                        status_info['aggregate']['statusStr'])
         return False
     else:
         g.log.info("rebalance is successfully completed")
@@ -0,0 +1,418 @@
+#  Copyright (C) 2018 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Module to record the remote executions done through
+        g.run, g.run_async and g.run_parallel as fixtures
+        (host, command -> rc, stdout, stderr) during a real run, and to
+        replay them later without any network access, so that the parsing
+        helpers can be exercised and benchmarked offline.
+
+        Replay is one of the local backends which can serve the remote
+        executions (see start_backend), the gluster cli simulator of
+        glustolibs.gluster.gluster_simulator being another one.
+
+        Recording:
+            start_recording('/var/tmp/fixtures/cluster.json')
+            ... run the tests / helpers against the cluster ...
+            stop_recording()
+
+        Replay:
+            start_replay('/var/tmp/fixtures/cluster.json')
+            get_volume_status('server1.example.com', 'testvol')
+            stop_replay()
+
+        Recording and the backends are layers of run_hooks, below the
+        statistics of run_stats which therefore also count the calls served
+        by a backend.
+
+        Recording can also be enabled for the tests from the glusto config,
+        one fixture file being written per test class:
+
+            run_fixtures:
+                mode: record
+                dir: /var/tmp/fixtures
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from glusto.core import Glusto as g
+from glustolibs.gluster.run_hooks import (RUN_LAYER_RECORD,
+                                          RUN_LAYER_BACKEND, add_run_layer,
+                                          remove_run_layer, is_nested_run)
+try:
+    from cStringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+FIXTURES_VERSION = 1
+
+_state = {'mode': None, 'fixture_file': None, 'calls': None,
+          'backend': None}
+_lock = threading.Lock()
+_LAYER_NAME = 'run_fixtures'
+
+
+def get_fixtures_mode():
+    """Returns 'record', 'replay' or None"""
+    return _state['mode']
+
+
+def load_fixtures(fixture_file):
+    """Loads the calls recorded in a fixture file.
+
+    Args:
+        fixture_file (str): path of the fixture file.
+
+    Returns:
+        list: list of dicts with host, cmd, rc, out and err keys.
+    """
+    with open(fixture_file) as fd:
+        fixtures = json.load(fd)
+    if fixtures.get('version') != FIXTURES_VERSION:
+        g.log.warning("Fixture file %s has version %s, expected %s",
+                      fixture_file, fixtures.get('version'),
+                      FIXTURES_VERSION)
+    return fixtures.get('calls', [])
+
+
+def save_fixtures(fixture_file, calls):
+    """Writes the calls to a fixture file.
+
+    Args:
+        fixture_file (str): path of the fixture file.
+        calls (list): list of dicts with host, cmd, rc, out and err keys.
+    """
+    fixture_dir = os.path.dirname(fixture_file)
+    if fixture_dir and not os.path.isdir(fixture_dir):
+        os.makedirs(fixture_dir)
+    with open(fixture_file, 'w') as fd:
+        json.dump({'version': FIXTURES_VERSION, 'calls': calls}, fd,
+                  indent=1)
+
+
+# Recording
+
+def _record_call(host, cmd, ret):
+    """Saves the result of a remote execution"""
+    with _lock:
+        if _state['calls'] is not None:
+            _state['calls'].append({'host': host, 'cmd': cmd,
+                                    'rc': ret[0], 'out': ret[1],
+                                    'err': ret[2]})
+
+
+class _TeeReader(object):
+    """File like object keeping a copy of everything read from the stream
+    it wraps. Used to record the output of the g.run_async processes whose
+    stdout is consumed directly by the caller.
+    """
+    def __init__(self, stream):
+        self._stream = stream
+        self._chunks = []
+        self.recording = True
+
+    def read(self, *args):
+        data = self._stream.read(*args)
+        if self.recording:
+            self._chunks.append(data)
+        return data
+
+    def readline(self, *args):
+        data = self._stream.readline(*args)
+        if self.recording:
+            self._chunks.append(data)
+        return data
+
+    def __iter__(self):
+        return iter(self.readline, '')
+
+    def getvalue(self):
+        return ''.join(self._chunks)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _recording_run(call_next, host, command, *args, **kwargs):
+    ret = call_next(host, command, *args, **kwargs)
+    _record_call(host, command, ret)
+    return ret
+
+
+def _recording_run_parallel(call_next, hosts, command, *args, **kwargs):
+    results = call_next(hosts, command, *args, **kwargs)
+    for host, ret in results.items():
+        _record_call(host, command, ret)
+    return results
+
+
+def _recording_run_async(call_next, host, command, *args, **kwargs):
+    proc = call_next(host, command, *args, **kwargs)
+    communicate = getattr(proc, 'async_communicate', None)
+    if communicate is None:
+        return proc
+
+    tee = None
+    if getattr(proc, 'stdout', None) is not None:
+        tee = _TeeReader(proc.stdout)
+        proc.stdout = tee
+
+    def async_communicate(*c_args, **c_kwargs):
+        # The remaining output is part of the returned stdout
+        if tee is not None:
+            tee.recording = False
+        ret = communicate(*c_args, **c_kwargs)
+        if is_nested_run():
+            return ret
+        out = ret[1]
+        if tee is not None:
+            out = tee.getvalue() + (out or '')
+        _record_call(host, command, (ret[0], out, ret[2]))
+        return ret
+
+    proc.async_communicate = async_communicate
+    return proc
+
+
+def start_recording(fixture_file):
+    """Starts recording all the remote executions.
+
+    Args:
+        fixture_file (str): path of the fixture file written by
+            stop_recording.
+
+    Returns:
+        bool: True on success, False if recording or replay is in progress.
+    """
+    if _state['mode'] is not None:
+        g.log.error("Unable to start recording: %s is in progress",
+                    _state['mode'])
+        return False
+    _state.update({'mode': 'record', 'fixture_file': fixture_file,
+                   'calls': []})
+    add_run_layer(_LAYER_NAME, RUN_LAYER_RECORD,
+                  {'run': _recording_run,
+                   'run_async': _recording_run_async,
+                   'run_parallel': _recording_run_parallel})
+    return True
+
+
+def stop_recording():
+    """Stops recording and writes the recorded calls to the fixture file.
+
+    Returns:
+        int: number of calls recorded, None on failure.
+    """
+    if _state['mode'] != 'record':
+        g.log.error("Recording is not in progress")
+        return None
+    remove_run_layer(_LAYER_NAME)
+    with _lock:
+        calls = _state['calls']
+        _state.update({'mode': None, 'calls': None})
+    try:
+        save_fixtures(_state['fixture_file'], calls)
+    except (IOError, OSError) as err:
+        g.log.error("Failed to write the fixture file %s: %s",
+                    _state['fixture_file'], err)
+        return None
+    g.log.info("Recorded %d calls to %s", len(calls), _state['fixture_file'])
+    return len(calls)
+
+
+# Replay
+
+class ReplayProcess(object):
+    """Stand-in for the process returned by g.run_async during replay or
+    when a local backend is used.
+    """
+    def __init__(self, ret):
+        self.returncode = ret[0]
+        self.stdout = StringIO(ret[1] or '')
+        self.stderr = StringIO(ret[2] or '')
+
+    def async_communicate(self):
+        return (self.returncode, self.stdout.read(), self.stderr.read())
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self):
+        return self.returncode
+
+
+def _build_replay_index(calls):
+    """Indexes the fixtures by (host, cmd) and by cmd. The responses of a
+    command recorded several times are served in the recorded order.
+    """
+    index = {}
+    for call in calls:
+        ret = (call['rc'], call['out'], call['err'])
+        index.setdefault((call['host'], call['cmd']), deque()).append(ret)
+        index.setdefault((None, call['cmd']), deque()).append(ret)
+    return index
+
+
+def _backend_run(call_next, host, command, *args, **kwargs):
+    return _state['backend'].execute(host, command)
+
+
+def _backend_run_parallel(call_next, hosts, command, *args, **kwargs):
+    backend = _state['backend']
+    if hasattr(backend, 'execute_parallel'):
+        return backend.execute_parallel(hosts, command)
+    return dict((host, backend.execute(host, command)) for host in hosts)
+
+
+def _backend_run_async(call_next, host, command, *args, **kwargs):
+    return ReplayProcess(_state['backend'].execute(host, command))
+
+
+def start_backend(backend, mode='backend'):
+    """Starts serving all the remote executions from a local backend
+    instead of the nodes. No command is executed on any node until
+    stop_backend is called.
+
+    Args:
+        backend (object): object providing execute(host, cmd) returning
+            the (rc, out, err) tuple of the command. If it also provides
+            execute_parallel(hosts, cmd) returning {host: (rc, out, err)},
+            it is used to serve g.run_parallel.
+
+    Kwargs:
+        mode (str): name of the mode reported by get_fixtures_mode.
+
+    Returns:
+        bool: True on success, False if another mode is in progress.
+    """
+    if _state['mode'] is not None:
+        g.log.error("Unable to start %s: %s is in progress", mode,
+                    _state['mode'])
+        return False
+    _state.update({'mode': mode, 'backend': backend})
+    add_run_layer(_LAYER_NAME, RUN_LAYER_BACKEND,
+                  {'run': _backend_run,
+                   'run_async': _backend_run_async,
+                   'run_parallel': _backend_run_parallel})
+    return True
+
+
+def stop_backend():
+    """Stops serving the remote executions from the local backend"""
+    if _state['backend'] is None:
+        g.log.error("No backend is in use")
+        return False
+    remove_run_layer(_LAYER_NAME)
+    _state.update({'mode': None, 'backend': None})
+    return True
+
+
+class _FixtureBackend(object):
+    """Backend serving the recorded fixtures"""
+    def __init__(self, calls, strict=False):
+        self._index = _build_replay_index(calls)
+        self._strict = strict
+
+    def execute(self, host, cmd):
+        """Returns the recorded (rc, out, err) for the host and command.
+        The last response of a command is served again once all the
+        recorded ones were served. Commands recorded on another host are
+        served when the host does not match, unless strict replay is
+        requested.
+        """
+        with _lock:
+            responses = self._index.get((host, cmd))
+            if not responses and not self._strict:
+                responses = self._index.get((None, cmd))
+            if not responses:
+                g.log.error("No fixture recorded for '%s' on %s", cmd, host)
+                return (1, '', "No fixture recorded for '%s' on %s"
+                        % (cmd, host))
+            if len(responses) > 1:
+                return responses.popleft()
+            return responses[0]
+
+
+def start_replay(fixture_file, strict=False):
+    """Starts serving the remote executions from a fixture file. No command
+    is executed on any node until stop_replay is called.
+
+    Args:
+        fixture_file (str): path of the fixture file.
+
+    Kwargs:
+        strict (bool): If True, a command is served only from the fixtures
+            recorded on the same host.
+
+    Returns:
+        bool: True on success, False otherwise.
+    """
+    if _state['mode'] is not None:
+        g.log.error("Unable to start replay: %s is in progress",
+                    _state['mode'])
+        return False
+    try:
+        calls = load_fixtures(fixture_file)
+    except (IOError, OSError, ValueError) as err:
+        g.log.error("Failed to load the fixture file %s: %s",
+                    fixture_file, err)
+        return False
+    _state['fixture_file'] = fixture_file
+    return start_backend(_FixtureBackend(calls, strict), mode='replay')
+
+
+def stop_replay():
+    """Stops the replay and restores the remote executions"""
+    if _state['mode'] != 'replay':
+        g.log.error("Replay is not in progress")
+        return False
+    return stop_backend()
+
+
+def start_fixtures_from_config(name):
+    """Starts recording or replay as configured in the 'run_fixtures'
+    section of the glusto config, using '<dir>/<name>.json' as fixture file.
+
+    Args:
+        name (str): name of the fixture, usually the test class name.
+
+    Returns:
+        bool: True if recording or replay was started, False otherwise.
+    """
+    fixtures_config = g.config.get('run_fixtures') if g.config else None
+    if not isinstance(fixtures_config, dict):
+        return False
+    mode = fixtures_config.get('mode')
+    fixture_file = os.path.join(fixtures_config.get('dir', '.'),
+                                "%s.json" % name)
+    if mode == 'record':
+        return start_recording(fixture_file)
+    if mode == 'replay':
+        return start_replay(fixture_file,
+                            strict=fixtures_config.get('strict', False))
+    return False
+
+
+def stop_fixtures():
+    """Stops recording or replay, whichever is in progress"""
+    if _state['mode'] == 'record':
+        return stop_recording() is not None
+    if _state['mode'] == 'replay':
+        return stop_replay()
+    return False
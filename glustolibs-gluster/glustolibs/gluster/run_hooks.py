@@ -0,0 +1,160 @@
+#  Copyright (C) 2018 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Module owning the replacement of g.run, g.run_async and
+        g.run_parallel. The modules hooking the remote executions
+        (run_stats, run_fixtures) register layers here instead of patching
+        g themselves.
+
+        The layers are applied by increasing order, whatever the order in
+        which they are added or removed:
+
+            RUN_LAYER_STATS (run_stats): outermost, sees every call,
+                including the ones served by a backend (replay, simulator).
+            RUN_LAYER_RECORD (run_fixtures recording)
+            RUN_LAYER_BACKEND (run_fixtures replay and local backends):
+                innermost, serves the call instead of glusto.
+
+        A layer wrapper is called as wrapper(call_next, *args, **kwargs),
+        call_next calling the next layer (or glusto). g.run* are patched
+        while at least one layer is registered.
+
+        The g.run* calls done by glusto itself while serving a call
+        (run_parallel is built upon run_async) go straight to glusto and
+        are not seen by the layers again.
+"""
+
+import functools
+import threading
+from glusto.core import Glusto as g
+
+RUN_LAYER_STATS = 10
+RUN_LAYER_RECORD = 20
+RUN_LAYER_BACKEND = 30
+
+RUN_METHODS = ('run', 'run_async', 'run_parallel')
+
+# name -> (order, {method name: wrapper})
+_layers = {}
+_originals = {}
+_lock = threading.RLock()
+_nested = threading.local()
+
+
+def is_nested_run():
+    """Returns True while glusto is serving a g.run* call in this thread"""
+    return getattr(_nested, 'active', False)
+
+
+def _call_original(name, *args, **kwargs):
+    """Calls the original g.<name>, flagging the calls it does as nested"""
+    if is_nested_run():
+        return _originals[name][0](*args, **kwargs)
+    _nested.active = True
+    try:
+        return _originals[name][0](*args, **kwargs)
+    finally:
+        _nested.active = False
+
+
+def _get_chain(name):
+    """Returns the wrappers of the method, outermost first"""
+    with _lock:
+        layers = sorted(_layers.values(), key=lambda layer: layer[0])
+    return [wrappers[name] for _, wrappers in layers if name in wrappers]
+
+
+def _dispatch(name, *args, **kwargs):
+    if is_nested_run():
+        return _call_original(name, *args, **kwargs)
+    chain = _get_chain(name)
+
+    def call(index, *c_args, **c_kwargs):
+        if index == len(chain):
+            return _call_original(name, *c_args, **c_kwargs)
+        return chain[index](functools.partial(call, index + 1),
+                            *c_args, **c_kwargs)
+
+    return call(0, *args, **kwargs)
+
+
+def _patch_run_methods():
+    """Replaces g.run, g.run_async and g.run_parallel by the dispatchers
+    and saves the originals.
+    """
+    for name in RUN_METHODS:
+        _originals[name] = (getattr(g, name), vars(g).get(name))
+        dispatcher = functools.partial(_dispatch, name)
+        if isinstance(g, type):
+            dispatcher = staticmethod(dispatcher)
+        setattr(g, name, dispatcher)
+
+
+def _restore_run_methods():
+    """Restores the original g.run, g.run_async and g.run_parallel"""
+    for name in list(_originals):
+        _, original = _originals.pop(name)
+        if original is None:
+            delattr(g, name)
+        else:
+            setattr(g, name, original)
+
+
+def add_run_layer(name, order, wrappers):
+    """Registers a layer wrapping the remote executions.
+
+    Args:
+        name (str): name of the layer.
+        order (int): position of the layer, lower is outer. One of the
+            RUN_LAYER_* constants.
+        wrappers (dict): method name ('run', 'run_async' or
+            'run_parallel') -> wrapper(call_next, *args, **kwargs). The
+            methods without wrapper go through the layer untouched.
+
+    Returns:
+        bool: True on success, False if the layer is already registered.
+    """
+    with _lock:
+        if name in _layers:
+            return False
+        if not _layers:
+            _patch_run_methods()
+        _layers[name] = (order, dict(wrappers))
+        return True
+
+
+def remove_run_layer(name):
+    """Unregisters a layer, restoring g.run* once no layer is left.
+
+    Args:
+        name (str): name of the layer.
+
+    Returns:
+        bool: True on success, False if the layer is not registered.
+    """
+    with _lock:
+        if _layers.pop(name, None) is None:
+            return False
+        if not _layers:
+            _restore_run_methods()
+        return True
+
+
+def has_run_layer(name):
+    """Returns True if the layer is registered"""
+    with _lock:
+        return name in _layers
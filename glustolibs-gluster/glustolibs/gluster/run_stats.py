@@ -0,0 +1,269 @@
+#  Copyright (C) 2018 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Module instrumenting the remote executions done through
+        g.run, g.run_async and g.run_parallel. For each call the glustolibs
+        caller, host, command class, latency and output size are recorded,
+        and an aggregated report can be emitted as json.
+
+        The instrumentation is installed by GlusterBaseClass.setUpClass and
+        the report is emitted by GlusterBaseClass.tearDownClass. It can be
+        disabled or configured from the glusto config:
+
+            run_stats:
+                enabled: True
+                report_dir: /var/tmp/glusto_run_stats
+
+        The instrumentation is the outermost layer of run_hooks, hence the
+        calls served by a local backend (fixtures replay, simulator) are
+        recorded like the remote ones.
+"""
+
+import json
+import math
+import os
+import sys
+import threading
+from glusto.core import Glusto as g
+from glustolibs.gluster import run_hooks
+from glustolibs.gluster.run_hooks import (RUN_LAYER_STATS, add_run_layer,
+                                          remove_run_layer, is_nested_run)
+try:
+    from time import monotonic as _now
+except ImportError:
+    from time import time as _now
+
+_records = []
+_lock = threading.Lock()
+_LAYER_NAME = 'run_stats'
+
+
+def _get_stats_config():
+    """Returns the 'run_stats' section of the glusto config"""
+    stats_config = g.config.get('run_stats') if g.config else None
+    return stats_config if isinstance(stats_config, dict) else {}
+
+
+def is_run_stats_enabled():
+    """Returns True unless the instrumentation is disabled in the config"""
+    return bool(_get_stats_config().get('enabled', True))
+
+
+def get_command_class(cmd):
+    """Returns the class of a command used to aggregate the statistics.
+
+    For gluster commands the class is made of the first two words
+    following 'gluster' (for example 'gluster volume status'), for the
+    other commands it is the basename of the executable.
+
+    Args:
+        cmd (str): command executed on the remote node.
+
+    Returns:
+        str: class of the command.
+
+    Example:
+        get_command_class("gluster --xml volume heal testvol info")
+        >>>'gluster volume heal'
+    """
+    words = [word for word in cmd.split()
+             if '=' not in word or word.startswith('-')]
+    while words and words[0] in ('sudo', 'env', 'time', 'nohup'):
+        words.pop(0)
+    if not words:
+        return ''
+    if words[0] != 'gluster':
+        return os.path.basename(words[0])
+    args = [word for word in words[1:] if not word.startswith('-')]
+    return ' '.join(['gluster'] + args[:2])
+
+
+def _get_caller():
+    """Returns the innermost glustolibs function (outside of this module and
+    of run_hooks) in the call stack in 'module.function' format. If there is
+    none, the direct caller of g.run* is returned.
+    """
+    frame = sys._getframe(2)
+    first = None
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module not in (__name__, run_hooks.__name__):
+            caller = "%s.%s" % (module, frame.f_code.co_name)
+            if first is None:
+                first = caller
+            if module.startswith('glustolibs.'):
+                return caller
+        frame = frame.f_back
+    return first or ''
+
+
+def _record(caller, host, cmd, latency, out, err):
+    """Adds a record for a remote execution"""
+    size = len(out or '') + len(err or '')
+    with _lock:
+        _records.append((caller, host, get_command_class(cmd),
+                         latency, size))
+
+
+def _instrumented_run(call_next, host, command, *args, **kwargs):
+    caller = _get_caller()
+    start = _now()
+    ret = call_next(host, command, *args, **kwargs)
+    _record(caller, host, command, _now() - start, ret[1], ret[2])
+    return ret
+
+
+def _instrumented_run_parallel(call_next, hosts, command, *args, **kwargs):
+    caller = _get_caller()
+    start = _now()
+    results = call_next(hosts, command, *args, **kwargs)
+    latency = _now() - start
+    for host, ret in results.items():
+        _record(caller, host, command, latency, ret[1], ret[2])
+    return results
+
+
+def _instrumented_run_async(call_next, host, command, *args, **kwargs):
+    caller = _get_caller()
+    start = _now()
+    proc = call_next(host, command, *args, **kwargs)
+    communicate = getattr(proc, 'async_communicate', None)
+    if communicate is None:
+        _record(caller, host, command, _now() - start, '', '')
+        return proc
+
+    def async_communicate(*c_args, **c_kwargs):
+        ret = communicate(*c_args, **c_kwargs)
+        if not is_nested_run():
+            _record(caller, host, command, _now() - start, ret[1], ret[2])
+        return ret
+
+    proc.async_communicate = async_communicate
+    return proc
+
+
+def install_run_instrumentation():
+    """Wraps g.run, g.run_async and g.run_parallel to record the statistics
+    of every remote execution. Calling it again is a no-op.
+    """
+    add_run_layer(_LAYER_NAME, RUN_LAYER_STATS,
+                  {'run': _instrumented_run,
+                   'run_async': _instrumented_run_async,
+                   'run_parallel': _instrumented_run_parallel})
+
+
+def uninstall_run_instrumentation():
+    """Restores the original g.run, g.run_async and g.run_parallel"""
+    remove_run_layer(_LAYER_NAME)
+
+
+def reset_run_stats():
+    """Drops all the recorded statistics"""
+    with _lock:
+        del _records[:]
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    index = int(math.ceil(percent / 100.0 * len(sorted_values))) - 1
+    return sorted_values[max(0, min(index, len(sorted_values) - 1))]
+
+
+def _summarize(latencies, sizes):
+    """Returns the aggregated statistics of a group of records"""
+    latencies = sorted(latencies)
+    return {
+        'count': len(latencies),
+        'total': round(sum(latencies), 6),
+        'p50': round(_percentile(latencies, 50), 6),
+        'p95': round(_percentile(latencies, 95), 6),
+        'max': round(latencies[-1], 6),
+        'output_bytes': sum(sizes)
+        }
+
+
+def get_run_stats_report():
+    """Aggregates the recorded statistics.
+
+    Returns:
+        dict: report with the overall statistics under 'total' and the
+            statistics grouped by 'caller', 'command' and 'host'. Each
+            group contains count, total, p50, p95, max (latencies in
+            seconds) and output_bytes.
+
+    Example:
+        get_run_stats_report()
+        >>>{'total': {'count': 2, 'total': 0.9, 'p50': 0.4, 'p95': 0.5,
+        'max': 0.5, 'output_bytes': 2048}, 'caller': {
+        'glustolibs.gluster.volume_ops.get_volume_info': {...}},
+        'command': {'gluster volume info': {...}}, 'host': {...}}
+    """
+    with _lock:
+        records = list(_records)
+
+    report = {'total': None, 'caller': {}, 'command': {}, 'host': {}}
+    if not records:
+        return report
+
+    groups = {'caller': {}, 'command': {}, 'host': {}}
+    for caller, host, command, latency, size in records:
+        for key, value in (('caller', caller), ('command', command),
+                           ('host', host)):
+            latencies, sizes = groups[key].setdefault(value, ([], []))
+            latencies.append(latency)
+            sizes.append(size)
+
+    report['total'] = _summarize([record[3] for record in records],
+                                 [record[4] for record in records])
+    for key, group in groups.items():
+        for value, (latencies, sizes) in group.items():
+            report[key][value] = _summarize(latencies, sizes)
+    return report
+
+
+def emit_run_stats_report(name, reset=True):
+    """Logs the aggregated statistics as json and writes them to
+    '<report_dir>/<name>.json' if report_dir is set in the config.
+
+    Args:
+        name (str): name of the report, usually the test class name.
+
+    Kwargs:
+        reset (bool): drop the recorded statistics once emitted.
+
+    Returns:
+        dict: the report as returned by get_run_stats_report.
+    """
+    report = get_run_stats_report()
+    report['name'] = name
+    report_json = json.dumps(report, indent=2, sort_keys=True)
+    g.log.info("Remote execution statistics of %s:\n%s", name, report_json)
+
+    report_dir = _get_stats_config().get('report_dir')
+    if report_dir:
+        try:
+            if not os.path.isdir(report_dir):
+                os.makedirs(report_dir)
+            with open(os.path.join(report_dir, "%s.json" % name), 'w') as fd:
+                fd.write(report_json)
+        except (IOError, OSError) as err:
+            g.log.error("Failed to write the remote execution statistics "
+                        "of %s to %s: %s", name, report_dir, err)
+
+    if reset:
+        reset_run_stats()
+    return report
@@ -19,6 +19,7 @@
 """
 
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import invalidates_cache
 from glustolibs.gluster.volume_libs import is_volume_exported
 from glustolibs.gluster.mount_ops import GlusterMount
 
@@ -219,6 +220,7 @@ def enable_mounting_volume_over_smb(mnode, volname, smb_users_info):
     return True
 
 
+@invalidates_cache
 def share_volume_over_smb(mnode, volname, smb_users_info):
     """Sharing volumes over SMB
 
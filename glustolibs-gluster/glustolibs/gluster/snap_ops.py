@@ -20,6 +20,7 @@
 """
 
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import invalidates_cache
 from glustolibs.gluster.volume_ops import volume_start, volume_stop
 
 try:
@@ -28,6 +29,7 @@ except ImportError:
     import xml.etree.ElementTree as etree
 
 
+@invalidates_cache
 def snap_create(mnode, volname, snapname, timestamp=False,
                 description='', force=False):
     """Creates snapshot for the given volume.
@@ -78,6 +80,7 @@ def snap_create(mnode, volname, snapname, timestamp=False,
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def snap_clone(mnode, snapname, clonename):
     """Clones the given snapshot
 
@@ -105,6 +108,7 @@ def snap_clone(mnode, snapname, clonename):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def snap_restore(mnode, snapname):
     """Executes snap restore cli for the given snapshot
 
@@ -719,6 +723,7 @@ def get_snap_config(mnode, volname=None):
     return snap_config
 
 
+@invalidates_cache
 def set_snap_config(mnode, option, volname=None):
     """Sets given snap config on the given node
 
@@ -754,6 +759,7 @@ def set_snap_config(mnode, option, volname=None):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def snap_delete(mnode, snapname):
     """Deletes the given snapshot
 
@@ -781,6 +787,7 @@ def snap_delete(mnode, snapname):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def snap_delete_by_volumename(mnode, volname):
     """Deletes the given snapshot
 
@@ -808,6 +815,7 @@ def snap_delete_by_volumename(mnode, volname):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def snap_delete_all(mnode):
     """Deletes all the snapshot in the cluster
 
@@ -833,6 +841,7 @@ def snap_delete_all(mnode):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def snap_activate(mnode, snapname, force=False):
     """Activates the given snapshot
 
@@ -869,6 +878,7 @@ def snap_activate(mnode, snapname, force=False):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def snap_deactivate(mnode, snapname):
     """Deactivates the given snapshot
 
@@ -20,11 +20,15 @@
 """
 
 import re
-import time
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import invalidates_cache
+from glustolibs.gluster.brick_inventory import (mark_bricks_used,
+                                                mark_bricks_unused)
 from glustolibs.gluster.peer_ops import peer_probe_servers
 from glustolibs.gluster.gluster_init import start_glusterd
 from glustolibs.gluster.lib_utils import list_files
+from glustolibs.gluster.volume_ops import get_volume_info
+from glustolibs.gluster.waiter import wait_for
 
 try:
     import xml.etree.cElementTree as etree
@@ -64,6 +68,7 @@ def add_extra_servers_to_cluster(mnode, extra_servers):
     return True
 
 
+@invalidates_cache
 def tier_attach(mnode, volname, num_bricks_to_add, extra_servers,
                 extra_servers_info, replica=1, force=False):
     """Attaches tier to the volume
@@ -113,7 +118,8 @@ def tier_attach(mnode, volname, num_bricks_to_add, extra_servers,
 
     from glustolibs.gluster.lib_utils import form_bricks_list
     bricks_list = form_bricks_list(mnode, volname, num_bricks_to_add,
-                                   extra_servers[:], extra_servers_info)
+                                   extra_servers[:], extra_servers_info,
+                                   subvol_size=replica)
     if bricks_list is None:
         g.log.error("number of bricks required are greater than "
                     "unused bricks")
@@ -126,9 +132,13 @@ def tier_attach(mnode, volname, num_bricks_to_add, extra_servers,
     cmd = ("gluster volume tier %s attach %s %s %s --mode=script"
            % (volname, repc, tier_bricks_path, frce))
 
-    return g.run(mnode, cmd)
+    ret, out, err = g.run(mnode, cmd)
+    if ret == 0:
+        mark_bricks_used(bricks_path)
+    return ret, out, err
 
 
+@invalidates_cache
 def tier_start(mnode, volname, force=False):
     """Starts the tier volume
 
@@ -239,6 +249,7 @@ def get_tier_status(mnode, volname):
     return tier_status
 
 
+@invalidates_cache
 def tier_detach_start(mnode, volname):
     """starts detaching tier on given volume
 
@@ -293,6 +304,7 @@ def tier_detach_status(mnode, volname):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def tier_detach_stop(mnode, volname):
     """stops detaching tier on given volume
 
@@ -320,6 +332,19 @@ def tier_detach_stop(mnode, volname):
     return g.run(mnode, cmd)
 
 
+def _get_hot_bricks(mnode, volname):
+    """Returns the list of hot tier bricks of the volume, empty if they
+    cannot be read.
+    """
+    volinfo = get_volume_info(mnode, volname)
+    if volinfo is None or volname not in volinfo:
+        return []
+    hot_tier = volinfo[volname]['bricks'].get('hotBricks', {})
+    return [brick['name'] for brick in hot_tier.get('brick', [])
+            if 'name' in brick]
+
+
+@invalidates_cache
 def tier_detach_commit(mnode, volname):
     """commits detach tier on given volume
 
@@ -343,10 +368,15 @@ def tier_detach_commit(mnode, volname):
 
     """
 
+    hot_bricks = _get_hot_bricks(mnode, volname)
     cmd = "gluster volume tier %s detach commit --mode=script" % volname
-    return g.run(mnode, cmd)
+    ret, out, err = g.run(mnode, cmd)
+    if ret == 0:
+        mark_bricks_unused(hot_bricks)
+    return ret, out, err
 
 
+@invalidates_cache
 def tier_detach_force(mnode, volname):
     """detaches tier forcefully on given volume
 
@@ -370,8 +400,12 @@ def tier_detach_force(mnode, volname):
 
     """
 
+    hot_bricks = _get_hot_bricks(mnode, volname)
     cmd = "gluster volume tier %s detach force --mode=script" % volname
-    return g.run(mnode, cmd)
+    ret, out, err = g.run(mnode, cmd)
+    if ret == 0:
+        mark_bricks_unused(hot_bricks)
+    return ret, out, err
 
 
 def get_detach_tier_status(mnode, volname):
@@ -430,6 +464,7 @@ def get_detach_tier_status(mnode, volname):
     return tier_status
 
 
+@invalidates_cache
 def tier_detach_start_and_get_taskid(mnode, volname):
     """Parse the output of 'gluster volume tier detach start' command.
 
@@ -468,6 +503,7 @@ def tier_detach_start_and_get_taskid(mnode, volname):
     return tier_status
 
 
+@invalidates_cache
 def tier_detach_stop_and_get_status(mnode, volname):
     """Parse the output of 'gluster volume tier detach stop' command.
 
@@ -543,22 +579,18 @@ def wait_for_detach_tier_to_complete(mnode, volname, timeout=300):
         >>> wait_for_detach_tier_to_complete(mnode, "testvol")
     """
 
-    count = 0
-    flag = 0
-    while (count < timeout):
-        status_info = get_detach_tier_status(mnode, volname)
-        if status_info is None:
-            return False
-
-        status = status_info['aggregate']['statusStr']
-        if status == 'completed':
-            flag = 1
-            break
-
-        time.sleep(10)
-        count = count + 10
-    if not flag:
-        g.log.error("detach tier is not completed")
+    ret, status_info = wait_for(
+        lambda: get_detach_tier_status(mnode, volname),
+        condition=(lambda status_info: (status_info['aggregate']['statusStr']
+                                        == 'completed')),
+        timeout=timeout,
+        abort=(lambda status_info: (
+            status_info is None or
+            status_info['aggregate']['statusStr'] in ('failed', 'stopped'))))
+    if not ret:
+        if status_info is not None:
+            g.log.error("detach tier is not completed. Status: %s",
+                        status_info['aggregate']['statusStr'])
         return False
     else:
         g.log.info("detach tier is successfully completed")
@@ -585,10 +617,8 @@ def get_files_from_hot_tier(mnode, volname):
     subvols = get_subvols(mnode, volname)
     for subvol in subvols['hot_tier_subvols']:
         info = subvol[0].split(':')
-        file_list = list_files(info[0], info[1])
-        for file in file_list:
-            if ".glusterfs" not in file:
-                files.append(file)
+        files.extend(list_files(info[0], info[1], prune_glusterfs=True,
+                                as_generator=True) or [])
 
     return files
 
@@ -613,10 +643,8 @@ def get_files_from_cold_tier(mnode, volname):
     subvols = get_subvols(mnode, volname)
     for subvol in subvols['cold_tier_subvols']:
         info = subvol[0].split(':')
-        file_list = list_files(info[0], info[1])
-        for file in file_list:
-            if ".glusterfs" not in file:
-                files.append(file)
+        files.extend(list_files(info[0], info[1], prune_glusterfs=True,
+                                as_generator=True) or [])
 
     return files
 
@@ -20,9 +20,11 @@
 """
 
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import invalidates_cache
 from glustolibs.gluster.volume_ops import get_volume_status
 
 
+@invalidates_cache
 def enable_uss(mnode, volname):
     """Enables uss on the specified volume
 
@@ -45,6 +47,7 @@ def enable_uss(mnode, volname):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def disable_uss(mnode, volname):
     """Disables uss on the specified volume
 
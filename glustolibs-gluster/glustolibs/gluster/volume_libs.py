@@ -29,7 +29,8 @@ from glustolibs.gluster.volume_ops import (volume_create, volume_start,
                                            volume_stop, volume_delete,
                                            volume_info, volume_status,
                                            get_volume_options,
-                                           get_volume_list)
+                                           get_volume_list, get_volume_status)
+from glustolibs.gluster.peer_ops import nodes_from_pool_list
 from glustolibs.gluster.tiering_ops import (add_extra_servers_to_cluster,
                                             tier_attach,
                                             is_tier_process_running)
@@ -37,10 +38,10 @@ from glustolibs.gluster.quota_ops import (enable_quota, set_quota_limit_usage,
                                           is_quota_enabled)
 from glustolibs.gluster.uss_ops import enable_uss, is_uss_enabled
 from glustolibs.gluster.snap_ops import snap_delete_by_volumename
-from glustolibs.gluster.heal_libs import (
-    are_all_self_heal_daemons_are_online,
-    wait_for_self_heal_daemons_to_be_online)
+from glustolibs.gluster.heal_libs import are_all_self_heal_daemons_are_online
 from glustolibs.gluster.brick_ops import add_brick, remove_brick, replace_brick
+from glustolibs.gluster.volume_topology import get_volume
+from glustolibs.gluster.waiter import wait_for
 
 
 def volume_exists(mnode, volname):
@@ -225,11 +226,15 @@ def setup_volume(mnode, all_servers_info, volume_config, force=False):
         g.log.error("Invalid volume type defined in config")
         return False
 
-    # get bricks_list
+    # get bricks_list, the bricks of a replica/disperse set on distinct
+    # servers
+    subvol_size = (kwargs.get('replica_count') or
+                   kwargs.get('disperse_count') or 1)
     bricks_list = form_bricks_list(mnode=mnode, volname=volname,
                                    number_of_bricks=number_of_bricks,
                                    servers=servers,
-                                   servers_info=all_servers_info)
+                                   servers_info=all_servers_info,
+                                   subvol_size=subvol_size)
     if not bricks_list:
         g.log.error("Number_of_bricks is greater than the unused bricks on "
                     "servers")
@@ -512,95 +517,26 @@ def get_subvols(mnode, volname):
     Example:
         get_subvols("abc.xyz.com", "testvol")
     """
-
     subvols = {
         'is_tier': False,
         'hot_tier_subvols': [],
         'cold_tier_subvols': [],
         'volume_subvols': []
         }
-    volinfo = get_volume_info(mnode, volname)
-    if volinfo is not None:
-        voltype = volinfo[volname]['typeStr']
-        if voltype == 'Tier':
-            # Set is_tier to True
+    volume = get_volume(mnode, volname)
+    if volume is not None:
+        if volume.is_tier:
             subvols['is_tier'] = True
-
-            # Get hot tier subvols
-            hot_tier_type = (volinfo[volname]["bricks"]
-                             ['hotBricks']['hotBrickType'])
-            tmp = volinfo[volname]["bricks"]['hotBricks']["brick"]
-            hot_tier_bricks = [x["name"] for x in tmp if "name" in x]
-            if hot_tier_type == 'Distribute':
-                for brick in hot_tier_bricks:
-                    subvols['hot_tier_subvols'].append([brick])
-
-            elif (hot_tier_type == 'Replicate' or
-                  hot_tier_type == 'Distributed-Replicate'):
-                rep_count = int(
-                    (volinfo[volname]["bricks"]['hotBricks']
-                     ['numberOfBricks']).split("=", 1)[0].split("x")[1].strip()
-                    )
-                subvol_list = (
-                    [hot_tier_bricks[i:i + rep_count]
-                     for i in range(0, len(hot_tier_bricks), rep_count)])
-                subvols['hot_tier_subvols'] = subvol_list
-
-            # Get cold tier subvols
-            cold_tier_type = (volinfo[volname]["bricks"]['coldBricks']
-                              ['coldBrickType'])
-            tmp = volinfo[volname]["bricks"]['coldBricks']["brick"]
-            cold_tier_bricks = [x["name"] for x in tmp if "name" in x]
-
-            # Distribute volume
-            if cold_tier_type == 'Distribute':
-                for brick in cold_tier_bricks:
-                    subvols['cold_tier_subvols'].append([brick])
-
-            # Replicate or Distribute-Replicate volume
-            elif (cold_tier_type == 'Replicate' or
-                  cold_tier_type == 'Distributed-Replicate'):
-                rep_count = int(
-                    (volinfo[volname]["bricks"]['coldBricks']
-                     ['numberOfBricks']).split("=", 1)[0].split("x")[1].strip()
-                    )
-                subvol_list = (
-                    [cold_tier_bricks[i:i + rep_count]
-                     for i in range(0, len(cold_tier_bricks), rep_count)])
-                subvols['cold_tier_subvols'] = subvol_list
-
-            # Disperse or Distribute-Disperse volume
-            elif (cold_tier_type == 'Disperse' or
-                  cold_tier_type == 'Distributed-Disperse'):
-                disp_count = sum(
-                    [int(nums) for nums in (
-                        (volinfo[volname]["bricks"]['coldBricks']
-                         ['numberOfBricks']).split("x", 1)[1].
-                        strip().split("=")[0].strip().strip("()").
-                        split()) if nums.isdigit()])
-                subvol_list = [cold_tier_bricks[i:i + disp_count]
-                               for i in range(0, len(cold_tier_bricks),
-                                              disp_count)]
-                subvols['cold_tier_subvols'] = subvol_list
+            if volume.hot_tier is not None:
+                subvols['hot_tier_subvols'] = [
+                    subvol.brick_names for subvol in volume.hot_tier.subvols]
+            if volume.cold_tier is not None:
+                subvols['cold_tier_subvols'] = [
+                    subvol.brick_names for subvol in volume.cold_tier.subvols]
             return subvols
 
-        tmp = volinfo[volname]["bricks"]["brick"]
-        bricks = [x["name"] for x in tmp if "name" in x]
-        if voltype == 'Replicate' or voltype == 'Distributed-Replicate':
-            rep_count = int(volinfo[volname]['replicaCount'])
-            subvol_list = [bricks[i:i + rep_count]for i in range(0,
-                                                                 len(bricks),
-                                                                 rep_count)]
-            subvols['volume_subvols'] = subvol_list
-        elif voltype == 'Distribute':
-            for brick in bricks:
-                subvols['volume_subvols'].append([brick])
-
-        elif voltype == 'Disperse' or voltype == 'Distributed-Disperse':
-            disp_count = int(volinfo[volname]['disperseCount'])
-            subvol_list = ([bricks[i:i + disp_count]
-                            for i in range(0, len(bricks), disp_count)])
-            subvols['volume_subvols'] = subvol_list
+        subvols['volume_subvols'] = [subvol.brick_names
+                                     for subvol in volume.subvols]
     return subvols
 
 
@@ -874,18 +810,21 @@ def get_num_of_bricks_per_subvol(mnode, volname):
         'volume_num_of_bricks_per_subvol': None
         }
 
-    subvols_dict = get_subvols(mnode, volname)
-    if subvols_dict['volume_subvols']:
+    volume = get_volume(mnode, volname)
+    if volume is None:
+        return bricks_per_subvol_dict
+
+    if volume.subvols:
         bricks_per_subvol_dict['volume_num_of_bricks_per_subvol'] = (
-            len(subvols_dict['volume_subvols'][0]))
-    else:
-        if (subvols_dict['hot_tier_subvols'] and
-                subvols_dict['cold_tier_subvols']):
-            bricks_per_subvol_dict['is_tier'] = True
-            bricks_per_subvol_dict['hot_tier_num_of_bricks_per_subvol'] = (
-                len(subvols_dict['hot_tier_subvols'][0]))
-            bricks_per_subvol_dict['cold_tier_num_of_bricks_per_subvol'] = (
-                len(subvols_dict['cold_tier_subvols'][0]))
+            len(volume.subvols[0]))
+    elif (volume.is_tier and volume.hot_tier is not None and
+          volume.cold_tier is not None and volume.hot_tier.subvols and
+          volume.cold_tier.subvols):
+        bricks_per_subvol_dict['is_tier'] = True
+        bricks_per_subvol_dict['hot_tier_num_of_bricks_per_subvol'] = (
+            len(volume.hot_tier.subvols[0]))
+        bricks_per_subvol_dict['cold_tier_num_of_bricks_per_subvol'] = (
+            len(volume.cold_tier.subvols[0]))
 
     return bricks_per_subvol_dict
 
@@ -956,8 +895,8 @@ def get_replica_count(mnode, volname):
                     }
         NoneType: None if it is parse failure.
     """
-    vol_type_info = get_volume_type_info(mnode, volname)
-    if vol_type_info is None:
+    volume = get_volume(mnode, volname)
+    if volume is None:
         g.log.error("Unable to get the replica count info for the volume %s",
                     volname)
         return None
@@ -969,16 +908,17 @@ def get_replica_count(mnode, volname):
         'volume_replica_count': None
         }
 
-    replica_count_info['is_tier'] = vol_type_info['is_tier']
-    if replica_count_info['is_tier']:
-        replica_count_info['hot_tier_replica_count'] = (
-            vol_type_info['hot_tier_type_info']['hotreplicaCount'])
-        replica_count_info['cold_tier_replica_count'] = (
-            vol_type_info['cold_tier_type_info']['coldreplicaCount'])
+    replica_count_info['is_tier'] = volume.is_tier
+    if volume.is_tier:
+        if volume.hot_tier is not None:
+            replica_count_info['hot_tier_replica_count'] = (
+                volume.hot_tier.replica_count)
+        if volume.cold_tier is not None:
+            replica_count_info['cold_tier_replica_count'] = (
+                volume.cold_tier.replica_count)
 
     else:
-        replica_count_info['volume_replica_count'] = (
-            vol_type_info['volume_type_info']['replicaCount'])
+        replica_count_info['volume_replica_count'] = volume.replica_count
 
     return replica_count_info
 
@@ -1047,8 +987,8 @@ def get_disperse_count(mnode, volname):
                     }
         None: If it is non dispersed volume.
     """
-    vol_type_info = get_volume_type_info(mnode, volname)
-    if vol_type_info is None:
+    volume = get_volume(mnode, volname)
+    if volume is None:
         g.log.error("Unable to get the disperse count info for the volume %s",
                     volname)
         return None
@@ -1059,14 +999,14 @@ def get_disperse_count(mnode, volname):
         'volume_disperse_count': None
         }
 
-    disperse_count_info['is_tier'] = vol_type_info['is_tier']
-    if disperse_count_info['is_tier']:
-        disperse_count_info['cold_tier_disperse_count'] = (
-            vol_type_info['cold_tier_type_info']['colddisperseCount'])
+    disperse_count_info['is_tier'] = volume.is_tier
+    if volume.is_tier:
+        if volume.cold_tier is not None:
+            disperse_count_info['cold_tier_disperse_count'] = (
+                volume.cold_tier.disperse_count)
 
     else:
-        disperse_count_info['volume_disperse_count'] = (
-            vol_type_info['volume_type_info']['disperseCount'])
+        disperse_count_info['volume_disperse_count'] = volume.disperse_count
 
     return disperse_count_info
 
@@ -1200,17 +1140,18 @@ def expand_volume(mnode, volname, servers, all_servers_info, force=False,
         # Calculate number of bricks to add
         if subvols_info['is_tier']:
             if add_to_hot_tier:
-                num_of_subvols = len(subvols_info['hot_tier_subvols'])
+                subvols_list = subvols_info['hot_tier_subvols']
                 current_replica_count = (
                     int(replica_count_info['hot_tier_replica_count']))
             else:
-                num_of_subvols = len(subvols_info['cold_tier_subvols'])
+                subvols_list = subvols_info['cold_tier_subvols']
                 current_replica_count = (
                     int(replica_count_info['cold_tier_replica_count']))
         else:
-            num_of_subvols = len(subvols_info['volume_subvols'])
+            subvols_list = subvols_info['volume_subvols']
             current_replica_count = (
                 int(replica_count_info['volume_replica_count']))
+        num_of_subvols = len(subvols_list)
 
         if num_of_subvols == 0:
             g.log.error("No Sub-Volumes available for the volume %s."
@@ -1226,6 +1167,12 @@ def expand_volume(mnode, volname, servers, all_servers_info, force=False,
 
         num_of_bricks_to_add = (
             (new_replica_count - current_replica_count) * num_of_subvols)
+        subvol_size = new_replica_count - current_replica_count
+
+        # Keep the new bricks of each replica set away from the servers
+        # already hosting its bricks
+        excluded_servers = [[brick.split(':')[0] for brick in subvol]
+                            for subvol in subvols_list]
 
     else:
         # Check if the volume has to be expanded by n distribute count.
@@ -1260,12 +1207,16 @@ def expand_volume(mnode, volname, servers, all_servers_info, force=False,
 
         num_of_bricks_to_add = (
             num_of_bricks_per_subvol * distribute_count_to_add)
+        subvol_size = num_of_bricks_per_subvol
+        excluded_servers = None
 
     # Form bricks list to add bricks to the volume.
     bricks_list = form_bricks_list(mnode=mnode, volname=volname,
                                    number_of_bricks=num_of_bricks_to_add,
                                    servers=servers,
-                                   servers_info=all_servers_info)
+                                   servers_info=all_servers_info,
+                                   subvol_size=subvol_size,
+                                   excluded_servers=excluded_servers)
     if not bricks_list:
         g.log.error("Number of bricks is greater than the unused bricks on "
                     "servers. Hence failed to perform add-brick operation")
@@ -1597,30 +1548,39 @@ def replace_brick_from_volume(mnode, volname, servers, all_servers_info,
 
     # Get Subvols
     subvols_info = get_subvols(mnode, volname)
+    if subvols_info['is_tier']:
+        if replace_brick_from_hot_tier:
+            subvols_list = subvols_info['hot_tier_subvols']
+        else:
+            subvols_list = subvols_info['cold_tier_subvols']
+    else:
+        subvols_list = subvols_info['volume_subvols']
+
+    if not src_brick:
+        # Randomly pick up a brick to bring the brick down and replace.
+        src_brick = (random.choice(random.choice(subvols_list)))
 
     if not dst_brick:
+        # Keep the new brick away from the servers hosting the other
+        # bricks of the subvol of the faulty brick
+        src_subvol = [subvol for subvol in subvols_list
+                      if src_brick in subvol]
+        excluded_servers = None
+        if src_subvol:
+            excluded_servers = [[brick.split(':')[0]
+                                 for brick in src_subvol[0]
+                                 if brick != src_brick]]
         dst_brick = form_bricks_list(mnode=mnode, volname=volname,
                                      number_of_bricks=1,
                                      servers=servers,
-                                     servers_info=all_servers_info)
+                                     servers_info=all_servers_info,
+                                     excluded_servers=excluded_servers)
         if not dst_brick:
             g.log.error("Failed to get a new brick to replace the faulty "
                         "brick")
             return False
         dst_brick = dst_brick[0]
 
-    if not src_brick:
-        # Randomly pick up a brick to bring the brick down and replace.
-        if subvols_info['is_tier']:
-            if replace_brick_from_hot_tier:
-                subvols_list = subvols_info['hot_tier_subvols']
-            else:
-                subvols_list = subvols_info['cold_tier_subvols']
-        else:
-            subvols_list = subvols_info['volume_subvols']
-
-        src_brick = (random.choice(random.choice(subvols_list)))
-
     # Brick the source brick offline
     from glustolibs.gluster.brick_libs import bring_bricks_offline
     g.log.info("Bringing brick %s offline of the volume  %s", src_brick,
@@ -1728,116 +1688,171 @@ def get_client_quorum_info(mnode, volname):
     quorum_count = volume_option['cluster.quorum-count']
 
     # Set the quorum info
-    volume_type_info = get_volume_type_info(mnode, volname)
-    if volume_type_info['is_tier'] is True:
+    volume = get_volume(mnode, volname)
+    if volume is None:
+        return client_quorum_dict
+
+    if volume.is_tier:
         client_quorum_dict['is_tier'] = True
+        sections = (('hot_tier_quorum_info', volume.hot_tier),
+                    ('cold_tier_quorum_info', volume.cold_tier))
+    else:
+        sections = (('volume_quorum_info', volume),)
 
-        # Hot Tier quorum info
-        hot_tier_type = volume_type_info['hot_tier_type_info']['hotBrickType']
-        if (hot_tier_type == 'Replicate' or
-                hot_tier_type == 'Distributed-Replicate'):
-
-            (client_quorum_dict['hot_tier_quorum_info']
-             ['is_quorum_applicable']) = True
-            replica_count = (volume_type_info['hot_tier_type_info']
-                             ['hotreplicaCount'])
-
-            # Case1: Replica 2
-            if int(replica_count) == 2:
-                if 'none' not in quorum_type:
-                    (client_quorum_dict['hot_tier_quorum_info']
-                     ['quorum_type']) = quorum_type
-
-                    if quorum_type == 'fixed':
-                        if not quorum_count == '(null)':
-                            (client_quorum_dict['hot_tier_quorum_info']
-                             ['quorum_count']) = quorum_count
-
-            # Case2: Replica > 2
-            if int(replica_count) > 2:
-                if quorum_type == 'none':
-                    (client_quorum_dict['hot_tier_quorum_info']
-                     ['quorum_type']) = 'auto'
-                    quorum_type == 'auto'
-                else:
-                    (client_quorum_dict['hot_tier_quorum_info']
-                     ['quorum_type']) = quorum_type
-                if quorum_type == 'fixed':
-                    if not quorum_count == '(null)':
-                        (client_quorum_dict['hot_tier_quorum_info']
-                         ['quorum_count']) = quorum_count
+    for key, section in sections:
+        if section is None or section.type_str not in (
+                'Replicate', 'Distributed-Replicate'):
+            continue
+        quorum_info = client_quorum_dict[key]
+        quorum_info['is_quorum_applicable'] = True
+        replica_count = section.replica_count
+
+        # Case1: Replica 2
+        if replica_count == 2:
+            if 'none' not in quorum_type:
+                quorum_info['quorum_type'] = quorum_type
 
-        # Cold Tier quorum info
-        cold_tier_type = (volume_type_info['cold_tier_type_info']
-                          ['coldBrickType'])
-        if (cold_tier_type == 'Replicate' or
-                cold_tier_type == 'Distributed-Replicate'):
-            (client_quorum_dict['cold_tier_quorum_info']
-             ['is_quorum_applicable']) = True
-            replica_count = (volume_type_info['cold_tier_type_info']
-                             ['coldreplicaCount'])
-
-            # Case1: Replica 2
-            if int(replica_count) == 2:
-                if 'none' not in quorum_type:
-                    (client_quorum_dict['cold_tier_quorum_info']
-                     ['quorum_type']) = quorum_type
-
-                    if quorum_type == 'fixed':
-                        if not quorum_count == '(null)':
-                            (client_quorum_dict['cold_tier_quorum_info']
-                             ['quorum_count']) = quorum_count
-
-            # Case2: Replica > 2
-            if int(replica_count) > 2:
-                if quorum_type == 'none':
-                    (client_quorum_dict['cold_tier_quorum_info']
-                     ['quorum_type']) = 'auto'
-                    quorum_type == 'auto'
-                else:
-                    (client_quorum_dict['cold_tier_quorum_info']
-                     ['quorum_type']) = quorum_type
-                if quorum_type == 'fixed':
-                    if not quorum_count == '(null)':
-                        (client_quorum_dict['cold_tier_quorum_info']
-                         ['quorum_count']) = quorum_count
-    else:
-        volume_type = (volume_type_info['volume_type_info']['typeStr'])
-        if (volume_type == 'Replicate' or
-                volume_type == 'Distributed-Replicate'):
-            (client_quorum_dict['volume_quorum_info']
-             ['is_quorum_applicable']) = True
-            replica_count = (volume_type_info['volume_type_info']
-                             ['replicaCount'])
-
-            # Case1: Replica 2
-            if int(replica_count) == 2:
-                if 'none' not in quorum_type:
-                    (client_quorum_dict['volume_quorum_info']
-                     ['quorum_type']) = quorum_type
-
-                    if quorum_type == 'fixed':
-                        if not quorum_count == '(null)':
-                            (client_quorum_dict['volume_quorum_info']
-                             ['quorum_count']) = quorum_count
-
-            # Case2: Replica > 2
-            if int(replica_count) > 2:
-                if quorum_type == 'none':
-                    (client_quorum_dict['volume_quorum_info']
-                     ['quorum_type']) = 'auto'
-                    quorum_type == 'auto'
-                else:
-                    (client_quorum_dict['volume_quorum_info']
-                     ['quorum_type']) = quorum_type
                 if quorum_type == 'fixed':
                     if not quorum_count == '(null)':
-                        (client_quorum_dict['volume_quorum_info']
-                         ['quorum_count']) = quorum_count
+                        quorum_info['quorum_count'] = quorum_count
+
+        # Case2: Replica > 2
+        if replica_count > 2:
+            if quorum_type == 'none':
+                quorum_info['quorum_type'] = 'auto'
+            else:
+                quorum_info['quorum_type'] = quorum_type
+            if quorum_type == 'fixed':
+                if not quorum_count == '(null)':
+                    quorum_info['quorum_count'] = quorum_count
 
     return client_quorum_dict
 
 
+def _get_expected_volume_processes(mnode, volname):
+    """Helper for wait_for_volume_processes. Gets the list of processes
+    expected to be online for the volume from a single volume info.
+
+    Returns:
+        dict: Dict with process name as key and list of (node, name) tuples
+            as value. 'name' is the key under which the process is listed
+            for the node in the output of get_volume_status.
+        NoneType: None if unable to get the volume info.
+    """
+    volinfo = get_volume_info(mnode, volname)
+    if volinfo is None or volname not in volinfo:
+        g.log.error("Unable to get the volume info for volume %s", volname)
+        return None
+    volinfo = volinfo[volname]
+
+    if volinfo['typeStr'] == 'Tier':
+        bricks = (volinfo['bricks']['hotBricks']['brick'] +
+                  volinfo['bricks']['coldBricks']['brick'])
+        is_distribute = (
+            volinfo['bricks']['hotBricks']['hotBrickType'] == 'Distribute' and
+            volinfo['bricks']['coldBricks']['coldBrickType'] == 'Distribute')
+    else:
+        bricks = volinfo['bricks']['brick']
+        is_distribute = volinfo['typeStr'] == 'Distribute'
+
+    expected = {'bricks': [tuple(brick['name'].split(":"))
+                           for brick in bricks if 'name' in brick]}
+
+    options = volinfo.get('options') or {}
+    daemons = []
+    if not is_distribute:
+        daemons.append(('shd', 'Self-heal Daemon'))
+    if options.get('nfs.disable') == 'off':
+        daemons.append(('nfs', 'NFS Server'))
+    if options.get('features.quota') == 'on':
+        daemons.append(('quotad', 'Quota Daemon'))
+
+    if daemons:
+        nodes = nodes_from_pool_list(mnode)
+        if not nodes:
+            g.log.error("Unable to get the nodes from pool list")
+            return None
+        for process, name in daemons:
+            expected[process] = [(node, name) for node in nodes]
+
+    return expected
+
+
+def _get_volume_processes_report(vol_status, volname, expected):
+    """Helper for wait_for_volume_processes. Checks all the expected
+    processes against a single volume status snapshot.
+
+    Returns:
+        dict: Dict with process name as key and dict with 'online' and
+            'offline' lists as value.
+    """
+    report = {}
+    if vol_status is not None:
+        vol_status = vol_status.get(volname, {})
+    for process, entries in expected.items():
+        report[process] = {'online': [], 'offline': []}
+        for node, name in entries:
+            try:
+                online = vol_status[node][name]['status'] == '1'
+            except (KeyError, TypeError):
+                online = False
+            if online:
+                report[process]['online'].append("%s:%s" % (node, name))
+            else:
+                report[process]['offline'].append("%s:%s" % (node, name))
+    return report
+
+
+def wait_for_volume_processes(mnode, volname, timeout=300):
+    """Waits for all the processes of the volume i.e bricks, self-heal
+    daemons, NFS servers and quota daemons to be online until timeout.
+    Self-heal daemons are expected for non-distribute volumes, NFS servers
+    if 'nfs.disable' is 'off' and quota daemons if quota is enabled.
+
+    Every poll fetches a single volume status and checks all the processes
+    against it.
+
+    Args:
+        mnode (str): Node on which commands will be executed.
+        volname (str): Name of the volume.
+
+    Kwargs:
+        timeout (int): timeout value in seconds to wait for all volume
+        processes to be online.
+
+    Returns:
+        tuple: Tuple containing two elements (ret, report).
+            The first element 'ret' is of type 'bool' and is True if all the
+            processes are online within timeout, False otherwise.
+
+            The second element 'report' is of type 'dict' and contains the
+            readiness of each process as of the last poll. None if unable
+            to get the list of processes expected for the volume.
+
+    Example:
+        wait_for_volume_processes("abc.com", "testvol")
+        >>> (False, {'bricks': {'online': ['abc.com:/bricks/brick0/b0'],
+        'offline': ['def.com:/bricks/brick0/b1']}, 'shd': {'online':
+        ['abc.com:Self-heal Daemon', 'def.com:Self-heal Daemon'],
+        'offline': []}})
+    """
+    expected = _get_expected_volume_processes(mnode, volname)
+    if expected is None:
+        return False, None
+
+    ret, report = wait_for(
+        lambda: _get_volume_processes_report(
+            get_volume_status(mnode, volname), volname, expected),
+        condition=lambda report: not any(report[process]['offline']
+                                         for process in report),
+        timeout=timeout)
+    for process in sorted(report):
+        if report[process]['offline']:
+            g.log.error("%s of the volume '%s' not online: %s", process,
+                        volname, report[process]['offline'])
+    return ret, report
+
+
 def wait_for_volume_process_to_be_online(mnode, volname, timeout=300):
     """Waits for the volume's processes to be online until timeout
 
@@ -1853,26 +1868,11 @@ def wait_for_volume_process_to_be_online(mnode, volname, timeout=300):
         True if the volume's processes are online within timeout,
         False otherwise
     """
-    # Adding import here to avoid cyclic imports
-    from glustolibs.gluster.brick_libs import wait_for_bricks_to_be_online
-
-    # Wait for bricks to be online
-    bricks_online_status = wait_for_bricks_to_be_online(mnode, volname,
-                                                        timeout)
-    if bricks_online_status is False:
-        g.log.error("Failed to wait for the volume '%s' processes "
-                    "to be online", volname)
-        return False
-
-    # Wait for self-heal-daemons to be online
-    self_heal_daemon_online_status = (
-        wait_for_self_heal_daemons_to_be_online(mnode, volname, timeout))
-    if self_heal_daemon_online_status is False:
+    ret, _ = wait_for_volume_processes(mnode, volname, timeout)
+    if not ret:
         g.log.error("Failed to wait for the volume '%s' processes "
                     "to be online", volname)
         return False
 
-    # TODO: Add any process checks here
-
     g.log.info("Volume '%s' processes are all online", volname)
     return True
@@ -19,6 +19,10 @@
 import re
 import copy
 from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import cached_query, invalidates_cache
+from glustolibs.gluster.brick_inventory import (mark_bricks_used,
+                                                mark_bricks_unused)
+from glustolibs.gluster.aux_mounts import cleanup_aux_mounts
 from pprint import pformat
 try:
     import xml.etree.cElementTree as etree
@@ -31,6 +35,7 @@ except ImportError:
 """
 
 
+@invalidates_cache
 def volume_create(mnode, volname, bricks_list, force=False, **kwargs):
     """Create the gluster volume with specified configuration
 
@@ -131,9 +136,13 @@ def volume_create(mnode, volname, bricks_list, force=False, **kwargs):
     if force:
         cmd = cmd + " force"
 
-    return g.run(mnode, cmd)
+    ret, out, err = g.run(mnode, cmd)
+    if ret == 0:
+        mark_bricks_used(bricks_list)
+    return ret, out, err
 
 
+@invalidates_cache
 def volume_start(mnode, volname, force=False):
     """Starts the gluster volume
 
@@ -167,6 +176,7 @@ def volume_start(mnode, volname, force=False):
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def volume_stop(mnode, volname, force=False):
     """Stops the gluster volume
 
@@ -197,9 +207,12 @@ def volume_stop(mnode, volname, force=False):
         cmd = "gluster volume stop %s force --mode=script" % volname
     else:
         cmd = "gluster volume stop %s --mode=script" % volname
+    # The auxiliary mounts of the volume would become stale
+    cleanup_aux_mounts(volname=volname)
     return g.run(mnode, cmd)
 
 
+@invalidates_cache
 def volume_delete(mnode, volname):
     """Deletes the gluster volume if given volume exists in
        gluster and deletes the directories in the bricks
@@ -231,10 +244,12 @@ def volume_delete(mnode, volname):
     else:
         bricks = [x["name"] for x in volinfo[volname]["bricks"]["brick"]
                   if "name" in x]
+    cleanup_aux_mounts(volname=volname)
     ret, _, _ = g.run(mnode, "gluster volume delete %s --mode=script"
                       % volname)
     if ret != 0:
         return False
+    mark_bricks_unused(bricks)
 
     for brick in bricks:
         node, vol_dir = brick.split(":")
@@ -243,6 +258,7 @@ def volume_delete(mnode, volname):
     return True
 
 
+@invalidates_cache
 def volume_reset(mnode, volname, force=False):
     """Resets the gluster volume
 
@@ -331,15 +347,138 @@ def parse_xml(tag_obj):
     """
     node_dict = {}
     for tag in tag_obj:
-        if re.search(r'\n\s+', tag.text) is not None:
-            port_dict = {}
-            port_dict = parse_xml(tag)
-            node_dict[tag.tag] = port_dict
+        if len(tag):
+            node_dict[tag.tag] = parse_xml(tag)
         else:
             node_dict[tag.tag] = tag.text
     return node_dict
 
 
+def parse_volume_status_xml(xml_output, mnode, options=''):
+    """Parses the xml output of gluster volume status in a single pass.
+
+    Args:
+        xml_output (str): xml output of 'gluster vol status --xml'.
+        mnode (str): Node on which the command was executed. Used as the
+            node name for the services reported on 'localhost'.
+
+    Kwargs:
+        options (str): options passed to the volume status command.
+
+    Returns:
+        tuple: Tuple containing two elements (vol_status, brick_index).
+            The first element 'vol_status' is the volume status in the same
+            dict of dictionary format as returned by get_volume_status.
+
+            The second element 'brick_index' is a flat dict with
+            (hostname, brick_path) tuple as key and the status dict of the
+            brick (shared with vol_status) as value.
+
+        NoneType: None if the volumes are not found in the xml output.
+
+    Raises:
+        etree.ParseError: If xml_output is not a valid xml.
+    """
+    root = etree.XML(xml_output)
+    volume_list = _parse_volume_status_xml(root)
+    if volume_list is None:
+        return None
+
+    vol_status = {}
+    brick_index = {}
+    for volume in volume_list:
+        volume_status_dict = {}
+        vol_name = volume.findtext("volName")
+
+        # parsing volume status xml output
+        if options == 'tasks':
+            for each_task in volume.findall("tasks"):
+                task_dict = parse_xml(each_task)
+                if 'task' in task_dict:
+                    task_dict = task_dict['task']
+                    volume_status_dict.setdefault('task_status',
+                                                  []).append(task_dict)
+                else:
+                    volume_status_dict['task_status'] = [task_dict]
+            vol_status[vol_name] = volume_status_dict
+            continue
+
+        hot_bricks = set()
+        cold_bricks = set()
+        hot_tier = volume.find("hotBricks")
+        cold_tier = volume.find("coldBricks")
+        if hot_tier is not None or cold_tier is not None:
+            nodes = []
+            if hot_tier is not None:
+                hot_nodes = hot_tier.findall("node")
+                hot_bricks.update(node.findtext('path') for node in hot_nodes)
+                nodes.extend(hot_nodes)
+            if cold_tier is not None:
+                cold_nodes = cold_tier.findall("node")
+                cold_bricks.update(node.findtext('path')
+                                   for node in cold_nodes)
+                nodes.extend(cold_nodes)
+        else:
+            nodes = volume.findall("node")
+
+        for each_node in nodes:
+            node_dict = parse_xml(each_node)
+            path = node_dict.get('path')
+            if path is None:
+                continue
+            if path.startswith('/'):
+                node_name = node_dict.get('hostname')
+            elif path == 'localhost':
+                node_name = mnode
+            else:
+                node_name = path
+            node_status = volume_status_dict.setdefault(node_name, {})
+
+            if 'hostname' not in node_dict:
+                continue
+            hostname = node_dict.pop('hostname')
+            del node_dict['path']
+            if path.startswith('/'):
+                if path in hot_bricks:
+                    node_dict["bricktype"] = 'hot'
+                elif path in cold_bricks:
+                    node_dict["bricktype"] = 'cold'
+                else:
+                    node_dict["bricktype"] = 'None'
+                node_status[path] = node_dict
+                brick_index[(hostname, path)] = node_dict
+            else:
+                node_status[hostname] = node_dict
+
+        vol_status[vol_name] = volume_status_dict
+    return vol_status, brick_index
+
+
+def _get_volume_status(mnode, volname, service, options):
+    """Helper for get_volume_status and get_brick_status_index. Executes
+    the volume status command and returns the output of
+    parse_volume_status_xml. None on failure.
+    """
+    cmd = "gluster vol status %s %s %s --xml" % (volname, service, options)
+
+    ret, out, _ = g.run(mnode, cmd, log_level='DEBUG')
+    if ret != 0:
+        g.log.error("Failed to execute gluster volume status command")
+        return None
+
+    try:
+        parsed_status = parse_volume_status_xml(out, mnode, options)
+    except etree.ParseError:
+        g.log.error("Failed to parse the gluster volume status xml output.")
+        return None
+    if parsed_status is None:
+        g.log.error("Failed to parse the XML output of volume status for "
+                    "volume %s" % volname)
+        return None
+    return parsed_status
+
+
+@cached_query
 def get_volume_status(mnode, volname='all', service='', options=''):
     """This module gets the status of all or specified volume(s)/brick
 
@@ -381,106 +520,45 @@ def get_volume_status(mnode, volname='all', service='', options=''):
         '2049', 'peerid': '5397d8f5-2986-453a-b0b5-5c40a9bb87ff', 'ports':
         {'rdma': 'N/A', 'tcp': '2049'}}}}}
     """
-
-    cmd = "gluster vol status %s %s %s --xml" % (volname, service, options)
-
-    ret, out, _ = g.run(mnode, cmd, log_level='DEBUG')
-    if ret != 0:
-        g.log.error("Failed to execute gluster volume status command")
+    parsed_status = _get_volume_status(mnode, volname, service, options)
+    if parsed_status is None:
         return None
 
-    root = etree.XML(out)
-    volume_list = _parse_volume_status_xml(root)
-    if volume_list is None:
-        g.log.error("Failed to parse the XML output of volume status for "
-                    "volume %s" % volname)
-        return None
+    vol_status = parsed_status[0]
+    g.log.debug("Volume status output: %s"
+                % pformat(vol_status, indent=10))
+    return vol_status
 
-    vol_status = {}
-    for volume in volume_list:
-        tmp_dict1 = {}
-        tmp_dict2 = {}
-        hot_bricks = []
-        cold_bricks = []
-        vol_name = [vol.text for vol in volume if vol.tag == "volName"]
 
-        # parsing volume status xml output
-        if options == 'tasks':
-            tasks = volume.findall("tasks")
-            for each_task in tasks:
-                tmp_dict3 = parse_xml(each_task)
-                node_name = 'task_status'
-                if 'task' in tmp_dict3.keys():
-                    if node_name in tmp_dict2.keys():
-                        tmp_dict2[node_name].append(tmp_dict3['task'])
-                    else:
-                        tmp_dict2[node_name] = [tmp_dict3['task']]
-                else:
-                    tmp_dict2[node_name] = [tmp_dict3]
-        else:
-            elem_tag = []
-            for elem in volume.getchildren():
-                elem_tag.append(elem.tag)
-            if ('hotBricks' in elem_tag) or ('coldBricks' in elem_tag):
-                for elem in volume.getchildren():
-                    if (elem.tag == 'hotBricks'):
-                        nodes = elem.findall("node")
-                        hot_bricks = [node.find('path').text
-                                      for node in nodes
-                                      if (
-                                       node.find('path').text.startswith('/'))]
-                    if (elem.tag == 'coldBricks'):
-                        for n in elem.findall("node"):
-                            nodes.append(n)
-                        cold_bricks = [node.find('path').text
-                                       for node in nodes
-                                       if (
-                                        (node.find('path').
-                                         text.startswith('/')))]
-            else:
-                nodes = volume.findall("node")
+def get_brick_status_index(mnode, volname='all'):
+    """Gets the status of all the bricks of all or specified volume(s) as a
+    flat dict.
 
-            for each_node in nodes:
-                if each_node.find('path').text.startswith('/'):
-                    node_name = each_node.find('hostname').text
-                elif each_node.find('path').text == 'localhost':
-                    node_name = mnode
-                else:
-                    node_name = each_node.find('path').text
-                node_dict = parse_xml(each_node)
-                tmp_dict3 = {}
-                if "hostname" in node_dict.keys():
-                    if node_dict['path'].startswith('/'):
-                        if node_dict['path'] in hot_bricks:
-                            node_dict["bricktype"] = 'hot'
-                        elif node_dict['path'] in cold_bricks:
-                            node_dict["bricktype"] = 'cold'
-                        else:
-                            node_dict["bricktype"] = 'None'
-                        tmp = node_dict["path"]
-                        tmp_dict3[node_dict["path"]] = node_dict
-                    else:
-                        tmp_dict3[node_dict["hostname"]] = node_dict
-                        tmp = node_dict["hostname"]
-                    del tmp_dict3[tmp]["path"]
-                    del tmp_dict3[tmp]["hostname"]
-                if node_name in tmp_dict1.keys():
-                    tmp_dict1[node_name].append(tmp_dict3)
-                else:
-                    tmp_dict1[node_name] = [tmp_dict3]
+    Args:
+        mnode (str): Node on which cmd has to be executed.
+
+    Kwargs:
+        volname (str): volume name. Defaults to 'all'
 
-                tmp_dict4 = {}
-                for item in tmp_dict1[node_name]:
-                    for key, val in item.items():
-                        tmp_dict4[key] = val
-                tmp_dict2[node_name] = tmp_dict4
+    Returns:
+        dict: (hostname, brick_path) tuple as key and the brick status dict
+            as value, on success
+        NoneType: on failure
 
-        vol_status[vol_name[0]] = tmp_dict2
-    g.log.debug("Volume status output: %s"
-                % pformat(vol_status, indent=10))
-    return vol_status
+    Example:
+        get_brick_status_index("10.70.47.89", volname="testvol")
+        >>>{('10.70.47.89', '/bricks/brick1/a11'): {'status': '1', 'pid':
+        '28963', 'bricktype': 'None', 'port': '49163', 'peerid':
+        '7fc9015e-8134-4753-b837-54cbc6030c98', 'ports': {'rdma': 'N/A',
+        'tcp': '49163'}}}
+    """
+    parsed_status = _get_volume_status(mnode, volname, '', '')
+    if parsed_status is None:
+        return None
+    return parsed_status[1]
 
 
+@cached_query
 def get_volume_options(mnode, volname, option='all'):
     """gets the option values for the given volume.
 
@@ -522,6 +600,7 @@ def get_volume_options(mnode, volname, option='all'):
     return volume_option
 
 
+@invalidates_cache
 def set_volume_options(mnode, volname, options):
     """Sets the option values for the given volume.
 
@@ -594,6 +673,7 @@ def volume_info(mnode, volname='all'):
     return g.run(mnode, cmd)
 
 
+@cached_query
 def get_volume_info(mnode, volname='all'):
     """Fetches the volume information as displayed in the volume info.
         Uses xml output of volume info and parses the into to a dict
@@ -688,6 +768,7 @@ def get_volume_info(mnode, volname='all'):
     return volinfo
 
 
+@invalidates_cache
 def volume_sync(mnode, hostname, volname="all"):
     """syncs the volume to the specified host
 
@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+#  Copyright (C) 2018 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+"""
+    Description: Module providing the typed object model of the volumes
+        (volume, tiers, subvolumes and bricks) built from a single
+        'gluster volume info --xml' output.
+"""
+
+import re
+from glusto.core import Glusto as g
+from glustolibs.gluster.cli_cache import cached_query
+try:
+    import xml.etree.cElementTree as etree
+except ImportError:
+    import xml.etree.ElementTree as etree
+
+
+def _to_int(text):
+    """Converts the text of a volume info xml element to int.
+    Returns None if the text is missing or not a number.
+    """
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_number_of_bricks(number_of_bricks):
+    """Parses the 'numberOfBricks' field of a tier.
+
+    Args:
+        number_of_bricks (str): value like '4', '2 x 3 = 6' or
+            '1 x (4 + 2) = 6'.
+
+    Returns:
+        tuple: Tuple containing two elements
+            (num_of_bricks_per_subvol, counts).
+            The first element is None if the value can't be parsed.
+
+            The second element is the list of numbers within the
+            parenthesis (data and redundancy count for disperse).
+    """
+    if not number_of_bricks:
+        return None, []
+    if 'x' not in number_of_bricks:
+        return 1, []
+    subvol = number_of_bricks.split('x', 1)[1].split('=', 1)[0]
+    numbers = [int(num) for num in re.findall(r'\d+', subvol)]
+    if not numbers:
+        return None, []
+    return sum(numbers), numbers if '(' in subvol else []
+
+
+def _group_subvols(bricks, num_of_bricks_per_subvol):
+    """Groups the bricks into Subvolume objects of the given size"""
+    if not num_of_bricks_per_subvol:
+        return []
+    return [Subvolume(index, bricks[i:i + num_of_bricks_per_subvol])
+            for index, i in enumerate(range(0, len(bricks),
+                                            num_of_bricks_per_subvol))]
+
+
+class Brick(object):
+    """Brick of a volume as reported by volume info.
+
+    Attributes:
+        name (str): brick in 'host:path' format.
+        host (str): host of the brick.
+        path (str): path of the brick on the host.
+        uuid (str): uuid of the brick.
+        host_uuid (str): uuid of the peer hosting the brick.
+        is_arbiter (bool): True if the brick is an arbiter brick.
+    """
+    __slots__ = ('name', 'host', 'path', 'uuid', 'host_uuid', 'is_arbiter')
+
+    def __init__(self, name, uuid=None, host_uuid=None, is_arbiter=False):
+        self.name = name
+        self.host, _, self.path = name.partition(':')
+        self.uuid = uuid
+        self.host_uuid = host_uuid
+        self.is_arbiter = is_arbiter
+
+    @classmethod
+    def from_xml(cls, brick_elem):
+        """Builds the Brick from the 'brick' element of volume info xml"""
+        return cls(brick_elem.findtext('name') or brick_elem.text,
+                   uuid=brick_elem.get('uuid'),
+                   host_uuid=brick_elem.findtext('hostUuid'),
+                   is_arbiter=brick_elem.findtext('isArbiter') == '1')
+
+    def __repr__(self):
+        return "Brick(%r)" % self.name
+
+
+class Subvolume(object):
+    """Replica/disperse set (or single brick for distribute) of a volume.
+
+    Attributes:
+        index (int): index of the subvolume within the volume or tier.
+        bricks (list): list of Brick objects of the subvolume.
+    """
+    __slots__ = ('index', 'bricks')
+
+    def __init__(self, index, bricks):
+        self.index = index
+        self.bricks = bricks
+
+    @property
+    def brick_names(self):
+        """list: bricks of the subvolume in 'host:path' format"""
+        return [brick.name for brick in self.bricks]
+
+    def __len__(self):
+        return len(self.bricks)
+
+    def __iter__(self):
+        return iter(self.bricks)
+
+    def __repr__(self):
+        return "Subvolume(%d, %r)" % (self.index, self.brick_names)
+
+
+class Tier(object):
+    """Hot or cold tier of a tiered volume.
+
+    Attributes:
+        name (str): 'hot' or 'cold'.
+        type_str (str): type of the tier. Example: 'Distributed-Replicate'.
+        brick_count (int): number of bricks in the tier.
+        replica_count (int): replica count of the tier.
+        arbiter_count (int): arbiter count of the tier. None for hot tier.
+        disperse_count (int): disperse count of the tier. None for hot tier.
+        redundancy_count (int): redundancy count of the dispersed tier.
+        number_of_bricks (str): 'numberOfBricks' field as reported by
+            volume info. Example: '2 x 2 = 4'.
+        bricks (list): list of Brick objects of the tier.
+        subvols (list): list of Subvolume objects of the tier.
+    """
+    __slots__ = ('name', 'type_str', 'brick_count', 'replica_count',
+                 'arbiter_count', 'disperse_count', 'redundancy_count',
+                 'number_of_bricks', 'bricks', 'subvols')
+
+    @classmethod
+    def from_xml(cls, name, tier_elem):
+        """Builds the Tier from 'hotBricks' or 'coldBricks' element"""
+        tier = cls()
+        tier.name = name
+        tier.type_str = tier_elem.findtext('%sBrickType' % name)
+        tier.brick_count = _to_int(tier_elem.findtext('%sbrickCount' % name))
+        tier.replica_count = _to_int(
+            tier_elem.findtext('%sreplicaCount' % name))
+        tier.arbiter_count = _to_int(
+            tier_elem.findtext('%sarbiterCount' % name))
+        tier.disperse_count = _to_int(
+            tier_elem.findtext('%sdisperseCount' % name))
+        tier.number_of_bricks = tier_elem.findtext('numberOfBricks')
+        tier.bricks = [Brick.from_xml(brick)
+                       for brick in tier_elem.findall('brick')]
+
+        type_str = tier.type_str or ''
+        bricks_per_subvol, counts = _parse_number_of_bricks(
+            tier.number_of_bricks)
+        tier.redundancy_count = None
+        if type_str == 'Distribute':
+            bricks_per_subvol = 1
+        elif 'Disperse' in type_str:
+            if len(counts) > 1:
+                tier.redundancy_count = counts[1]
+        elif 'Replicate' not in type_str:
+            bricks_per_subvol = None
+        tier.subvols = _group_subvols(tier.bricks, bricks_per_subvol)
+        return tier
+
+    def __repr__(self):
+        return "Tier(%r, %r)" % (self.name, self.type_str)
+
+
+class Volume(object):
+    """Volume as reported by volume info.
+
+    Attributes:
+        name (str): name of the volume.
+        id (str): uuid of the volume.
+        status (int): status of the volume.
+        status_str (str): status of the volume. Example: 'Started'.
+        type_str (str): type of the volume. Example: 'Distributed-Disperse'.
+        brick_count, dist_count, stripe_count, replica_count, arbiter_count,
+        disperse_count, redundancy_count (int): counts of the volume.
+        transport (int): transport type of the volume.
+        options (dict): volume options reconfigured on the volume.
+        bricks (list): list of Brick objects of the volume.
+        subvols (list): list of Subvolume objects of the volume. Empty for
+            tiered volumes.
+        hot_tier (Tier): hot tier of a tiered volume. None otherwise.
+        cold_tier (Tier): cold tier of a tiered volume. None otherwise.
+    """
+    __slots__ = ('name', 'id', 'status', 'status_str', 'type_str',
+                 'brick_count', 'dist_count', 'stripe_count',
+                 'replica_count', 'arbiter_count', 'disperse_count',
+                 'redundancy_count', 'transport', 'options', 'bricks',
+                 'subvols', 'hot_tier', 'cold_tier')
+
+    _int_fields = (('status', 'status'), ('brick_count', 'brickCount'),
+                   ('dist_count', 'distCount'),
+                   ('stripe_count', 'stripeCount'),
+                   ('replica_count', 'replicaCount'),
+                   ('arbiter_count', 'arbiterCount'),
+                   ('disperse_count', 'disperseCount'),
+                   ('redundancy_count', 'redundancyCount'),
+                   ('transport', 'transport'))
+
+    @classmethod
+    def from_xml(cls, volume_elem):
+        """Builds the Volume from the 'volume' element of volume info xml"""
+        volume = cls()
+        volume.name = volume_elem.findtext('name')
+        volume.id = volume_elem.findtext('id')
+        volume.status_str = volume_elem.findtext('statusStr')
+        volume.type_str = volume_elem.findtext('typeStr')
+        for attr, tag in cls._int_fields:
+            setattr(volume, attr, _to_int(volume_elem.findtext(tag)))
+
+        volume.options = {}
+        for option in volume_elem.findall('options/option'):
+            volume.options[option.findtext('name')] = option.findtext('value')
+
+        volume.hot_tier = None
+        volume.cold_tier = None
+        volume.subvols = []
+        bricks_elem = volume_elem.find('bricks')
+        if bricks_elem is None:
+            volume.bricks = []
+            return volume
+
+        if volume.type_str == 'Tier':
+            hot_elem = bricks_elem.find('hotBricks')
+            if hot_elem is not None:
+                volume.hot_tier = Tier.from_xml('hot', hot_elem)
+            cold_elem = bricks_elem.find('coldBricks')
+            if cold_elem is not None:
+                volume.cold_tier = Tier.from_xml('cold', cold_elem)
+            volume.bricks = [brick for tier in volume.tiers
+                             for brick in tier.bricks]
+            return volume
+
+        volume.bricks = [Brick.from_xml(brick)
+                         for brick in bricks_elem.findall('brick')]
+        if volume.type_str == 'Distribute':
+            bricks_per_subvol = 1
+        elif volume.type_str in ('Replicate', 'Distributed-Replicate'):
+            bricks_per_subvol = volume.replica_count
+        elif volume.type_str in ('Disperse', 'Distributed-Disperse'):
+            bricks_per_subvol = volume.disperse_count
+        else:
+            bricks_per_subvol = None
+        volume.subvols = _group_subvols(volume.bricks, bricks_per_subvol)
+        return volume
+
+    @property
+    def is_tier(self):
+        """bool: True if the volume is a tiered volume"""
+        return self.type_str == 'Tier'
+
+    @property
+    def tiers(self):
+        """list: hot and cold Tier objects present in the volume"""
+        return [tier for tier in (self.hot_tier, self.cold_tier)
+                if tier is not None]
+
+    def __repr__(self):
+        return "Volume(%r, %r)" % (self.name, self.type_str)
+
+
+class VolumeTopology(object):
+    """Topology of all the volumes of a single volume info output.
+
+    Volumes can be accessed by name:
+        topology = get_volume_topology(mnode, 'testvol')
+        topology['testvol'].subvols[0].brick_names
+
+    Attributes:
+        volumes (dict): volume name as key and Volume object as value.
+    """
+    __slots__ = ('volumes',)
+
+    def __init__(self, volumes=None):
+        self.volumes = volumes if volumes is not None else {}
+
+    @classmethod
+    def from_xml(cls, xml_output):
+        """Builds the VolumeTopology from volume info xml output.
+
+        Args:
+            xml_output (str): output of 'gluster volume info --xml'.
+
+        Raises:
+            etree.ParseError: If xml_output is not a valid xml.
+        """
+        root = etree.XML(xml_output)
+        volumes = {}
+        for volume_elem in root.findall('volInfo/volumes/volume'):
+            volume = Volume.from_xml(volume_elem)
+            volumes[volume.name] = volume
+        return cls(volumes)
+
+    def get(self, volname, default=None):
+        """Returns the Volume object of volname, default if not present"""
+        return self.volumes.get(volname, default)
+
+    def __getitem__(self, volname):
+        return self.volumes[volname]
+
+    def __contains__(self, volname):
+        return volname in self.volumes
+
+    def __iter__(self):
+        return iter(self.volumes.values())
+
+    def __len__(self):
+        return len(self.volumes)
+
+
+@cached_query
+def get_volume_topology(mnode, volname='all'):
+    """Gets the topology of all or specified volume from a single volume
+    info.
+
+    Args:
+        mnode (str): Node on which cmd has to be executed.
+
+    Kwargs:
+        volname (str): volume name. Defaults to 'all'
+
+    Returns:
+        VolumeTopology: topology of the volume(s), on success
+        NoneType: on failure
+
+    Example:
+        topology = get_volume_topology("abc.com", volname="testvol")
+        topology['testvol'].replica_count
+        >>>3
+    """
+    cmd = "gluster volume info %s --xml" % volname
+    ret, out, _ = g.run(mnode, cmd, log_level='DEBUG')
+    if ret != 0:
+        g.log.error("volume info returned error")
+        return None
+
+    try:
+        return VolumeTopology.from_xml(out)
+    except etree.ParseError:
+        g.log.error("Failed to parse the volume info xml output of volume "
+                    "%s", volname)
+        return None
+
+
+def get_volume(mnode, volname):
+    """Gets the Volume object of the specified volume.
+
+    Args:
+        mnode (str): Node on which cmd has to be executed.
+        volname (str): volume name.
+
+    Returns:
+        Volume: Volume object, on success
+        NoneType: if the volume does not exist or on failure
+    """
+    topology = get_volume_topology(mnode, volname)
+    if topology is None or volname not in topology:
+        g.log.error("Unable to get the volume info for volume %s", volname)
+        return None
+    return topology[volname]
@@ -0,0 +1,135 @@
+#  Copyright (C) 2017 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Module providing the common polling engine used by all the
+        wait_for_* helpers in glustolibs.
+"""
+
+import time
+from glusto.core import Glusto as g
+try:
+    from time import monotonic as _now
+except ImportError:
+    from time import time as _now
+
+
+class BackoffPolicy(object):
+    """Defines the delays between two consecutive probes of a waiter.
+
+    The first probe is always done immediately. The delay before the next
+    probe starts at 'initial_delay' and is multiplied by 'factor' after
+    every unsuccessful probe, never exceeding 'max_delay'.
+
+    Args:
+        initial_delay (float): Delay in seconds after the first probe.
+        max_delay (float): Upper bound of the delay in seconds.
+        factor (float): Multiplier applied to the delay after each probe.
+    """
+    def __init__(self, initial_delay=1, max_delay=10, factor=2):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+
+    def delays(self):
+        """Generator yielding the delay to be applied after each probe."""
+        delay = self.initial_delay
+        while True:
+            yield min(delay, self.max_delay)
+            delay = delay * self.factor
+
+
+_default_policy = BackoffPolicy()
+
+
+def get_default_backoff_policy():
+    """Returns the BackoffPolicy used by waiters which do not specify one.
+
+    If 'waiter' section is defined in the glusto config with any of the keys
+    'initial_delay', 'max_delay', 'factor', those values override the
+    defaults of the module level policy.
+    """
+    waiter_config = g.config.get('waiter') if g.config else None
+    if not waiter_config:
+        return _default_policy
+    return BackoffPolicy(
+        initial_delay=waiter_config.get('initial_delay',
+                                        _default_policy.initial_delay),
+        max_delay=waiter_config.get('max_delay', _default_policy.max_delay),
+        factor=waiter_config.get('factor', _default_policy.factor))
+
+
+def set_default_backoff_policy(policy):
+    """Sets the BackoffPolicy used by waiters which do not specify one.
+
+    Args:
+        policy (BackoffPolicy): policy to be used globally.
+    """
+    global _default_policy
+    _default_policy = policy
+
+
+def wait_for(probe, condition=None, timeout=300, abort=None, policy=None):
+    """Polls the state returned by 'probe' until 'condition' is met on it or
+    the timeout expires.
+
+    Args:
+        probe (callable): Callable taking no arguments and returning the
+            current state (for example: rebalance status dict).
+
+    Kwargs:
+        condition (callable): Callable taking the state returned by probe and
+            returning True when the wait is over. Defaults to truth value of
+            the state.
+        timeout (int): timeout value in seconds. Deadline is computed from
+            a monotonic clock when available.
+        abort (callable): Callable taking the state returned by probe and
+            returning True when there is no point in waiting any further
+            (for example: rebalance has failed).
+        policy (BackoffPolicy): Delays between the probes. Defaults to the
+            policy returned by get_default_backoff_policy().
+
+    Returns:
+        tuple: Tuple containing two elements (ret, state).
+            The first element 'ret' is of type 'bool' and is True if the
+            condition is met within timeout, False otherwise.
+
+            The second element 'state' is the last state returned by probe.
+
+    Example:
+        ret, status = wait_for(
+            lambda: get_rebalance_status(mnode, volname),
+            condition=lambda s: s['aggregate']['statusStr'] == 'completed',
+            abort=lambda s: s is None)
+    """
+    if condition is None:
+        condition = bool
+    if policy is None:
+        policy = get_default_backoff_policy()
+
+    deadline = _now() + timeout
+    delays = policy.delays()
+    while True:
+        state = probe()
+        if abort is not None and abort(state):
+            return False, state
+        if condition(state):
+            return True, state
+
+        remaining = deadline - _now()
+        if remaining <= 0:
+            return False, state
+        time.sleep(min(next(delays), remaining))
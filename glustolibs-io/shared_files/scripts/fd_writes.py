@@ -21,8 +21,13 @@ import os
 import time
 import string
 import datetime
-from multiprocessing import Process
 import sys
+import ctypes
+import ctypes.util
+import heapq
+import math
+import mmap
+import threading
 
 
 def is_root(path):
@@ -77,50 +82,290 @@ def create_dir(dir_path):
     return 0
 
 
-def fd_write_file(filename, file_size, chunk_sizes_list, write_time,
-                  delay_between_writes=10, log_level='INFO'):
-    """Write random data to the file until write_time
-    """
-    rc = 0
-    time_counter = 0
+# Alignment of the offsets, sizes and buffer of the O_DIRECT writes
+DIRECT_IO_ALIGNMENT = 4096
+
+# Smallest latency and growth of the buckets of LatencyHistogram
+MIN_LATENCY = 1e-6
+LATENCY_GROWTH = 1.02
+
 
+def _get_libc_pwrite():
+    """Returns the pwrite of the libc with a 64 bit offset, None if it is
+    not available. pwrite64 is preferred, the offset of pwrite being 32 bit
+    on 32 bit libcs.
+    """
     try:
-        fd = open(filename, "w+b")
-        fd.seek(file_size-1)
-        fd.write("0")
-        fd.flush()
-    except IOError as e:
-        print ("Unable to open file %s for writing : %s" % (filename,
-                                                            e.strerror))
-        return 1
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    except OSError:
+        return None
+    pwrite = getattr(libc, 'pwrite64', None)
+    if pwrite is None:
+        if ctypes.sizeof(ctypes.c_long) < 8:
+            return None
+        pwrite = getattr(libc, 'pwrite', None)
+        if pwrite is None:
+            return None
+    pwrite.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t,
+                       ctypes.c_longlong]
+    pwrite.restype = ctypes.c_ssize_t
+    return pwrite
+
+
+class LatencyHistogram(object):
+    """Bounded memory latency statistics.
+
+    The latencies are counted in logarithmic buckets, each LATENCY_GROWTH
+    times wider than the previous one, so the percentiles are accurate to
+    within a few percent whatever the number of samples. The maximum is
+    kept exactly.
+    """
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, latency):
+        bucket = int(math.ceil(math.log(max(latency, MIN_LATENCY) /
+                                        MIN_LATENCY, LATENCY_GROWTH)))
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.max = max(self.max, latency)
+
+    def merge(self, other):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent):
+        """Returns the upper bound of the bucket of the percentile"""
+        if not self.count:
+            return 0.0
+        rank = min(int(self.count * percent / 100.0), self.count - 1)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen > rank:
+                return min(MIN_LATENCY * LATENCY_GROWTH ** bucket, self.max)
+        return self.max
+
+
+class FdWriteFile(object):
+    """An open file of the fd writes engine and its statistics."""
+    def __init__(self, filename, file_size):
+        self.filename = filename
+        self.file_size = file_size
+        self.fd = None
+        self.ops = 0
+        self.bytes_written = 0
+        self.errors = 0
+        self.latencies = LatencyHistogram()
+
+
+class FdWritesEngine(object):
+    """Writes random chunks at random offsets of many open files from a
+    small pool of threads.
+
+    Every file gets a write every 'delay_between_writes' seconds (or as
+    fast as possible if it is 0) until 'write_time' seconds elapsed. The
+    writes are positional writes (pwrite) of slices of a buffer filled
+    once, a file being written by one thread at a time.
+
+    Args:
+        files (list): list of (filename, file_size).
+        chunk_sizes_list (list): sizes of the writes, chosen randomly.
+        write_time (int): total write time in seconds.
+
+    Kwargs:
+        delay_between_writes (float): delay between two writes of a file.
+        threads (int): number of writer threads.
+        direct (bool): True to open the files with O_DIRECT. The sizes and
+            offsets are then aligned to DIRECT_IO_ALIGNMENT.
+        dsync (bool): True to open the files with O_DSYNC.
+        log_level (str): 'DEBUG' to print every write.
+    """
+    def __init__(self, files, chunk_sizes_list, write_time,
+                 delay_between_writes=10, threads=4, direct=False,
+                 dsync=False, log_level='INFO'):
+        self.alignment = DIRECT_IO_ALIGNMENT if direct else 1
+        self.files = [FdWriteFile(filename, self._align(file_size))
+                      for filename, file_size in files]
+        self.chunk_sizes_list = [self._align(size)
+                                 for size in chunk_sizes_list]
+        self.write_time = write_time
+        self.delay_between_writes = delay_between_writes
+        self.threads = max(threads, 1)
+        self.direct = direct
+        self.dsync = dsync
+        self.log_level = log_level
+        self._pwrite = _get_libc_pwrite()
+        self._heap = []
+        self._cond = threading.Condition()
+        self.elapsed = 0
+        self.threads_started = 0
+
+        # Buffer the written chunks are sliced from. mmap memory is page
+        # aligned, as required by O_DIRECT.
+        self._buffer_size = self._align(max(self.chunk_sizes_list) * 2 +
+                                        1024 * 1024)
+        self._buffer = mmap.mmap(-1, self._buffer_size)
+        table = ''.join(string.printable[i % len(string.printable)]
+                        for i in range(256))
+        self._buffer.write(os.urandom(self._buffer_size).translate(table))
+        self._buffer_address = None
+        if self._pwrite is not None:
+            self._buffer_address = ctypes.addressof(
+                ctypes.c_char.from_buffer(self._buffer))
+
+    def _align(self, size):
+        """Rounds size up to the alignment of the writes"""
+        return max(-(-size // self.alignment) * self.alignment,
+                   self.alignment)
+
+    def _open_files(self):
+        flags = os.O_RDWR | os.O_CREAT
+        if self.direct:
+            flags |= os.O_DIRECT
+        if self.dsync:
+            flags |= getattr(os, 'O_DSYNC', os.O_SYNC)
+        rc = 0
+        for write_file in self.files:
+            try:
+                write_file.fd = os.open(write_file.filename, flags, 0o644)
+                os.ftruncate(write_file.fd, write_file.file_size)
+            except OSError as e:
+                print ("Unable to open file %s for writing : %s" %
+                       (write_file.filename, e.strerror))
+                rc = 1
+        return rc
 
-    while time_counter < write_time:
+    def _write_at(self, fd, buffer_offset, size, offset):
+        """Writes size bytes of the buffer at buffer_offset to the file at
+        offset.
+        """
+        written = 0
+        while written < size:
+            if self._pwrite is not None:
+                ret = self._pwrite(fd, self._buffer_address + buffer_offset +
+                                   written, size - written, offset + written)
+                if ret < 0:
+                    errno = ctypes.get_errno()
+                    raise OSError(errno, os.strerror(errno))
+            else:
+                # A file is written by one thread at a time
+                os.lseek(fd, offset + written, os.SEEK_SET)
+                ret = os.write(fd, self._buffer[
+                    buffer_offset + written:buffer_offset + size])
+            if ret == 0:
+                raise OSError(0, "No data written")
+            written += ret
+
+    def _write_chunk(self, write_file, time_counter):
+        size = min(random.choice(self.chunk_sizes_list), write_file.file_size)
+        offset = (random.randint(0, (write_file.file_size - size) //
+                                 self.alignment) * self.alignment)
+        buffer_offset = (random.randint(0, (self._buffer_size - size) //
+                                        self.alignment) * self.alignment)
+        if self.log_level.upper() == 'DEBUG':
+            print ("\tFileName: %s, File Size: %s, "
+                   "Writing to offset: %s, "
+                   "Data Length: %d, Time Counter: %d" %
+                   (write_file.filename, write_file.file_size, offset, size,
+                    time_counter))
+        start_time = time.time()
         try:
-            actual_file_size = os.stat(filename).st_size
-            current_chunk_size = random.choice(chunk_sizes_list)
-            write_data = (''.join(random.choice(string.printable) for x in
-                                  range(current_chunk_size)))
-            offset = random.randint(0, (actual_file_size - current_chunk_size))
-            if log_level.upper() == 'DEBUG':
-                print ("\tFileName: %s, File Size: %s, "
-                       "Writing to offset: %s, "
-                       "Data Length: %d, Time Counter: %d" %
-                       (filename, actual_file_size, offset, len(write_data),
-                        time_counter))
-            fd.seek(offset)
-            fd.write(write_data)
-            fd.seek(0)
-            fd.flush()
-        except IOError as e:
+            self._write_at(write_file.fd, buffer_offset, size, offset)
+        except OSError as e:
             print ("Unable to write to file '%s' : %s at time count: %dS" %
-                   (filename, e.strerror, time_counter))
-            rc = 1
+                   (write_file.filename, e.strerror, time_counter))
+            write_file.errors += 1
+            return
+        write_file.latencies.add(time.time() - start_time)
+        write_file.ops += 1
+        write_file.bytes_written += size
+
+    def _writer(self, start_time, end_time):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._heap:
+                        return
+                    due, index = self._heap[0]
+                    now = time.time()
+                    if due <= now:
+                        heapq.heappop(self._heap)
+                        break
+                    self._cond.wait(due - now)
+            self._write_chunk(self.files[index], int(due - start_time))
+            if self.delay_between_writes:
+                next_due = due + self.delay_between_writes
+            else:
+                next_due = time.time()
+            if next_due < end_time:
+                with self._cond:
+                    heapq.heappush(self._heap, (next_due, index))
+                    self._cond.notify()
+
+    def run(self):
+        """Opens the files and writes them until write_time elapsed.
+
+        Returns:
+            0 if all the writes succeeded, 1 otherwise.
+        """
+        if self.direct and self._pwrite is None:
+            print "O_DIRECT writes need the pwrite of the libc"
+            return 1
+        rc = self._open_files()
+        start_time = time.time()
+        end_time = start_time + self.write_time
+        self._heap = [(start_time, index)
+                      for index, write_file in enumerate(self.files)
+                      if write_file.fd is not None]
+        heapq.heapify(self._heap)
+        workers = [threading.Thread(target=self._writer,
+                                    args=(start_time, end_time))
+                   for _ in range(min(self.threads, len(self._heap)))]
+        self.threads_started = len(workers)
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.elapsed = time.time() - start_time
+
+        for write_file in self.files:
+            if write_file.fd is not None:
+                os.close(write_file.fd)
+            if write_file.errors:
+                rc = 1
+        return rc
 
-        time.sleep(delay_between_writes)
-        time_counter = time_counter + delay_between_writes
-
-    fd.close()
-    return rc
+    def _format_stats(self, name, ops, bytes_written, latencies):
+        def percentile(percent):
+            return latencies.percentile(percent) * 1000
+
+        elapsed = self.elapsed or 1
+        return ("%s: %d ops, %.1f ops/s, %.3f MB/s, latency ms "
+                "p50 %.3f p90 %.3f p99 %.3f max %.3f" %
+                (name, ops, ops / elapsed,
+                 bytes_written / elapsed / (1024 * 1024), percentile(50),
+                 percentile(90), percentile(99), percentile(100)))
+
+    def print_stats(self):
+        """Prints the statistics of each file and of all the files"""
+        for write_file in self.files:
+            print self._format_stats(write_file.filename, write_file.ops,
+                                     write_file.bytes_written,
+                                     write_file.latencies)
+        latencies = LatencyHistogram()
+        for write_file in self.files:
+            latencies.merge(write_file.latencies)
+        print self._format_stats(
+            "Total (%d files, %d threads)" % (len(self.files),
+                                              self.threads_started),
+            sum(write_file.ops for write_file in self.files),
+            sum(write_file.bytes_written for write_file in self.files),
+            latencies)
 
 
 def fd_writes(args):
@@ -135,7 +380,7 @@ def fd_writes(args):
         chunk_sizes_list = map(int, filter(None,
                                            args.chunk_sizes_list.split(",")))
     write_time = int(args.write_time)
-    delay_between_writes = int(args.delay_between_writes)
+    delay_between_writes = float(args.delay_between_writes)
     log_level = args.log_level
 
     # Check if dir_path is '/'
@@ -159,35 +404,25 @@ def fd_writes(args):
     file_sizes_expanded_list = []
     for size in file_sizes_list:
         if size.isdigit():
-            file_sizes_expanded_list.append(size)
+            file_sizes_expanded_list.append(int(size))
         else:
             size_numeric_value = int(size[:-1])
             size_postfix = size[-1]
             size_expanded = size_numeric_value * file_sizes_dict[size_postfix]
             file_sizes_expanded_list.append(size_expanded)
 
-    process_list = []
+    files = []
     for dirName, subdirList, fileList in os.walk(dir_path, topdown=False):
-        all_files_list = []
         for i in range(number_of_files):
             filename = os.path.join(dirName, "%s_%d" % (base_file_name, i))
-            all_files_list.append(filename)
-
-        for filename in all_files_list:
-            process_list.append(
-                Process(target=fd_write_file,
-                        args=(filename,
-                              random.choice(file_sizes_expanded_list),
-                              chunk_sizes_list,
-                              write_time, delay_between_writes, log_level)
-                        ))
-
-    for each_process in process_list:
-        each_process.start()
-
-    for each_process in process_list:
-        each_process.join()
-    return 0
+            files.append((filename, random.choice(file_sizes_expanded_list)))
+
+    engine = FdWritesEngine(files, chunk_sizes_list, write_time,
+                            delay_between_writes, int(args.threads),
+                            args.direct, args.dsync, log_level)
+    rc = engine.run()
+    engine.print_stats()
+    return rc
 
 
 if __name__ == "__main__":
@@ -234,6 +469,20 @@ if __name__ == "__main__":
                         dest='log_level', action="store",
                         default="INFO")
 
+    parser.add_argument('--threads',
+                        help="Number of threads writing the files",
+                        dest='threads', action="store", default=4)
+
+    parser.add_argument('--direct',
+                        help="Open the files with O_DIRECT. Sizes and "
+                        "offsets are aligned to %d bytes" %
+                        DIRECT_IO_ALIGNMENT,
+                        dest='direct', action="store_true", default=False)
+
+    parser.add_argument('--dsync',
+                        help="Open the files with O_DSYNC",
+                        dest='dsync', action="store_true", default=False)
+
     parser.add_argument('dir', metavar='DIR', type=str,
                         help="Directory on which operations has "
                         "to be performed")
@@ -25,12 +25,20 @@ import sys
 import random
 import string
 import datetime
-from multiprocessing import Process
+import binascii
+import hashlib
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
+import time
 import subprocess
 from docx import Document
 import contextlib
 import platform
 import shutil
+import mmap
+import ctypes
+import ctypes.util
+import errno
 
 if platform.system() == "Windows":
     path_sep = "\\"
@@ -110,9 +118,106 @@ def create_dir(dir_path):
     return 0
 
 
+class DataGenerator(object):
+    """Generates the contents of the files block by block.
+
+    Each block is either a unique block, made of random characters from a
+    PRNG seeded per file, or (with a probability of 'dedup_ratio') a copy
+    of one of the blocks of a pool shared by all the files. 'compress_ratio'
+    of each unique block is filled with a single character.
+
+    Args:
+        seed (int): Seed from which the seed of each file is derived, so
+            that the same file gets the same contents on every run. None
+            for contents differing on every run.
+        dedup_ratio (float): Ratio (0 to 1) of the blocks copied from the
+            pool of shared blocks.
+        compress_ratio (float): Ratio (0 to 1) of each unique block filled
+            with a single character.
+    """
+    BLOCK_SIZE = 65536
+    POOL_SIZE = 16
+
+    def __init__(self, seed=None, dedup_ratio=0.0, compress_ratio=0.0):
+        if not (0 <= dedup_ratio <= 1 and 0 <= compress_ratio <= 1):
+            raise ValueError("dedup and compress ratios must be between "
+                             "0 and 1")
+        self.seed = seed
+        self.dedup_ratio = dedup_ratio
+        self.compress_ratio = compress_ratio
+        self._pools = {}
+        self._tables = {}
+
+    def _random_chars(self, rng, size, chars):
+        """Returns size random characters from chars"""
+        if size <= 0:
+            return ''
+        if chars not in self._tables:
+            self._tables[chars] = ''.join(chars[i % len(chars)]
+                                          for i in range(256))
+        data = binascii.unhexlify('%0*x' % (size * 2,
+                                            rng.getrandbits(size * 8)))
+        return data.translate(self._tables[chars])
+
+    def _unique_block(self, rng, chars):
+        random_size = int(self.BLOCK_SIZE * (1 - self.compress_ratio))
+        return (self._random_chars(rng, random_size, chars) +
+                chars[0] * (self.BLOCK_SIZE - random_size))
+
+    def _get_pool(self, chars):
+        """Returns the pool of shared blocks made of chars"""
+        if chars not in self._pools:
+            rng = random.Random(self.seed)
+            self._pools[chars] = [self._unique_block(rng, chars)
+                                  for _ in range(self.POOL_SIZE)]
+        return self._pools[chars]
+
+    def iter_blocks(self, file_size, name, chars=string.printable):
+        """Yields the blocks of the contents of the file.
+
+        Args:
+            file_size (int): Size of the file.
+            name (str): Name of the file, from which its seed is derived.
+
+        Kwargs:
+            chars (str): Characters the contents are made of.
+        """
+        if self.seed is None:
+            rng = random.Random()
+        else:
+            rng = random.Random(int(hashlib.md5(
+                "%s:%s" % (self.seed, name)).hexdigest(), 16))
+        remaining = file_size
+        while remaining > 0:
+            if self.dedup_ratio and rng.random() < self.dedup_ratio:
+                pool = self._get_pool(chars)
+                block = pool[rng.randrange(len(pool))]
+            else:
+                block = self._unique_block(rng, chars)
+            yield block[:remaining]
+            remaining -= len(block)
+
+    def generate(self, file_size, name, chars=string.printable):
+        """Returns the contents of the file. See iter_blocks."""
+        return ''.join(self.iter_blocks(file_size, name, chars))
+
+
+def _get_data_generator(args):
+    """Returns the DataGenerator for the data options of the command, None
+    if they are invalid.
+    """
+    try:
+        return DataGenerator(getattr(args, 'seed', None),
+                             getattr(args, 'dedup_ratio', 0.0),
+                             getattr(args, 'compress_ratio', 0.0))
+    except ValueError as e:
+        print "Invalid data options: %s" % e
+        return None
+
+
 def create_dirs(dir_path, depth, num_of_dirs, num_of_files=0,
                 fixed_file_size=None, base_file_name='testfile',
-                file_types='txt'):
+                file_types='txt', data_generator=None):
     """Recursively creates dirs under the dir_path with specified depth
         and num_of_dirs in each level
 
@@ -128,30 +233,82 @@ def create_dirs(dir_path, depth, num_of_dirs, num_of_files=0,
             Defaults to None.
         base_file_name (str): base name of the file to be created.
         file_types (str): file types to be created.
+        data_generator (DataGenerator): generator of the contents of the
+            files. Defaults to random contents.
     """
+    errors = 0
     if not os.path.exists(dir_path):
         try:
             os.makedirs(dir_path)
             if num_of_files != 0:
-                _create_files(dir_path, num_of_files, fixed_file_size,
-                              base_file_name, file_types)
+                if _create_files(dir_path, num_of_files, fixed_file_size,
+                                 base_file_name, file_types,
+                                 data_generator) != 0:
+                    errors += 1
         except (OSError, IOError) as e:
             if 'File exists' not in e.strerror:
                 print "Unable to create dir '%s' : %s" % (dir_path, e.strerror)
-                with open("/tmp/file_dir_ops_create_dirs_rc", "w") as fd:
-                    try:
-                        fd.write("1")
-                        fd.flush()
-                        fd.close()
-                    except IOError as e:
-                        print ("Unable to write the rc to the "
-                               "/tmp/file_dir_ops_create_dirs_rc file")
+                errors += 1
     if depth == 0:
-        return 0
+        return errors
     for i in range(num_of_dirs):
         dirname = "dir%d" % i
-        create_dirs(os.path.join(dir_path, dirname), depth - 1, num_of_dirs,
-                    num_of_files, fixed_file_size)
+        errors += create_dirs(os.path.join(dir_path, dirname), depth - 1,
+                              num_of_dirs, num_of_files, fixed_file_size,
+                              data_generator=data_generator)
+    return errors
+
+
+def _create_dirs_subtree(create_dirs_args):
+    """Worker of the create dirs pool: creates one subtree with create_dirs.
+
+    Returns:
+        tuple: (pid of the worker, number of errors, time taken in seconds)
+    """
+    start_time = time.time()
+    try:
+        errors = create_dirs(*create_dirs_args)
+    except Exception as e:
+        print "Unable to create '%s' : %s" % (create_dirs_args[0], e)
+        errors = 1
+    return os.getpid(), errors, time.time() - start_time
+
+
+def _create_dirs_in_pool(subtrees, workers=0):
+    """Creates the subtrees with a pool of worker processes pulling them
+    from a queue.
+
+    Args:
+        subtrees (list): create_dirs arguments of each subtree.
+
+    Kwargs:
+        workers (int): Number of worker processes. Defaults to the number
+            of cpus.
+
+    Returns:
+        0 if all the subtrees are created, 1 otherwise.
+    """
+    workers = min(workers or cpu_count(), len(subtrees)) or 1
+    worker_stats = {}
+    pool = Pool(workers)
+    try:
+        for pid, errors, elapsed in pool.imap_unordered(_create_dirs_subtree,
+                                                        subtrees):
+            stats = worker_stats.setdefault(pid, [0, 0, 0.0])
+            stats[0] += 1
+            stats[1] += errors
+            stats[2] += elapsed
+    finally:
+        pool.close()
+        pool.join()
+
+    for pid, (num_of_subtrees, errors, elapsed) in sorted(
+            worker_stats.items()):
+        print ("Worker %d: %d subtrees, %d errors, %.2f seconds" %
+               (pid, num_of_subtrees, errors, elapsed))
+    if sum(stats[1] for stats in worker_stats.values()):
+        return 1
+    return 0
 
 
 def create_deep_dirs(args):
@@ -173,30 +330,12 @@ def create_deep_dirs(args):
     if rc != 0:
         return rc
 
-    # Remove the file which saves the rc if already exists
-    if os.path.exists("/tmp/file_dir_ops_create_dirs_rc"):
-        os.remove("/tmp/file_dir_ops_create_dirs_rc")
-
-    process_list = []
+    subtrees = []
     for i in range(dirname_start_num, (dirname_start_num + dir_length)):
         num_of_dirs = random.choice(range(1, max_num_of_dirs + 1))
         process_dir_path = os.path.join(dir_path, "user%d" % i)
-        process_list.append(Process(target=create_dirs,
-                                    args=(process_dir_path, dir_depth,
-                                          num_of_dirs)))
-    for each_process in process_list:
-        each_process.start()
-
-    for each_process in process_list:
-        each_process.join()
-
-    rc = 0
-    if os.path.exists("/tmp/file_dir_ops_create_dirs_rc"):
-        fd = open("/tmp/file_dir_ops_create_dirs_rc", "r")
-        rc = fd.read()
-        fd.close()
-        os.remove("/tmp/file_dir_ops_create_dirs_rc")
-    return int(rc)
+        subtrees.append((process_dir_path, dir_depth, num_of_dirs))
+    return _create_dirs_in_pool(subtrees, getattr(args, 'workers', 0))
 
 
 def create_deep_dirs_with_files(args):
@@ -217,6 +356,9 @@ def create_deep_dirs_with_files(args):
         fixed_file_size = None
     base_file_name = args.base_file_name
     dirname_start_num = args.dirname_start_num
+    data_generator = _get_data_generator(args)
+    if data_generator is None:
+        return 1
 
     # Check if dir_path is '/'
     if is_root(dir_path):
@@ -227,36 +369,22 @@ def create_deep_dirs_with_files(args):
     if rc != 0:
         return rc
 
-    # Remove the file which saves the rc if already exists
-    if os.path.exists("/tmp/file_dir_ops_create_dirs_rc"):
-        os.remove("/tmp/file_dir_ops_create_dirs_rc")
-
-    process_list = []
+    subtrees = []
     for i in range(dirname_start_num, (dirname_start_num + dir_length)):
         num_of_dirs = random.choice(range(1, max_num_of_dirs + 1))
         process_dir_path = os.path.join(dir_path, "user%d" % i)
-        process_list.append(Process(target=create_dirs,
-                                    args=(process_dir_path, dir_depth,
-                                          num_of_dirs, num_of_files,
-                                          fixed_file_size, base_file_name,
-                                          file_types)))
-    for each_process in process_list:
-        each_process.start()
-
-    for each_process in process_list:
-        each_process.join()
-    rc = 0
-    if os.path.exists("/tmp/file_dir_ops_create_dirs_rc"):
-        fd = open("/tmp/file_dir_ops_create_dirs_rc", "r")
-        rc = fd.read()
-        fd.close()
-        os.remove("/tmp/file_dir_ops_create_dirs_rc")
-    return int(rc)
+        subtrees.append((process_dir_path, dir_depth, num_of_dirs,
+                         num_of_files, fixed_file_size, base_file_name,
+                         file_types, data_generator))
+    return _create_dirs_in_pool(subtrees, getattr(args, 'workers', 0))
 
 
 def _create_files(dir_path, num_of_files, fixed_file_size=None,
-                  base_file_name='testfile', file_types='txt'):
+                  base_file_name='testfile', file_types='txt',
+                  data_generator=None):
     rc = 0
+    if data_generator is None:
+        data_generator = DataGenerator()
     file_types_list = file_types.split()
     file_sizes_dict = {
         '1k': 1024,
@@ -288,8 +416,9 @@ def _create_files(dir_path, num_of_files, fixed_file_size=None,
 
             with open(fname_abs_path, "w+") as fd:
                 try:
-                    fd.write(''.join(random.choice(string.printable) for x in
-                                     range(file_size)))
+                    for block in data_generator.iter_blocks(
+                            file_size, fname_abs_path):
+                        fd.write(block)
                     fd.flush()
                     fd.close()
                 except IOError as e:
@@ -301,8 +430,8 @@ def _create_files(dir_path, num_of_files, fixed_file_size=None,
             try:
                 document = Document()
                 str_to_write = string.ascii_letters + string.digits
-                file_str = (''.join(random.choice(str_to_write)
-                                    for x in range(file_size)))
+                file_str = data_generator.generate(file_size, fname_abs_path,
+                                                   str_to_write)
                 document.add_paragraph(file_str)
                 document.save(fname_abs_path)
             except Exception as e:
@@ -332,6 +461,9 @@ def create_files(args):
         fixed_file_size = None
     base_file_name = args.base_file_name
     file_types = args.file_types
+    data_generator = _get_data_generator(args)
+    if data_generator is None:
+        return 1
 
     # Check if dir_path is '/'
     if is_root(dir_path):
@@ -345,7 +477,7 @@ def create_files(args):
     rc = 0
     for dirName, subdirList, fileList in os.walk(dir_path, topdown=False):
         _rc = _create_files(dirName, num_of_files, fixed_file_size,
-                            base_file_name, file_types)
+                            base_file_name, file_types, data_generator)
         if _rc != 0:
             rc = 1
     return rc
@@ -674,35 +806,249 @@ def create_hard_links(args):
     return rc
 
 
+# Size of the reads of the read command
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+def _print_throughput(operation, num_of_files, num_of_bytes, elapsed,
+                      fh=sys.stdout):
+    """Prints the files/s and MB/s of an operation to fh"""
+    elapsed = elapsed or 1e-6
+    print >> fh, ("%s %d files, %d bytes in %.2f seconds: "
+                  "%.1f files/s, %.2f MB/s" %
+                  (operation, num_of_files, num_of_bytes, elapsed,
+                   num_of_files / elapsed,
+                   num_of_bytes / elapsed / (1024 * 1024)))
+
+
+def _read_file(path, checksum=None, use_mmap=False, log_fh=None,
+               block_size=READ_BLOCK_SIZE):
+    """Reads a file, optionally checksumming it and logging its contents.
+
+    Args:
+        path (str): Path of the file to read.
+
+    Kwargs:
+        checksum (str): hashlib algorithm of the checksum of the file.
+            None to not checksum it.
+        use_mmap (bool): True to read the file through mmap.
+        log_fh (file): File the contents of the file are written to.
+        block_size (int): Size of the reads.
+
+    Returns:
+        tuple: (number of bytes read, hex digest of the file or None)
+    """
+    digest = hashlib.new(checksum) if checksum else None
+    num_of_bytes = 0
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        size = os.fstat(fd).st_size
+        if use_mmap and size:
+            with contextlib.closing(mmap.mmap(fd, 0,
+                                              access=mmap.ACCESS_READ)) as mm:
+                for offset in range(0, len(mm), block_size):
+                    data = mm[offset:offset + block_size]
+                    num_of_bytes += len(data)
+                    if digest is not None:
+                        digest.update(data)
+                    if log_fh is not None:
+                        log_fh.write(data)
+        else:
+            while True:
+                data = os.read(fd, block_size)
+                if not data:
+                    break
+                num_of_bytes += len(data)
+                if digest is not None:
+                    digest.update(data)
+                if log_fh is not None:
+                    log_fh.write(data)
+    finally:
+        os.close(fd)
+    return num_of_bytes, digest.hexdigest() if digest is not None else None
+
+
 def read(args):
-    """Reads all files under 'dir' and logs the contents of the file
-       in given log file.
+    """Reads all files under 'dir', optionally logging the contents of the
+       files in given log file and writing a manifest of their checksums.
     """
     dir_path = os.path.abspath(args.dir)
     log_file = args.log_file
+    manifest_file = getattr(args, 'manifest', None)
+    checksum = getattr(args, 'checksum', 'md5')
+    use_mmap = getattr(args, 'use_mmap', False)
+    block_size = getattr(args, 'block_size', READ_BLOCK_SIZE)
+
+    # The messages go to stderr when the manifest is written to stdout
+    msg_fh = sys.stderr if manifest_file == '-' else sys.stdout
+
+    # Check if dir_path exists
+    if not path_exists(dir_path):
+        print >> msg_fh, "Directory '%s' does not exist" % dir_path
+        return 1
+
+    log_fh = None
+    if log_file and log_file not in (os.devnull, "NUL"):
+        log_fh = open(log_file, "ab")
+    manifest_fh = None
+    if manifest_file == '-':
+        manifest_fh = sys.stdout
+    elif manifest_file:
+        manifest_fh = open(manifest_file, "w")
+
     rc = 0
-    for dir_name, subdir_list, file_list in os.walk(dir_path, topdown=False):
-        for fname in file_list:
-            new_fname, ext = os.path.splitext(fname)
-            try:
-                if platform.system() == "Windows":
-                    cmd = "type " + os.path.join(dir_name, fname)
-                elif platform.system() == "Linux":
-                    cmd = "cat " + os.path.join(dir_name, fname)
-                fh = open(log_file, "a")
-                subprocess.call(cmd, shell=True, stdout=fh)
-                fh.close()
-            except OSError:
-                rc = 1
+    num_of_files = 0
+    num_of_bytes = 0
+    start_time = time.time()
+    try:
+        for dir_name, subdir_list, file_list in os.walk(dir_path):
+            subdir_list.sort()
+            for fname in sorted(file_list):
+                path = os.path.join(dir_name, fname)
+                try:
+                    size, digest = _read_file(
+                        path, checksum if manifest_fh else None, use_mmap,
+                        log_fh, block_size)
+                except (OSError, IOError) as e:
+                    print >> msg_fh, ("Unable to read file '%s' : %s" %
+                                      (path, e))
+                    rc = 1
+                    continue
+                num_of_files += 1
+                num_of_bytes += size
+                if manifest_fh is not None:
+                    manifest_fh.write("%s  %s\n" %
+                                      (digest,
+                                       os.path.relpath(path, dir_path)))
+    finally:
+        if log_fh is not None:
+            log_fh.close()
+        if manifest_fh is not None and manifest_fh is not sys.stdout:
+            manifest_fh.close()
+
+    _print_throughput("Read", num_of_files, num_of_bytes,
+                      time.time() - start_time, msg_fh)
     return rc
 
 
+# Maximum number of bytes copied by a kernel copy call
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def _get_kernel_copy_functions():
+    """Returns the kernel side copy functions available, in order of
+    preference, as (name, function(fd_in, fd_out, count)) tuples copying
+    from and advancing the current offsets of the fds.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    except (OSError, TypeError):
+        return []
+
+    def check(ret):
+        if ret < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return ret
+
+    functions = []
+    if hasattr(libc, 'copy_file_range'):
+        copy_file_range = libc.copy_file_range
+        copy_file_range.argtypes = [ctypes.c_int, ctypes.c_void_p,
+                                    ctypes.c_int, ctypes.c_void_p,
+                                    ctypes.c_size_t, ctypes.c_uint]
+        copy_file_range.restype = ctypes.c_ssize_t
+        functions.append(('copy_file_range', lambda fd_in, fd_out, count:
+                          check(copy_file_range(fd_in, None, fd_out, None,
+                                                count, 0))))
+    if hasattr(libc, 'sendfile'):
+        sendfile = libc.sendfile
+        sendfile.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p,
+                             ctypes.c_size_t]
+        sendfile.restype = ctypes.c_ssize_t
+        functions.append(('sendfile', lambda fd_in, fd_out, count:
+                          check(sendfile(fd_out, fd_in, None, count))))
+    return functions
+
+
+_kernel_copy_functions = _get_kernel_copy_functions()
+
+
+def _copy_fd(fd_in, fd_out, size):
+    """Copies fd_in to fd_out with the first kernel copy function supported
+    for this pair of files, then with reads and writes whatever is left.
+
+    Returns:
+        str: name of the kernel copy function which copied the data, or
+            'read/write' if none of them did.
+    """
+    method = 'read/write'
+    for name, function in _kernel_copy_functions:
+        copied = 0
+        try:
+            while copied < size:
+                ret = function(fd_in, fd_out,
+                               min(size - copied, COPY_CHUNK_SIZE))
+                if ret == 0:
+                    break
+                copied += ret
+                method = name
+        except OSError as e:
+            if copied or e.errno not in (errno.EXDEV, errno.ENOSYS,
+                                         errno.EINVAL, errno.EOPNOTSUPP,
+                                         errno.EBADF):
+                raise
+            continue
+        break
+
+    while True:
+        data = os.read(fd_in, READ_BLOCK_SIZE)
+        if not data:
+            break
+        while data:
+            data = data[os.write(fd_out, data):]
+    return method
+
+
+def _copy_file(paths):
+    """Copies the contents and the mode of a file.
+
+    Args:
+        paths (tuple): (source path, destination path)
+
+    Returns:
+        tuple: (source path, size, copy method as returned by _copy_fd,
+            error message or None)
+    """
+    src, dst = paths
+    size = 0
+    method = None
+    binary = getattr(os, 'O_BINARY', 0)
+    try:
+        fd_in = os.open(src, os.O_RDONLY | binary)
+        try:
+            size = os.fstat(fd_in).st_size
+            fd_out = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC |
+                             binary, 0o666)
+            try:
+                method = _copy_fd(fd_in, fd_out, size)
+            finally:
+                os.close(fd_out)
+        finally:
+            os.close(fd_in)
+        shutil.copymode(src, dst)
+    except (OSError, IOError) as e:
+        return src, size, method, str(e)
+    return src, size, method, None
+
+
 def copy(args):
     """
     Copies files/dirs under 'dir' to destination directory
     """
     src_dir = os.path.abspath(args.src_dir)
-    dest_dir = args.dest_dir
+    dest_dir = os.path.abspath(args.dest_dir)
+    workers = getattr(args, 'workers', 0) or cpu_count()
 
     # Check if src_dir is '/'
     if is_root(src_dir):
@@ -718,24 +1064,53 @@ def copy(args):
     if rc != 0:
         return 1
 
-    rc = 0
-    for dir_name, subdir_list, file_list in os.walk(src_dir, topdown=False):
-        for fname in file_list:
-            try:
-                src = os.path.join(dir_name, fname)
-                dst = dest_dir
-                shutil.copy(src, dst)
-            except OSError:
-                rc = 1
-
+    # Walk the tree once, creating the directories and listing the files
+    start_time = time.time()
+    files = []
+    for dir_name, subdir_list, file_list in os.walk(src_dir):
+        # Do not copy dest_dir into itself
+        subdir_list[:] = [subdir for subdir in subdir_list
+                          if os.path.join(dir_name, subdir) != dest_dir]
+        dest_dir_name = os.path.normpath(
+            os.path.join(dest_dir, os.path.relpath(dir_name, src_dir)))
         if dir_name != src_dir:
             try:
-                src = dir_name
-                dst = (dest_dir + path_sep +
-                       os.path.basename(os.path.normpath(src)))
-                shutil.copytree(src, dst)
-            except OSError:
+                os.mkdir(dest_dir_name)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    print "Unable to create dir: %s" % dest_dir_name
+                    rc = 1
+                    subdir_list[:] = []
+                    continue
+        for fname in file_list:
+            files.append((os.path.join(dir_name, fname),
+                          os.path.join(dest_dir_name, fname)))
+
+    num_of_files = 0
+    num_of_bytes = 0
+    methods = {}
+    pool = ThreadPool(max(min(workers, len(files)), 1))
+    try:
+        for src, size, method, error in pool.imap_unordered(
+                _copy_file, files, chunksize=16):
+            if error is not None:
+                print "Unable to copy file '%s' : %s" % (src, error)
                 rc = 1
+                continue
+            num_of_files += 1
+            num_of_bytes += size
+            methods[method] = methods.get(method, 0) + 1
+    finally:
+        pool.close()
+        pool.join()
+
+    print ("Copied with %d workers: %s" %
+           (max(min(workers, len(files)), 1),
+            ", ".join("%d files using %s" % (count, method)
+                      for method, count in sorted(methods.items())) or
+            "no files"))
+    _print_throughput("Copied", num_of_files, num_of_bytes,
+                      time.time() - start_time)
     return rc
 
 
@@ -770,8 +1145,15 @@ def delete(args):
     return rc
 
 
+def non_negative_int(value):
+    """argparse type of the counts which cannot be negative"""
+    count = int(value)
+    if count < 0:
+        raise argparse.ArgumentTypeError("%s is negative" % value)
+    return count
+
+
 if __name__ == "__main__":
-    print "Starting File/Dir Ops: %s" % _get_current_time()
     test_start_time = datetime.datetime.now().replace(microsecond=0)
 
     parser = argparse.ArgumentParser(
@@ -805,6 +1187,11 @@ if __name__ == "__main__":
         help="Start the directory naming from 'dirname-start-num'",
         metavar=('dirname_start_num'), dest='dirname_start_num', default=1,
         type=int)
+    create_deep_dir_parser.add_argument(
+        '--workers', help=("Number of worker processes creating the top "
+                           "level directories. 0 for the number of cpus"),
+        metavar=('workers'), dest='workers', default=0,
+        type=non_negative_int)
     create_deep_dir_parser.add_argument(
         'dir', metavar='DIR', type=str,
         help="Directory on which operations has to be performed")
@@ -854,6 +1241,25 @@ if __name__ == "__main__":
         help="Start the directory naming from 'dirname-start-num'",
         metavar=('dirname_start_num'), dest='dirname_start_num', default=1,
         type=int)
+    create_deep_dir_with_files_parser.add_argument(
+        '--seed', help=("Seed from which the contents of each file are "
+                        "derived, for reproducible contents"),
+        metavar=('seed'), dest='seed', type=int, default=None)
+    create_deep_dir_with_files_parser.add_argument(
+        '--dedup-ratio', help=("Ratio (0 to 1) of the 64KB blocks of the "
+                               "files copied from a pool of shared blocks"),
+        metavar=('dedup_ratio'), dest='dedup_ratio', type=float,
+        default=0.0)
+    create_deep_dir_with_files_parser.add_argument(
+        '--compress-ratio', help=("Ratio (0 to 1) of each unique block "
+                                  "filled with a single character"),
+        metavar=('compress_ratio'), dest='compress_ratio', type=float,
+        default=0.0)
+    create_deep_dir_with_files_parser.add_argument(
+        '--workers', help=("Number of worker processes creating the top "
+                           "level directories. 0 for the number of cpus"),
+        metavar=('workers'), dest='workers', default=0,
+        type=non_negative_int)
     create_deep_dir_with_files_parser.add_argument(
         'dir', metavar='DIR', type=str,
         help="Directory on which operations has to be performed")
@@ -883,6 +1289,20 @@ if __name__ == "__main__":
                               " separated with space"),
         metavar=('file_types'), dest='file_types', type=str,
         default="txt")
+    create_files_parser.add_argument(
+        '--seed', help=("Seed from which the contents of each file are "
+                        "derived, for reproducible contents"),
+        metavar=('seed'), dest='seed', type=int, default=None)
+    create_files_parser.add_argument(
+        '--dedup-ratio', help=("Ratio (0 to 1) of the 64KB blocks of the "
+                               "files copied from a pool of shared blocks"),
+        metavar=('dedup_ratio'), dest='dedup_ratio', type=float,
+        default=0.0)
+    create_files_parser.add_argument(
+        '--compress-ratio', help=("Ratio (0 to 1) of each unique block "
+                                  "filled with a single character"),
+        metavar=('compress_ratio'), dest='compress_ratio', type=float,
+        default=0.0)
     create_files_parser.add_argument(
         'dir', metavar='DIR', type=str,
         help="Directory on which operations has to be performed")
@@ -1010,6 +1430,22 @@ if __name__ == "__main__":
                            "contents of file",
         metavar=('log_file'), dest='log_file',
         type=str, default=default_log_file)
+    read_parser.add_argument(
+        '--manifest', help=("Output filename of the manifest of the "
+                            "checksums of the files, '-' for stdout (the "
+                            "other messages then go to stderr)"),
+        metavar=('manifest'), dest='manifest', type=str, default=None)
+    read_parser.add_argument(
+        '--checksum', help="Checksum algorithm of the manifest",
+        metavar=('checksum'), dest='checksum', type=str, default='md5',
+        choices=['md5', 'sha1', 'sha256'])
+    read_parser.add_argument(
+        '--mmap', help="Read the files through mmap",
+        dest='use_mmap', action='store_true', default=False)
+    read_parser.add_argument(
+        '--block-size', help="Size of the reads in bytes",
+        metavar=('block_size'), dest='block_size', type=int,
+        default=READ_BLOCK_SIZE)
     read_parser.add_argument(
         'dir', metavar='DIR', type=str,
         help="Directory on which operations has to be performed")
@@ -1024,6 +1460,11 @@ if __name__ == "__main__":
         '--dest-dir', help="Output directory to copy files/dirs",
         metavar=('dest_dir'), dest='dest_dir',
         type=str)
+    copy_parser.add_argument(
+        '--workers', help=("Number of worker threads copying the files. "
+                           "0 for the number of cpus"),
+        metavar=('workers'), dest='workers', default=0,
+        type=non_negative_int)
     copy_parser.add_argument(
         'src_dir', metavar='src_dir', type=str,
         help="Directory on which operations has to be performed")
@@ -1040,9 +1481,16 @@ if __name__ == "__main__":
     delete_parser.set_defaults(func=delete)
 
     args = parser.parse_args()
+
+    # Keep stdout for the manifest when it is written there
+    msg_fh = sys.stdout
+    if getattr(args, 'manifest', None) == '-':
+        msg_fh = sys.stderr
+
+    print >> msg_fh, "Starting File/Dir Ops: %s" % _get_current_time()
     rc = args.func(args)
 
     test_end_time = datetime.datetime.now().replace(microsecond=0)
-    print "Execution time: %s" % (test_end_time - test_start_time)
-    print "Ending File/Dir Ops %s" % _get_current_time()
+    print >> msg_fh, "Execution time: %s" % (test_end_time - test_start_time)
+    print >> msg_fh, "Ending File/Dir Ops %s" % _get_current_time()
     sys.exit(rc)